@@ -3,6 +3,11 @@ import rapidfuzz.fuzz
 import rapidfuzz.process
 import time
 import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Path ke file CSV hasil ekstraksi kelas Anda
@@ -60,27 +65,9 @@ if missing_cols_2:
 print("Mengekstrak nama kelas unik dan membuat peta komentar...")
 
 def create_class_comment_map(df, class_col, subclass_col, class_comment_c, subclass_comment_c):
-    """Membuat mapping dari nama kelas ke komentarnya."""
-    comment_map = {}
-    # Iterasi per baris untuk mengisi map komentar
-    for index, row in df.iterrows():
-        class_name = str(row[class_col])
-        subclass_name = str(row[subclass_col])
-        class_comment = str(row[class_comment_c]) if pd.notna(row[class_comment_c]) else ""
-        subclass_comment = str(row[subclass_comment_c]) if pd.notna(row[subclass_comment_c]) else ""
-
-        # Tambahkan ke map jika nama belum ada (ambil komentar dari kemunculan pertama)
-        if class_name and class_name not in comment_map:
-            comment_map[class_name] = class_comment
-        if subclass_name and subclass_name not in comment_map:
-            comment_map[subclass_name] = subclass_comment
-            
-    # Ekstrak juga list nama unik seperti sebelumnya
-    names = pd.concat([df[class_col], df[subclass_col]]) \
-              .astype(str).fillna('').unique().tolist()
-    class_names_list = sorted([name for name in names if name])
-
-    return class_names_list, comment_map
+    """Membuat mapping dari nama kelas ke komentarnya (kemunculan pertama, lihat entity_catalog)."""
+    catalog = EntityCatalog.from_columns(df, (class_col, subclass_col), (class_comment_c, subclass_comment_c))
+    return catalog.sorted_names(), catalog.comment_map()
 
 try:
     class_names_1, comment_map1 = create_class_comment_map(df_cls1, class_col_name, subclass_col_name, class_comment_col, subclass_comment_col)
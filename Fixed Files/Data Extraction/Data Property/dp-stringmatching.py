@@ -3,6 +3,11 @@ import rapidfuzz.fuzz
 import rapidfuzz.process
 import time
 import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Ganti dengan path sebenarnya ke file CSV data property Anda
@@ -60,22 +65,9 @@ if missing_cols_2:
 print("Mengekstrak nama data property unik dan membuat peta komentar...")
 
 def create_dp_comment_map(df, dp_name_col, dp_comment_col):
-    """Membuat mapping dari nama data property ke komentarnya."""
-    comment_map = {}
-    # Iterasi per baris untuk mengisi map komentar
-    for index, row in df.iterrows():
-        dp_name = str(row[dp_name_col])
-        dp_comment = str(row[dp_comment_col]) if pd.notna(row[dp_comment_col]) else ""
-
-        # Tambahkan ke map jika nama belum ada (ambil komentar dari kemunculan pertama)
-        if dp_name and dp_name not in comment_map:
-            comment_map[dp_name] = dp_comment
-
-    # Ekstrak juga list nama unik
-    dp_names_list = sorted(df[dp_name_col].astype(str).fillna('').unique())
-    dp_names_list = [name for name in dp_names_list if name] # Hapus string kosong
-
-    return dp_names_list, comment_map
+    """Membuat mapping dari nama data property ke komentarnya (kemunculan pertama, lihat entity_catalog)."""
+    catalog = EntityCatalog.from_columns(df, (dp_name_col,), (dp_comment_col,))
+    return catalog.sorted_names(), catalog.comment_map()
 
 try:
     dp_names_1, comment_map1 = create_dp_comment_map(df_dp1, dp_col_name, dp_comment_col_name)
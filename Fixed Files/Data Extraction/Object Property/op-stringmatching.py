@@ -3,6 +3,11 @@ import rapidfuzz.fuzz
 import rapidfuzz.process
 import time
 import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Ganti dengan path sebenarnya ke file CSV object property Anda
@@ -62,23 +67,9 @@ if missing_cols_2:
 print("Mengekstrak nama object property unik dan membuat peta komentar...")
 
 def create_op_comment_map(df, op_name_col, op_comment_col):
-    """Membuat mapping dari nama object property ke komentarnya."""
-    comment_map = {}
-    # Iterasi per baris untuk mengisi map komentar
-    for index, row in df.iterrows():
-        op_name = str(row[op_name_col])
-        # Ambil komentar dari kolom predicateComment
-        op_comment = str(row[op_comment_col]) if pd.notna(row[op_comment_col]) else ""
-
-        # Tambahkan ke map jika nama belum ada (ambil komentar dari kemunculan pertama)
-        if op_name and op_name not in comment_map:
-            comment_map[op_name] = op_comment
-
-    # Ekstrak juga list nama unik dari kolom predicate
-    op_names_list = sorted(df[op_name_col].astype(str).fillna('').unique())
-    op_names_list = [name for name in op_names_list if name] # Hapus string kosong
-
-    return op_names_list, comment_map
+    """Membuat mapping dari nama object property ke komentarnya (kemunculan pertama, lihat entity_catalog)."""
+    catalog = EntityCatalog.from_columns(df, (op_name_col,), (op_comment_col,))
+    return catalog.sorted_names(), catalog.comment_map()
 
 try:
     # Buat map komentar hanya untuk predicate/object property
@@ -1,11 +1,16 @@
-from rdflib import Graph, URIRef
+import os
+import sys
+from rdflib import URIRef
 from rdflib.namespace import RDF, RDFS, OWL, XSD
 
+# graph_cache ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process"))
+from graph_cache import load_graph
+
 # Load RDF dari file lokal Anda
-g = Graph()
 try:
     # Gunakan r-string (r"...") untuk memastikan path file di Windows terbaca dengan benar
-    g.parse(r"D:\thesis\Fixed Files\Local Ontologies\Local OSN.rdf", format="xml")
+    g = load_graph(r"D:\thesis\Fixed Files\Local Ontologies\Local OSN.rdf", format="xml")
     print("Graph berhasil di-load.")
     print(f"Total triples dalam graph: {len(g)}")
 except FileNotFoundError:
@@ -1,6 +1,12 @@
 import pandas as pd
 import networkx as nx
 import time
+import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Nama file CSV yang berisi gabungan semua hasil pairwise matching DATA PROPERTY
@@ -57,18 +63,8 @@ except Exception as e:
 
 # --- 2. Buat Peta Komentar Global untuk Data Property ---
 print("Membuat peta komentar global untuk data property...")
-element_comment_map = {}
-for index, row in df_combined.iterrows():
-    e1_id = str(row[col_element1]) # ID unik DP Onto 1 (misal: MCSS:hasEmail)
-    e2_id = str(row[col_element2]) # ID unik DP Onto 2 (misal: OFB:userEmail)
-    c1 = str(row[col_comment1])    # Komentar DP 1
-    c2 = str(row[col_comment2])    # Komentar DP 2
-
-    # Simpan komentar jika elemen belum ada di map (ambil dari kemunculan pertama)
-    if e1_id not in element_comment_map:
-        element_comment_map[e1_id] = c1
-    if e2_id not in element_comment_map:
-        element_comment_map[e2_id] = c2
+# Komentar dari kemunculan pertama setiap elemen (lihat entity_catalog)
+element_comment_map = EntityCatalog.from_matches(df_combined).comment_map()
 
 print(f"Peta komentar dibuat untuk {len(element_comment_map)} data property unik.")
 
@@ -76,15 +72,9 @@ print(f"Peta komentar dibuat untuk {len(element_comment_map)} data property unik
 print(f"Membangun graf keterhubungan data property (menggunakan skor >= {graph_threshold})...")
 G = nx.Graph()
 
-# Iterasi melalui setiap baris (kecocokan pairwise) di DataFrame
-for index, row in df_combined.iterrows():
-    score = row[col_score]
-    element1 = str(row[col_element1])
-    element2 = str(row[col_element2])
-
-    # Hanya tambahkan edge jika skor memenuhi threshold
-    if score >= graph_threshold:
-        G.add_edge(element1, element2, weight=score)
+# Hanya baris dengan skor memenuhi threshold yang menjadi edge (urutan baris dipertahankan)
+valid = df_combined[df_combined[col_score] >= graph_threshold]
+G.add_weighted_edges_from(zip(valid[col_element1].astype(str), valid[col_element2].astype(str), valid[col_score]))
 
 print(f"Graf dibangun. Jumlah node (DP unik): {G.number_of_nodes()}, Jumlah edge (hubungan valid): {G.number_of_edges()}")
 
@@ -1,6 +1,12 @@
 import pandas as pd
 import networkx as nx
 import time
+import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Nama file CSV yang berisi gabungan semua hasil pairwise matching OBJECT PROPERTY
@@ -58,18 +64,8 @@ except Exception as e:
 # --- 2. Buat Peta Komentar Global untuk Object Property ---
 # Membuat dictionary untuk menyimpan komentar (predicateComment) setiap OP unik
 print("Membuat peta komentar global untuk object property...")
-element_comment_map = {}
-for index, row in df_combined.iterrows():
-    e1_id = str(row[col_element1]) # ID unik OP Onto 1 (misal: MCSS:canEditProfile)
-    e2_id = str(row[col_element2]) # ID unik OP Onto 2 (misal: OFB:editUserProfile)
-    c1 = str(row[col_comment1])    # Komentar OP 1 (dari predicateComment asli)
-    c2 = str(row[col_comment2])    # Komentar OP 2 (dari predicateComment asli)
-
-    # Simpan komentar jika elemen belum ada di map (ambil dari kemunculan pertama)
-    if e1_id not in element_comment_map:
-        element_comment_map[e1_id] = c1
-    if e2_id not in element_comment_map:
-        element_comment_map[e2_id] = c2
+# Komentar dari kemunculan pertama setiap elemen (lihat entity_catalog)
+element_comment_map = EntityCatalog.from_matches(df_combined).comment_map()
 
 print(f"Peta komentar dibuat untuk {len(element_comment_map)} object property unik.")
 
@@ -77,15 +73,9 @@ print(f"Peta komentar dibuat untuk {len(element_comment_map)} object property un
 print(f"Membangun graf keterhubungan object property (menggunakan skor >= {graph_threshold})...")
 G = nx.Graph()
 
-# Iterasi melalui setiap baris (kecocokan pairwise) di DataFrame
-for index, row in df_combined.iterrows():
-    score = row[col_score]
-    element1 = str(row[col_element1])
-    element2 = str(row[col_element2])
-
-    # Hanya tambahkan edge jika skor memenuhi threshold
-    if score >= graph_threshold:
-        G.add_edge(element1, element2, weight=score)
+# Hanya baris dengan skor memenuhi threshold yang menjadi edge (urutan baris dipertahankan)
+valid = df_combined[df_combined[col_score] >= graph_threshold]
+G.add_weighted_edges_from(zip(valid[col_element1].astype(str), valid[col_element2].astype(str), valid[col_score]))
 
 print(f"Graf dibangun. Jumlah node (OP unik): {G.number_of_nodes()}, Jumlah edge (hubungan valid): {G.number_of_edges()}")
 
@@ -1,6 +1,12 @@
 import pandas as pd
 import networkx as nx
 import time
+import os
+import sys
+
+# entity_catalog ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process"))
+from entity_catalog import EntityCatalog
 
 # --- Konfigurasi ---
 # Nama file CSV yang berisi gabungan semua hasil pairwise matching
@@ -62,18 +68,8 @@ except Exception as e:
 # Membuat dictionary untuk menyimpan komentar setiap elemen unik
 # Ini diperlukan agar kita bisa menampilkan komentar saat menampilkan grup nanti
 print("Membuat peta komentar global...")
-element_comment_map = {}
-for index, row in df_combined.iterrows():
-    e1_id = str(row[col_element1])
-    e2_id = str(row[col_element2])
-    c1 = str(row[col_comment1])
-    c2 = str(row[col_comment2])
-
-    # Simpan komentar jika elemen belum ada di map (ambil dari kemunculan pertama)
-    if e1_id not in element_comment_map:
-        element_comment_map[e1_id] = c1
-    if e2_id not in element_comment_map:
-        element_comment_map[e2_id] = c2
+# Komentar dari kemunculan pertama setiap elemen (lihat entity_catalog)
+element_comment_map = EntityCatalog.from_matches(df_combined).comment_map()
 
 print(f"Peta komentar dibuat untuk {len(element_comment_map)} elemen unik.")
 
@@ -81,15 +77,9 @@ print(f"Peta komentar dibuat untuk {len(element_comment_map)} elemen unik.")
 print(f"Membangun graf keterhubungan (menggunakan skor >= {graph_threshold})...")
 G = nx.Graph()
 
-# Iterasi melalui setiap baris (kecocokan pairwise) di DataFrame
-for index, row in df_combined.iterrows():
-    score = row[col_score]
-    element1 = str(row[col_element1])
-    element2 = str(row[col_element2])
-
-    # Hanya tambahkan edge jika skor memenuhi threshold
-    if score >= graph_threshold:
-        G.add_edge(element1, element2, weight=score)
+# Hanya baris dengan skor memenuhi threshold yang menjadi edge (urutan baris dipertahankan)
+valid = df_combined[df_combined[col_score] >= graph_threshold]
+G.add_weighted_edges_from(zip(valid[col_element1].astype(str), valid[col_element2].astype(str), valid[col_score]))
 
 print(f"Graf dibangun. Jumlah node: {G.number_of_nodes()}, Jumlah edge: {G.number_of_edges()}")
 
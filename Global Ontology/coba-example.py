@@ -1,8 +1,12 @@
-from rdflib import Graph
+import os
+import sys
+
+# graph_cache ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Merging Process"))
+from graph_cache import load_graph
 
 # Load RDF
-g = Graph()
-g.parse(r"D:\thesis\Global Ontology\example.owl", format="xml")  # gunakan r-string agar backslash aman
+g = load_graph(r"D:\thesis\Global Ontology\example.owl", format="xml")  # gunakan r-string agar backslash aman
 
 # SPARQL Query
 query = """
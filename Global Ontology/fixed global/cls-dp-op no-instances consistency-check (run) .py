@@ -7,11 +7,17 @@ import logging # Untuk mengontrol output logger Owlready2
 import shutil # Untuk memeriksa keberadaan java (Python 3.3+)
 import sys # Untuk Tee dan redirection
 import traceback # Untuk mencetak traceback lengkap
+from contextlib import ExitStack # Untuk menutup/menghapus salinan World setelah pengecekan
 from datetime import datetime # Untuk timestamp di log
 
 # Menonaktifkan beberapa peringatan Owlready2 yang mungkin tidak relevan untuk output pengguna
 logging.getLogger("owlready2").setLevel(logging.ERROR) 
 
+# Optional: persistent owlready2 World shared with the Merging Process stages
+# (see Merging Process/quadstore.py).  None → fresh in-memory World.
+SHARED_WORLD_PATH = os.environ.get("GENOSIS_WORLD")
+MERGING_PROCESS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process")
+
 class Tee(object):
     """
     Objek file-like yang menulis ke beberapa file sekaligus.
@@ -182,6 +188,7 @@ def check_consistency_with_explanation(ontology_file, log_file_path="consistency
     """
     original_stdout = sys.stdout
     original_stderr = sys.stderr
+    cleanup = ExitStack()
     
     user_defined_relevant_namespace_iris = [
         "http://example.org/gsmfo.owl#", 
@@ -202,13 +209,20 @@ def check_consistency_with_explanation(ontology_file, log_file_path="consistency
             sys.stdout = tee_stdout
             sys.stderr = tee_stderr
 
-            world = World() 
+            world = None
             onto = None 
 
             try:
                 print(f"Loading ontology from file: {ontology_file}")
-                ontology_uri = "file://" + ontology_file.replace("\\", "/")
-                onto = world.get_ontology(ontology_uri).load()
+                if SHARED_WORLD_PATH:
+                    # Parsed once into the shared World; HermiT runs on a temporary copy
+                    sys.path.insert(0, MERGING_PROCESS_DIR)
+                    from quadstore import reasoner_world
+                    world, onto = cleanup.enter_context(reasoner_world(SHARED_WORLD_PATH, ontology_file))
+                else:
+                    world = World()
+                    ontology_uri = "file://" + ontology_file.replace("\\", "/")
+                    onto = world.get_ontology(ontology_uri).load()
                 
                 all_relevant_namespaces = set(user_defined_relevant_namespace_iris)
                 if onto and onto.namespace and onto.namespace.base_iri:
@@ -306,6 +320,7 @@ def check_consistency_with_explanation(ontology_file, log_file_path="consistency
                 return False
             
     finally:
+        cleanup.close()
         sys.stdout = original_stdout
         sys.stderr = original_stderr
         print(f"\nConsistency check process finished. Full log saved to: {log_file_path}")
@@ -1,10 +1,14 @@
-import rdflib
 import csv
+import os
+import sys
+
+# graph_cache ada di folder Merging Process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Merging Process"))
+from graph_cache import load_graph
 
 # Load RDF file
 rdf_file = 'mf-complete.rdf'  # Ganti dengan path ke file RDF Anda
-g = rdflib.Graph()
-g.parse(rdf_file)
+g = load_graph(rdf_file)
 
 # SPARQL query for Object Properties
 sparql_query_object_properties = """
@@ -1,89 +1,81 @@
-import rdflib
-import csv
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Load RDF file
-rdf_file = 'Local OFB.rdf'  # Ganti dengan path ke file RDF Anda
-g = rdflib.Graph()
-g.parse(rdf_file)
+from graph_extract import extract_file, extract_world, tag_from_path
 
-# SPARQL query for Object Properties
-sparql_query_object_properties = """
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
+# --- Konfigurasi default (dipakai jika tidak ada argumen file) ---
+DEFAULT_RDF_FILES = [
+    'Local OSN.rdf',
+    'Local MP.rdf',
+    'Local MCSS.rdf',
+    'Local OFB.rdf',
+]
 
-SELECT DISTINCT ?subject ?predicate ?object ?subjectComment ?predicateComment ?objectComment
-WHERE {
-  ?predicate a owl:ObjectProperty .
-  ?predicate rdfs:domain ?subject .
-  ?predicate rdfs:range ?object .
-  
-  OPTIONAL { ?subject rdfs:comment ?subjectComment . }
-  OPTIONAL { ?predicate rdfs:comment ?predicateComment . }
-  OPTIONAL { ?object rdfs:comment ?objectComment . }
-  
-  FILTER NOT EXISTS { ?subClass rdfs:subClassOf ?subject . ?subClass ?predicate ?object . }
-}
-"""
+# Setiap file diekstrak dalam satu kali jalan di atas semua triple:
+#   OP2 <tag>.csv : subject, predicate, object, subjectComment, predicateComment, objectComment
+#   DP2 <tag>.csv : class, dataProperty, classComment, dataPropertyComment
+#   CLS <tag>.csv : class, subClass, classComment, subClassComment
+#   CLS <tag> closure.json : closure subClassOf (bitset per kelas) untuk uji ancestor/descendant O(1)
+#   ENT <tag>.csv : entity, type, localName, nameLower, tokens, label, comment, commentNorm (dinormalisasi sekali)
 
-# SPARQL query for Data Properties
-sparql_query_data_properties = """
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
 
-SELECT DISTINCT ?class ?dataProperty ?classComment ?dataPropertyComment
-WHERE {
-  ?dataProperty a owl:DatatypeProperty .
-  ?dataProperty rdfs:domain ?class .
-  
-  OPTIONAL { ?class rdfs:comment ?classComment . }
-  OPTIONAL { ?dataProperty rdfs:comment ?dataPropertyComment . }
-}
-"""
+def main(args):
+    rdf_files = args.rdf_files or DEFAULT_RDF_FILES
+    if args.tags and len(args.tags) != len(rdf_files):
+        print(f"Error: jumlah --tags ({len(args.tags)}) harus sama dengan jumlah file RDF ({len(rdf_files)}).")
+        sys.exit(1)
+    tags = args.tags or [tag_from_path(f) for f in rdf_files]
+    missing = [f for f in rdf_files if not os.path.exists(f)]
+    if missing:
+        print(f"Error: file RDF tidak ditemukan: {missing}")
+        sys.exit(1)
+    os.makedirs(args.out_dir, exist_ok=True)
 
-# SPARQL query for Classes and Sub-classes
-sparql_query_classes_subclasses = """
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
+    start_time = time.time()
+    if args.world:
+        # Satu World owlready2 bersama: file yang isinya tidak berubah tidak di-parse ulang
+        print(f"Mengekstrak {len(rdf_files)} ontologi melalui World bersama: {args.world}")
+        for rdf_file, (tag, counts) in zip(rdf_files, extract_world(args.world, rdf_files, tags, args.out_dir, tuple(args.formats))):
+            summary = ", ".join(f"{name} {n:,}" for name, n in counts.items())
+            print(f"  ✔ {rdf_file} → {tag} ({summary})")
+        print(f"\nData extraction completed in {time.time() - start_time:.2f} s. "
+              f"Results written to {os.path.abspath(args.out_dir)}")
+        return
 
-SELECT DISTINCT ?class ?subClass ?classComment ?subClassComment
-WHERE {
-  ?subClass rdfs:subClassOf ?class .
-  ?class a owl:Class .
-  
-  OPTIONAL { ?class rdfs:comment ?classComment . }
-  OPTIONAL { ?subClass rdfs:comment ?subClassComment . }
-}
-"""
+    workers = args.workers or min(len(rdf_files), os.cpu_count() or 1)
+    print(f"Mengekstrak {len(rdf_files)} ontologi dengan {workers} proses …")
 
-# Function to write query results to CSV
-def write_query_to_csv(query, output_file, header):
-    qres = g.query(query)
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for row in qres:
-            writer.writerow([str(row[var] if row[var] else '') for var in header])
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_file, f, t, args.out_dir, not args.no_cache, tuple(args.formats), args.stream): f for f, t in zip(rdf_files, tags)}
+        for fut in as_completed(futures):
+            rdf_file = futures[fut]
+            try:
+                tag, counts = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"  ✘ {rdf_file}: {e}")
+                continue
+            summary = ", ".join(f"{name} {n:,}" for name, n in counts.items())
+            print(f"  ✔ {rdf_file} → {tag} ({summary})")
 
-# Output CSV files
-write_query_to_csv(
-    sparql_query_object_properties, 
-    'OP2 OFB.csv', 
-    ['subject', 'predicate', 'object', 'subjectComment', 'predicateComment', 'objectComment']
-)
+    print(f"\nData extraction completed in {time.time() - start_time:.2f} s. "
+          f"Results written to {os.path.abspath(args.out_dir)}")
+    if failed:
+        sys.exit(1)
 
-write_query_to_csv(
-    sparql_query_data_properties, 
-    'DP2 OFB.csv', 
-    ['class', 'dataProperty', 'classComment', 'dataPropertyComment']
-)
 
-write_query_to_csv(
-    sparql_query_classes_subclasses, 
-    'CLS OFB.csv', 
-    ['class', 'subClass', 'classComment', 'subClassComment']
-)
-
-print("Data extraction completed. Results written to respective CSV files.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ekstraksi OP2/DP2/CLS CSV dari satu atau lebih ontologi lokal (paralel)")
+    parser.add_argument("rdf_files", nargs="*", help="File RDF yang akan diekstrak (default: Local OSN/MP/MCSS/OFB.rdf)")
+    parser.add_argument("--tags", nargs="+", help="Tag output per file, urutan sama dengan rdf_files (default: nama file tanpa 'Local ')")
+    parser.add_argument("--out_dir", type=str, default=".", help="Direktori output CSV")
+    parser.add_argument("--formats", nargs="+", default=["csv"], choices=["csv", "parquet", "arrow"], help="Format output (boleh lebih dari satu, misal: csv parquet)")
+    parser.add_argument("--no_cache", action="store_true", help="Selalu parse ulang file RDF (abaikan cache graph_cache)")
+    parser.add_argument("--stream", action="store_true", help="Baca RDF/XML secara streaming (iterparse): hanya TBox, individu/kasus dilewati — untuk file besar berisi kasus")
+    parser.add_argument("--world", type=str, default=os.environ.get("GENOSIS_WORLD"), help="File World owlready2 bersama (SQLite); jika diisi, ekstraksi dibaca dari quadstore (serial)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: min(jumlah file, jumlah CPU))")
+    main(parser.parse_args())
@@ -1,38 +1,226 @@
+import argparse
+import os
+import sys
+import time
+
 import pandas as pd
-from rapidfuzz import fuzz, process
-
-# Definisi fungsi pencocokan dengan token_set_ratio
-def match_columns_with_token_ratio(col1, col2, threshold=80):
-    matches = []
-    for item1 in col1:
-        best_match = process.extractOne(item1, col2, scorer=fuzz.token_set_ratio)
-        if best_match and best_match[1] >= threshold:
-            matches.append((item1, best_match[0], best_match[1]))
-    return matches
-
-# Data sample untuk 'class' dan 'subClass'
-o1_classes = ['User', 'ContentCreation', 'Reels']
-o2_classes = ['LiveSpacesRooms', 'UpcomingSessions']
-
-o1_subclasses = ['AdminUser', 'RegularUser', 'ShortVideoReels']
-o2_subclasses = ['HostUser', 'GuestUser']
-
-# Matching class and subclass
-class_matches = match_columns_with_token_ratio(o1_classes, o2_classes)
-subclass_matches = match_columns_with_token_ratio(o1_subclasses, o2_subclasses)
-
-# Membuat DataFrame untuk hasil pencocokan class dan subclass
-class_subclass_results = {
-    'Type': ['Class'] * len(class_matches) + ['SubClass'] * len(subclass_matches),
-    'Item_O1': [match[0] for match in class_matches + subclass_matches],
-    'Item_O2': [match[1] for match in class_matches + subclass_matches],
-    'Similarity': [match[2] for match in class_matches + subclass_matches]
-}
-
-class_subclass_df = pd.DataFrame(class_subclass_results)
-
-# Menyimpan hasil ke CSV
-output_class_path = 'class_subclass_alignment_results.csv'
-class_subclass_df.to_csv(output_class_path, index=False)
-
-import ace_tools as tools; tools.display_dataframe_to_user(name="Class and SubClass Alignment Results", dataframe=class_subclass_df)
+
+from string_match import (BLOCKING_MODES, DEFAULT_TAGS, ENTITY_KINDS, LEXICAL_THRESHOLD, LIMIT_PER_NAME, SCORERS,
+                          TOPK_OUTPUT, TRIPLE_OUTPUT, TRIPLE_WEIGHTS, blocking_recall, ensemble_pair, find_name_forms, find_table, match_pair,
+                          match_triples, one_to_one, ontology_pairs, save_ensemble, save_topk, topk_pair)
+from alignment_eval import (SWEEP_COLUMNS, SWEEP_FILE, overall_sweep, pairwise_reference, read_references, sweep_dir,
+                            sweep_sets, threshold_sweep, thresholds_range)
+from entity_catalog import EntityCatalog
+from entity_norm import local_name
+from score_cache import ScoreCache
+from table_io import read_table, with_format, write_table
+
+# Satu kali jalan: semua pasangan ontologi (OSN-MP, OSN-MCSS, …) × semua tipe entitas.
+# Setiap pasangan dihitung sebagai satu matriks skor penuh dengan rapidfuzz.process.cdist
+# (semua core), lalu ditulis ke file yang sama seperti skrip *-stringmatching.py lama:
+#   class : "<p1>-<p2> class matching.csv"
+#   dp    : "matched_dp_<p1>_<p2>.csv"
+#   op    : "matched_op_<p1>_<p2>.csv"
+# Dengan --blocking token/ngram hanya pasangan kandidat dari inverted index yang diberi skor;
+# --measure_recall menjalankan juga versi penuh dan melaporkan recall blocking per pasangan.
+# Dengan --ensemble beberapa scorer dihitung sekaligus dan disimpan sebagai matriks bertumpuk
+# "ensemble_<tipe>_<p1>_<p2>.npz" (lihat string_match.combine_scores untuk bobot/threshold).
+# Dengan --triples object property juga dicocokkan per triple (predicate + domain + range)
+# ke "matched_op_triples_<p1>_<p2>.csv".
+# Matriks skor penuh disimpan di cache (--score_cache, default .score_cache); saat dijalankan
+# ulang hanya baris/kolom entitas baru yang dihitung. --no_score_cache mematikannya.
+# Dengan --top_k K hanya K kecocokan terbaik per nama yang disimpan, sebagai matriks sparse CSR
+# "topk_<tipe>_<p1>_<p2>.npz" (dibaca lagi dengan string_match.load_topk / topk_edges).
+# --one_to_one menyaring hasil per pasangan ontologi menjadi matching bipartit berbobot maksimum
+# (setiap nama paling banyak punya satu pasangan).
+# --sweep START STOP STEP memberi skor sekali pada threshold terendah lalu menghitung jumlah
+# kecocokan (dan precision/recall terhadap --reference TAG=reference_alignment.rdf) untuk
+# setiap threshold → "threshold_sweep.csv"; --sweep_sets menulis juga set per threshold. Hasil
+# utama (--threshold) diambil dari skor yang sama, jadi tidak ada pasangan yang diberi skor dua kali.
+# Referensi dipisah per tipe entitas (kolom type di "ENT <tag>.csv"; tanpa ENT: nama di tabel
+# ekstraksi tipe itu); baris "all" dihitung sekali terhadap gabungan referensi semua tipe.
+# --sweep tidak bisa dipakai bersama --one_to_one.
+# Nama lowercase dan token camelCase diambil dari kolom nameLower/tokens "ENT <tag>.csv" hasil
+# ekstraksi bila file itu ada di --tables_dir; jika tidak, dihitung ulang seperti sebelumnya.
+
+
+def main(args):
+    tables_dirs = args.tables_dir
+    os.makedirs(args.out_dir, exist_ok=True)
+    start_time = time.time()
+
+    tables = {}
+    kinds = list(args.kinds) + (["op"] if args.triples and "op" not in args.kinds else [])
+    try:
+        for kind in kinds:
+            table = ENTITY_KINDS[kind]["table"]
+            for tag in args.tags:
+                if (table, tag) not in tables:
+                    tables[(table, tag)] = read_table(find_table(table, tag, tables_dirs))
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    forms = {tag: find_name_forms(tag, tables_dirs) for tag in args.tags}
+    missing = [tag for tag, f in forms.items() if not len(f)]
+    if missing:
+        print(f"• ENT tidak ditemukan untuk {', '.join(missing)}: nama dinormalisasi saat matching")
+
+    try:
+        references = read_references(args.reference)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    thresholds = thresholds_range(*args.sweep) if args.sweep else None
+    sweeps = []
+    swept, overall_reference = [], set()
+
+    pairs = ontology_pairs(args.tags)
+    print(f"String matching {len(pairs)} pasangan × {len(args.kinds)} tipe entitas "
+          f"(Threshold={args.threshold}, workers={args.workers}, blocking={args.blocking}) …")
+    blocking_opts = dict(blocking=args.blocking, ngram=args.ngram, min_shared=args.min_shared,
+                         max_key_share=args.max_key_share)
+    cache = None if args.no_score_cache else ScoreCache(args.score_cache) if args.score_cache else ScoreCache()
+    scored = total = found = kept = 0
+    for kind in args.kinds:
+        spec = ENTITY_KINDS[kind]
+        for p1, p2 in pairs:
+            df1, df2 = tables[(spec["table"], p1)], tables[(spec["table"], p2)]
+            pair_forms = dict(forms1=forms[p1], forms2=forms[p2])
+            if args.top_k:
+                names1, names2, matrix = topk_pair(kind, df1, df2, args.top_k, args.threshold, args.workers, **blocking_opts,
+                                                   **pair_forms)
+                if args.one_to_one:
+                    matrix = one_to_one(matrix)
+                output_file = os.path.join(args.out_dir, TOPK_OUTPUT.format(kind=kind, p1=p1, p2=p2))
+                save_topk(output_file, names1, names2, matrix, p1, p2)
+                print(f"  ✔ {kind} {p1}-{p2}: top-{args.top_k} {matrix.nnz:,} pasangan → {output_file}")
+                continue
+            if thresholds is not None:
+                # satu kali skor pada threshold terendah; hasil utama = prefix dengan skor ≥ --threshold
+                sweep_df = match_pair(kind, df1, df2, p1, p2, min(thresholds.min(), args.threshold), args.limit,
+                                      args.workers, **blocking_opts, cache=cache, **pair_forms)
+                results_df = sweep_df[sweep_df['score'] >= args.threshold].reset_index(drop=True)
+                results_df.attrs.update(sweep_df.attrs)
+            else:
+                results_df = match_pair(kind, df1, df2, p1, p2, args.threshold, args.limit, args.workers, **blocking_opts,
+                                        cache=cache, assignment=args.one_to_one, **pair_forms)
+            scored += results_df.attrs["candidates"]
+            total += results_df.attrs["total_pairs"]
+            if args.measure_recall and args.blocking != "none":
+                full_df = match_pair(kind, df1, df2, p1, p2, args.threshold, args.limit, args.workers, **pair_forms)
+                recall = blocking_recall(full_df, results_df)
+                found += len(full_df)
+                kept += round(recall * len(full_df))
+                print(f"  • {kind} {p1}-{p2}: kandidat {results_df.attrs['candidates']:,}/{results_df.attrs['total_pairs']:,}, "
+                      f"recall {recall:.3f} ({len(results_df):,}/{len(full_df):,})")
+            if thresholds is not None:
+                reference = None
+                if references:
+                    # hanya entitas tipe ini yang masuk referensi
+                    names = {tag: forms[tag].names_of_type(spec["type"])
+                                  or set(EntityCatalog.from_table(tables[(spec["table"], tag)], kind, transform=local_name).names)
+                             for tag in (p1, p2)}
+                    reference = pairwise_reference(references, p1, p2, names)
+                    overall_reference |= reference
+                    swept.append(sweep_df[['ont 1', 'ont 2', 'score']])
+                table = threshold_sweep(sweep_df, thresholds, reference)
+                table.insert(0, 'kind', kind)
+                table.insert(1, 'ont 1', p1)
+                table.insert(2, 'ont 2', p2)
+                sweeps.append(table)
+                if args.sweep_sets:
+                    for t, subset in sweep_sets(sweep_df, thresholds):
+                        os.makedirs(sweep_dir(args.out_dir, t), exist_ok=True)
+                        write_table(subset, os.path.join(sweep_dir(args.out_dir, t), spec["output"].format(p1=p1, p2=p2)))
+                print(f"  • {kind} {p1}-{p2}: sweep {len(thresholds)} threshold dari {len(sweep_df):,} kecocokan")
+            if args.ensemble:
+                names1, names2, stack = ensemble_pair(kind, df1, df2, args.ensemble, args.workers, **pair_forms)
+                npz_file = os.path.join(args.out_dir, f"ensemble_{kind}_{p1}_{p2}.npz")
+                save_ensemble(npz_file, names1, names2, args.ensemble, stack)
+                print(f"  ✔ {kind} {p1}-{p2}: ensemble {stack.shape} → {npz_file}")
+            if results_df.empty:
+                print(f"  • {kind} {p1}-{p2}: tidak ada kecocokan di atas threshold, file tidak dibuat")
+                continue
+            output_file = os.path.join(args.out_dir, spec["output"].format(p1=p1, p2=p2))
+            if args.output_format != "csv":
+                output_file = with_format(output_file, args.output_format)
+            write_table(results_df, output_file)
+            print(f"  ✔ {kind} {p1}-{p2}: {len(results_df):,} pasangan → {output_file}")
+
+    if args.triples:
+        for p1, p2 in pairs:
+            df1, df2 = tables[("OP2", p1)], tables[("OP2", p2)]
+            triples_df = match_triples(df1, df2, p1, p2, tuple(args.triple_weights), args.threshold, args.limit, args.workers,
+                                       forms1=forms[p1], forms2=forms[p2])
+            if triples_df.empty:
+                print(f"  • op-triple {p1}-{p2}: tidak ada kecocokan di atas threshold, file tidak dibuat")
+                continue
+            output_file = os.path.join(args.out_dir, TRIPLE_OUTPUT.format(p1=p1, p2=p2))
+            if args.output_format != "csv":
+                output_file = with_format(output_file, args.output_format)
+            write_table(triples_df, output_file)
+            print(f"  ✔ op-triple {p1}-{p2}: {len(triples_df):,} pasangan → {output_file}")
+
+    if sweeps:
+        if references:
+            # satu baris per threshold untuk semua tipe & pasangan, referensi dihitung sekali
+            totals = overall_sweep(swept, thresholds, overall_reference)
+            totals.insert(0, 'kind', 'all')
+            totals.insert(1, 'ont 1', 'all')
+            totals.insert(2, 'ont 2', 'all')
+            sweeps.append(totals)
+        sweep_file = os.path.join(args.out_dir, SWEEP_FILE)
+        sweep_table = pd.concat(sweeps, ignore_index=True).reindex(columns=SWEEP_COLUMNS)
+        sweep_table.to_csv(sweep_file, index=False)
+        print(f"\n✔ Threshold sweep ({len(thresholds)} nilai) → {sweep_file}")
+        if references:
+            for row in totals.itertuples(index=False):
+                print(f"  t={row.threshold:g}: {row.matches:,} kecocokan, P={row.precision:.3f} R={row.recall:.3f} "
+                      f"(referensi {row.reference:,})")
+
+    if cache is not None and args.blocking == "none":
+        print(f"\nCache skor ({cache.cache_dir}): {cache.summary()}")
+    if args.blocking != "none":
+        print(f"\nPasangan diberi skor: {scored:,} dari {total:,} ({scored / max(total, 1):.1%})")
+        if args.measure_recall:
+            print(f"Recall blocking total: {kept / max(found, 1):.3f} ({kept:,}/{found:,} kecocokan penuh)")
+    print(f"\nProses selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="String matching all-pairs (rapidfuzz cdist) untuk semua pasangan ontologi dan tipe entitas")
+    parser.add_argument("--tags", nargs="+", default=DEFAULT_TAGS, help="Tag ontologi, urutan menentukan pasangan (default: OSN MP MCSS OFB)")
+    parser.add_argument("--kinds", nargs="+", default=list(ENTITY_KINDS), choices=list(ENTITY_KINDS), help="Tipe entitas yang dicocokkan")
+    parser.add_argument("--tables_dir", nargs="+", default=["."], help="Direktori berisi CLS/DP2/OP2 <tag>.csv (boleh lebih dari satu)")
+    parser.add_argument("--out_dir", type=str, default=".", help="Direktori output")
+    parser.add_argument("--threshold", type=float, default=LEXICAL_THRESHOLD, help="Threshold skor WRatio (0-100)")
+    parser.add_argument("--limit", type=int, default=LIMIT_PER_NAME, help="Maksimum kecocokan per nama di ontologi 1")
+    parser.add_argument("--workers", type=int, default=-1, help="Jumlah thread cdist (-1 = semua core)")
+    parser.add_argument("--blocking", type=str, default="none", choices=BLOCKING_MODES, help="Candidate generation: none (matriks penuh), token (token camelCase), ngram (n-gram karakter)")
+    parser.add_argument("--ngram", type=int, default=3, help="Panjang n-gram untuk --blocking ngram")
+    parser.add_argument("--min_shared", type=int, default=1, help="Minimum key bersama agar pasangan menjadi kandidat")
+    parser.add_argument("--max_key_share", type=float, default=1.0, help="Key yang dimiliki lebih dari fraksi ini dari nama ontologi 2 tidak diindeks (misal 0.1)")
+    parser.add_argument("--measure_recall", action="store_true", help="Bandingkan dengan run penuh dan laporkan recall blocking")
+    parser.add_argument("--ensemble", nargs="+", default=None, choices=list(SCORERS), help="Simpan juga matriks skor bertumpuk (.npz) untuk scorer ini, misal: wratio token_set jaro_winkler token_set_camel")
+    parser.add_argument("--triples", action="store_true", help="Cocokkan object property per triple (predicate, domain, range)")
+    parser.add_argument("--triple_weights", nargs=3, type=float, default=list(TRIPLE_WEIGHTS), metavar=("PRED", "DOMAIN", "RANGE"), help="Bobot predicate/domain/range untuk --triples")
+    parser.add_argument("--score_cache", type=str, default=None, help="Direktori cache matriks skor (default: GENOSIS_SCORE_CACHE atau .score_cache)")
+    parser.add_argument("--no_score_cache", action="store_true", help="Jangan pakai cache matriks skor")
+    parser.add_argument("--top_k", type=int, default=None, help="Simpan hanya K kecocokan terbaik per nama sebagai CSR .npz (menggantikan CSV)")
+    parser.add_argument("--one_to_one", action="store_true", help="Hanya simpan matching satu-satu berbobot maksimum per pasangan ontologi")
+    parser.add_argument("--sweep", nargs=3, type=float, default=None, metavar=("START", "STOP", "STEP"), help="Rentang threshold yang dievaluasi sekaligus, misal: 60 100 5")
+    parser.add_argument("--reference", nargs="+", default=[], metavar="TAG=PATH", help="Reference alignment (RDF AML) per ontologi lokal, misal: OFB=reference_alignment_OFB_genosis.rdf")
+    parser.add_argument("--sweep_sets", action="store_true", help="Tulis juga set kecocokan setiap threshold ke sweep/t<threshold>/")
+    parser.add_argument("--output_format", type=str, default="csv", choices=["csv", "tsv", "parquet", "arrow"], help="Format file output")
+    args = parser.parse_args()
+    if args.sweep and args.one_to_one:
+        # matching 1:1 pada threshold terendah bukan prefix dari matching 1:1 pada threshold yang lebih tinggi
+        parser.error("--sweep tidak bisa digabung dengan --one_to_one")
+    if args.top_k:
+        # jalur top-k hanya menulis CSR .npz; opsi berikut berjalan di jalur CSV dan akan diabaikan
+        ignored = [flag for flag, used in (("--sweep", args.sweep), ("--ensemble", args.ensemble),
+                                           ("--measure_recall", args.measure_recall),
+                                           ("--output_format", args.output_format != "csv")) if used]
+        if ignored:
+            parser.error(f"--top_k tidak bisa digabung dengan {', '.join(ignored)}")
+    main(args)
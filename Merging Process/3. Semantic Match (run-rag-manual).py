@@ -37,6 +37,13 @@ try:
         IRILabelChildrenDescriptionInRAGEncoder
     )
     from ontomap.utils import io
+    from table_io import with_format, write_records
+    from llm_cache import LLMCache, cached_llm_class
+    from embedding_store import DEFAULT_STORE_DIR, cached_retriever_class
+    from ann_index import INDEX_KINDS, ann_retriever_class
+    from cascade import (add_bounds_arguments, bounds_from_args, cascade_tiers, decided_alignments, llm_sources,
+                         merge_decisions, read_candidates, tier_summary)
+    from llm_dispatch import DEFAULT_BASE_URL, DEFAULT_MAX_IN_FLIGHT, DEFAULT_RPM, DEFAULT_TPM, async_llm_class
     print("--- DEBUG: Impor utama BERHASIL ---")
     sys.stdout.flush()
 except ImportError as e:
@@ -187,8 +194,18 @@ def main(args):
     sys.stdout.flush()
 
     # 2. Siapkan Konfigurasi untuk RAG.__init__
+    # Embedding retriever disimpan per (model, repr) di memmap float16; teks yang sudah pernah
+    # di-encode (misal OSN di matchOSN-MP/MCSS/OFB) tidak di-encode ulang.
+    RetrieverClass = BiEncoderRetrieval
+    if not args.no_embed_cache:
+        RetrieverClass = cached_retriever_class(BiEncoderRetrieval, args.repr, args.embed_cache or DEFAULT_STORE_DIR)
+    # Pencarian kandidat lewat indeks ANN (IVF NumPy) alih-alih cosine ke semua target.
+    if args.ann_index != "none":
+        RetrieverClass = ann_retriever_class(RetrieverClass, args.ann_index, nlist=args.nlist, nprobe=args.nprobe,
+                                             index_dir=args.ann_index_dir)
+        print(f"--- DEBUG: Retriever memakai indeks ANN '{args.ann_index}' ({args.ann_index_dir}) ---")
     retriever_config = {
-        "class": BiEncoderRetrieval,
+        "class": RetrieverClass,
         "path": "sentence-transformers/all-mpnet-base-v2",
         "device": args.device,
         "top_k": args.k_retriever
@@ -205,6 +222,22 @@ def main(args):
          print(f"--- DEBUG: ERROR - Tidak bisa tentukan LLM Class ---")
          sys.stdout.flush(); return
 
+    # Dispatch async: banyak request sekaligus dengan batas requests/min dan tokens/min (token bucket),
+    # mundur otomatis saat 429; --sleep tidak dipakai lagi. Pakai --batch_size besar agar satu batch
+    # berisi banyak prompt.
+    if args.async_llm:
+        LLMClass = async_llm_class(LLMClass, base_url=args.llm_base_url, max_in_flight=args.max_in_flight,
+                                   rpm=args.rpm, tpm=args.tpm)
+        print(f"--- DEBUG: Dispatch LLM async: {args.max_in_flight} request paralel, {args.rpm} RPM, {args.tpm} TPM → {args.llm_base_url} ---")
+
+    # Cache keputusan LLM (SQLite): prompt yang sama (model, temperature, max token sama) tidak dikirim ulang,
+    # jadi menjalankan ulang dengan --cardinality_filter lain tidak memanggil LLM sama sekali.
+    llm_cache = None
+    if not args.no_llm_cache:
+        llm_cache = LLMCache(args.llm_cache) if args.llm_cache else LLMCache()
+        LLMClass = cached_llm_class(LLMClass, llm_cache)
+        print(f"--- DEBUG: Cache LLM aktif: {llm_cache.path} ({len(llm_cache):,} entri) ---")
+
     llm_config = {
          "class": LLMClass,
          "model_name": args.llm_model_name,
@@ -212,7 +245,7 @@ def main(args):
          "device": args.device,
          "temperature": args.temperature,
          "max_token_length": args.max_token_length,
-         "sleep": args.sleep,
+         "sleep": 0 if args.async_llm else args.sleep,
          "batch_size": args.batch_size,
          "max_prompt_length": args.max_prompt_length
     }
@@ -268,6 +301,27 @@ def main(args):
          print("--- DEBUG: ERROR - Gagal load JSONL atau data kosong ---")
          sys.stdout.flush(); return
 
+    # Cascade sebelum LLM: pasangan dengan skor leksikal+embedding tinggi langsung diterima, yang sangat
+    # rendah langsung ditolak; sumber yang semua kandidatnya sudah diputuskan tidak dikirim ke LLM.
+    cascade_decided = []
+    if args.cascade_candidates:
+        try:
+            # 'skipped' hanya bila filter kardinalitas memang menyisakan satu target per sumber
+            tiered = cascade_tiers(read_candidates(args.cascade_candidates), bounds_from_args(args),
+                                   one_per_source=args.cardinality_filter in ("one-to-one", "many-to-one"))
+        except (FileNotFoundError, KeyError) as e:
+            logger.error(f"Gagal membaca kandidat cascade: {e}")
+            print(f"--- DEBUG: ERROR - Kandidat cascade: {e} ---")
+            sys.stdout.flush(); return
+        cascade_decided = decided_alignments(tiered)
+        decided_sources = set(tiered['Source']) - llm_sources(tiered)
+        before = len(source_onto_data_list)
+        source_onto_data_list = [item for item in source_onto_data_list if item.get("uri") not in decided_sources]
+        print(f"--- DEBUG: Cascade: {tier_summary(tiered)}; sumber ke LLM {len(source_onto_data_list)} dari {before} ---")
+        sys.stdout.flush()
+        if not source_onto_data_list:
+            logger.info("Semua sumber sudah diputuskan oleh cascade; LLM tidak dipanggil.")
+
     source_uri_to_index = {item.get("uri"): i for i, item in enumerate(source_onto_data_list) if item.get("uri")}
     target_uri_to_index = {item.get("uri"): i for i, item in enumerate(target_onto_data_list) if item.get("uri")}
     print("--- DEBUG: Mapping URI ke index dibuat ---")
@@ -293,8 +347,14 @@ def main(args):
     try:
         print("--- DEBUG: Akan memanggil rag_instance.generate() ---")
         sys.stdout.flush()
-        results = rag_instance.generate(input_data=rag_input_dict)
+        results = rag_instance.generate(input_data=rag_input_dict) if source_onto_data_list else None
         print("--- DEBUG: Pemanggilan rag_instance.generate() SELESAI ---")
+        embedding_store = getattr(getattr(rag_instance, "Retrieval", None), "embedding_store", None)
+        if embedding_store is not None:
+            print(f"--- DEBUG: Cache embedding: {embedding_store.summary()} ---")
+        if llm_cache is not None:
+            logger.info(f"Cache LLM: {llm_cache.summary()}")
+            print(f"--- DEBUG: Cache LLM: {llm_cache.summary()} ---")
         sys.stdout.flush()
 
         # Dapatkan SEMUA hasil LLM (yes, no, error)
@@ -305,6 +365,10 @@ def main(args):
         print(f"--- DEBUG: Jumlah total hasil LLM sebelum filter: {initial_result_count}, Jumlah awal 'yes': {initial_yes_count} ---")
         sys.stdout.flush()
 
+        # Keputusan cascade ikut filter kardinalitas bersama hasil LLM (satu baris per pasangan, LLM menang)
+        if args.cascade_candidates:
+            llm_output_all = merge_decisions(cascade_decided, llm_output_all)
+
         # Pisahkan hasil 'yes' untuk difilter kardinalitasnya
         yes_alignments = [a for a in llm_output_all if a.get("label") == "yes"]
         # Hasil 'no' dan 'error'
@@ -330,16 +394,30 @@ def main(args):
         alignment_file = os.path.join(output_subdir, f"llm_alignment_final_{args.cardinality_filter}_label_only.tsv")
         print(f"--- DEBUG: Menyimpan hasil alignment final ({args.cardinality_filter}, tanpa skor) ke: {alignment_file} ---")
         sys.stdout.flush()
+        # Dengan cascade, kolom Tier mencatat tahap yang memutuskan (lexical / floor / skipped / llm)
+        output_columns = ["Source", "Target", "Label"] + (["Tier"] if args.cascade_candidates else [])
+        output_keys = [c.lower() for c in output_columns]
         try:
             with open(alignment_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f, delimiter='\t')
-                # Header: Source, Target, Label
-                writer.writerow(["Source", "Target", "Label"])
+                # Header: Source, Target, Label (+ Tier)
+                writer.writerow(output_columns)
                 # Tulis dari final_output_to_save
                 for align in final_output_to_save:
-                    # Ambil hanya Source, Target, dan Label
-                    writer.writerow([align.get("source"), align.get("target"), align.get("label")])
+                    # Ambil hanya Source, Target, dan Label (+ Tier)
+                    writer.writerow([align.get(k) for k in output_keys])
             print(f"--- DEBUG: Selesai menyimpan {len(final_output_to_save)} hasil alignment final (tanpa skor) ---")
+            # Salinan kolumnar (Parquet/Arrow) untuk stage berikutnya, jika diminta
+            for fmt in args.output_formats:
+                if fmt == "tsv":
+                    continue
+                columnar_file = with_format(alignment_file, fmt)
+                write_records(
+                    ([align.get(k) for k in output_keys] for align in final_output_to_save),
+                    output_columns,
+                    columnar_file,
+                )
+                print(f"--- DEBUG: Salinan {fmt} disimpan ke: {columnar_file} ---")
             sys.stdout.flush()
         except Exception as e_save:
             print(f"--- DEBUG: GAGAL saat menyimpan hasil final (tanpa skor): {e_save} ---")
@@ -368,11 +446,12 @@ if __name__ == "__main__":
     parser.add_argument("--task", type=str, required=True, help="Nama tugas (misal matchOSN_MP)")
     parser.add_argument("--llm_model_name", type=str, required=True, help="Nama model LLM (OpenAI ID atau HF Path)")
     parser.add_argument("--repr", type=str, required=True, choices=["C", "CP", "CC", "CD", "CPD", "CCD"], help="Representasi yang digunakan untuk prompt LLM")
-    parser.add_argument("--retriever_output_path", type=str, required=False, help="(Optional) Path ke file candidates.tsv (saat ini tidak digunakan aktif oleh skrip ini)")
+    parser.add_argument("--retriever_output_path", type=str, required=False, help="(Optional) Path ke file candidates.tsv dari ann_index.py; dipakai sebagai --cascade_candidates bila opsi itu tidak diberikan")
     parser.add_argument("--processed_data_path", type=str, required=True, help="Path ke direktori JSONL hasil parsing")
     parser.add_argument("--threshold", type=float, default=0.7, help="Ambang batas skor LLM (saat ini tidak diterapkan aktif oleh skrip ini)")
     parser.add_argument("--cardinality_filter", type=str, default="one-to-one", choices=["one-to-one", "none", "many-to-one", "one-to-many"], help="Filter kardinalitas yang akan diterapkan pada hasil 'yes' (jika bukan 'none')")
     parser.add_argument("--output_dir", type=str, required=True, help="Direktori dasar untuk menyimpan output RAG")
+    parser.add_argument("--output_formats", nargs="+", default=["tsv"], choices=["tsv", "parquet", "arrow"], help="Format file alignment final (TSV selalu ditulis; parquet/arrow sebagai salinan tambahan)")
 
     parser.add_argument("--device", type=str, default="cpu", help="Device (cpu atau cuda)")
     parser.add_argument("--k_retriever", type=int, default=10, help="Nilai K yang digunakan saat retrieval internal")
@@ -381,8 +460,25 @@ if __name__ == "__main__":
     parser.add_argument("--max_prompt_length", type=int, default=1024, help="Max prompt length untuk tokenizer")
     parser.add_argument("--sleep", type=int, default=5, help="Waktu tidur (detik) antar pemanggilan batch LLM")
     parser.add_argument("--batch_size", type=int, default=1, help="Batch size untuk inferensi LLM")
+    parser.add_argument("--async_llm", action="store_true", help="Kirim prompt satu batch secara paralel (asyncio) dengan rate limit token bucket, bukan --sleep tetap")
+    parser.add_argument("--max_in_flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Jumlah request LLM paralel maksimum (--async_llm)")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="Batas request per menit (--async_llm)")
+    parser.add_argument("--tpm", type=float, default=DEFAULT_TPM, help="Batas token per menit (--async_llm)")
+    parser.add_argument("--llm_base_url", type=str, default=DEFAULT_BASE_URL, help="Base URL API kompatibel OpenAI (default: OPENAI_BASE_URL atau api.openai.com/v1)")
+    parser.add_argument("--embed_cache", type=str, default=None, help="Direktori cache embedding retriever (default: GENOSIS_EMBED_CACHE atau .embed_cache)")
+    parser.add_argument("--no_embed_cache", action="store_true", help="Selalu encode ulang semua representasi")
+    parser.add_argument("--llm_cache", type=str, default=None, help="File SQLite cache keputusan LLM (default: GENOSIS_LLM_CACHE atau .llm_cache.sqlite)")
+    parser.add_argument("--no_llm_cache", action="store_true", help="Selalu panggil LLM, jangan pakai cache")
+    parser.add_argument("--cascade_candidates", type=str, default=None, help="File kandidat TSV (Source, Target, Score, mis. dari ann_index.py); pasangan yang jelas diputuskan tanpa LLM")
+    parser.add_argument("--ann_index", type=str, default="ivf", choices=list(INDEX_KINDS) + ["none"], help="Indeks pencarian retriever: ivf (ANN), exact, atau none (pencarian bawaan ontomap)")
+    parser.add_argument("--nlist", type=int, default=None, help="Jumlah list IVF (default 4·√n)")
+    parser.add_argument("--nprobe", type=int, default=None, help="List IVF yang diperiksa per query (default ⌈√nlist⌉)")
+    parser.add_argument("--ann_index_dir", type=str, default=".ann_index", help="Direktori indeks ANN tersimpan")
+    add_bounds_arguments(parser)
 
     args = parser.parse_args()
+    if not args.cascade_candidates:
+        args.cascade_candidates = args.retriever_output_path
 
     # Panggil fungsi utama
     main(args)
@@ -15,10 +15,11 @@ Pipeline
 """
 from __future__ import annotations
 from owlready2 import *  # type: ignore
-import types, re, codecs, pandas as pd
-from io import BytesIO
+import types, pandas as pd
 from pathlib import Path
 from collections import defaultdict
+from table_io import read_table
+from quadstore import ensure_loaded, open_world
 
 # ─────────────────────────── CONFIG ────────────────────────────
 ONTOLOGY_PATHS = {
@@ -41,33 +42,32 @@ OUT_PATH   = Path(r"D:\Dokumentasi\LLMs4OM\experiments\results\merged-ontology\D
 MERGED_IRI = "http://example.org/debug_merge.owl#"
 STEP       = 200
 TYPE_PRIO  = [ObjectPropertyClass, DataPropertyClass, AnnotationPropertyClass, ThingClass]
-
-# ─────────────────── helper : load with BOM sniff ─────────────
-BOMS = [codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE,
-        codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE]
-
-def load_ontology(world: World, path: str):
-    """Robust loader — detect BOM & syntax (RDF/XML, Turtle, N‑Triples)."""
-    raw = Path(path).read_bytes()
-    for b in BOMS:
-        if raw.startswith(b):
-            raw = raw[len(b):]
-            break
-    fmt = (
-        "rdfxml" if raw.lstrip()[:1] == b"<" else
-        "turtle"  if re.search(rb"@prefix|PREFIX", raw[:200], re.I) else
-        "ntriples"
-    )
-    return world.get_ontology(path).load(fileobj=BytesIO(raw), format=fmt)
+# Persistent owlready2 World (SQLite) shared with extraction / consistency
+# checks; None → in-memory World as before.  Sources whose content hash is
+# already stored are not parsed again.
+WORLD_PATH = None   # e.g. r"D:\Dokumentasi\LLMs4OM\experiments\genosis-world.sqlite3"
 
 # ───────────────────────── LOAD ───────────────────────────────
 print("Loading source ontologies …")
-world = World()
+world = open_world(WORLD_PATH)
 ont2tag: dict[Ontology, str] = {}
 rep2members: dict[str, list[EntityClass]] = defaultdict(list)
 
-for tag, path in ONTOLOGY_PATHS.items():
-    ont = load_ontology(world, path)
+def iter_sources():
+    """Yield (ontology, tag) in ONTOLOGY_PATHS order.
+
+    owlready2 binds an entity to the namespace it is first touched from.  In a
+    shared World every source is already stored, so load them all up front —
+    otherwise a rerun that skips parsing would bind entities differently from
+    the first run.
+    """
+    if WORLD_PATH:
+        yield from [(ensure_loaded(world, path), tag) for tag, path in ONTOLOGY_PATHS.items()]
+    else:
+        for tag, path in ONTOLOGY_PATHS.items():
+            yield ensure_loaded(world, path), tag
+
+for ont, tag in iter_sources():
     ont2tag[ont] = tag
     for ent in list(ont.classes()) + list(ont.properties()):
         if isinstance(ent.iri, str) and ent.iri.startswith("http"):
@@ -75,6 +75,8 @@ for tag, path in ONTOLOGY_PATHS.items():
 print(f"▶  {sum(len(v) for v in rep2members.values()):,} entities loaded from {len(ONTOLOGY_PATHS)} ontologies\n")
 
 # ───── merged ontology & provenance annotation properties ─────
+if MERGED_IRI in world.ontologies:      # rerun on a persistent World → rebuild
+    world.ontologies[MERGED_IRI].destroy()
 merged = world.get_ontology(MERGED_IRI)
 with merged:
     class sourceOrigin(AnnotationProperty): pass
@@ -210,13 +212,17 @@ print("Pass‑5 ▶ applying alignment annotations (deduplicated) …")
 
 aligned_map = defaultdict(set)
 for tsv in ALIGN_PATHS:
-    df = pd.read_csv(tsv, sep='\t', keep_default_na=False)
-    for _, r in df.iterrows():
-        if str(r.get('Label', '')).lower() != 'yes':
-            continue
-        if float(r.get('Score', 1.0)) < THRESH:
-            continue
-        src = r['Source'].strip(); tgt_iri = r['Target'].strip()
+    # .tsv / .parquet / .arrow — lihat table_io
+    df = read_table(tsv, keep_default_na=False)
+    keep = df['Label'].astype(str).str.lower() == 'yes' if 'Label' in df else pd.Series(False, index=df.index)
+    if 'Score' in df:
+        scored = pd.to_numeric(df['Score'], errors='coerce').fillna(1.0) >= THRESH
+        if 'Tier' in df:
+            # cascade rows: Score is the retrieval cosine, the Label already is the decision
+            scored |= ~df['Tier'].astype(str).isin(['', 'llm'])
+        keep &= scored
+    for src, tgt_iri in zip(df.loc[keep, 'Source'].astype(str).str.strip(),
+                            df.loc[keep, 'Target'].astype(str).str.strip()):
         aligned_map[src].add(tgt_iri)
         aligned_map[tgt_iri].add(src)
 
@@ -251,3 +257,6 @@ print("✔  Pass‑5 done (deduplicated).\n")
 OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 merged.save(file=str(OUT_PATH), format="rdfxml")
 print("Merged ontology saved →", OUT_PATH)
+if WORLD_PATH:
+    world.save()
+    print("Shared World updated →", WORLD_PATH)
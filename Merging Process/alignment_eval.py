@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""alignment_eval.py — reference alignments and single-pass threshold sweeps
+
+``lexical_threshold`` (matchers) and ``graph_threshold`` (synth scripts) were
+tuned by editing the value and rerunning everything.  A match table scored
+once at the *lowest* threshold of interest already contains every stricter
+alignment: sorted by score, the set for threshold ``t`` is simply the prefix
+with ``score ≥ t``.  :func:`threshold_sweep` walks that order once
+(``searchsorted`` + cumulative sums) and reports, per threshold, the number
+of matches and — when a reference is given — true positives, precision,
+recall and F1.
+
+References are the AML ``reference_alignment_<tag>_genosis.rdf`` files
+(local entity → GENOSIS entity, relation ``=``).  Two local entities of
+different ontologies that map to the same GENOSIS entity form a reference
+pair for the pairwise matchers (:func:`pairwise_reference`).  The class, DP
+and OP matchers are each evaluated against the pairs of their own entity
+kind only (the ``type`` column of ``ENT <tag>.csv``), and the overall row
+(:func:`overall_sweep`) against the union of those pairs, counted once.
+"""
+from __future__ import annotations
+import os
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from entity_norm import local_name
+
+ALIGN_NS = "{http://knowledgeweb.semanticweb.org/heterogeneity/alignment}"
+RDF_RESOURCE = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource"
+
+SWEEP_FILE = "threshold_sweep.csv"
+SWEEP_COLUMNS = ['kind', 'ont 1', 'ont 2', 'threshold', 'matches', 'reference', 'tp',
+                 'precision', 'recall', 'f1']
+
+
+# ───────────────────────── references ─────────────────────────
+def load_reference(path: str, relation: str = "=") -> list[tuple[str, str]]:
+    """``(entity1, entity2)`` IRIs of the ``Cell`` elements of an Alignment RDF."""
+    pairs = []
+    for cell in ET.parse(path).getroot().iter(ALIGN_NS + "Cell"):
+        e1, e2 = cell.find(ALIGN_NS + "entity1"), cell.find(ALIGN_NS + "entity2")
+        rel = cell.findtext(ALIGN_NS + "relation", default="=").strip()
+        if e1 is not None and e2 is not None and rel == relation:
+            pairs.append((e1.attrib[RDF_RESOURCE], e2.attrib[RDF_RESOURCE]))
+    return pairs
+
+
+def pairwise_reference(references: dict[str, list[tuple[str, str]]], p1: str, p2: str,
+                       names: dict[str, set[str]] | None = None) -> set[tuple[str, str]]:
+    """``{("<p1>:name", "<p2>:name")}`` of local entities sharing a GENOSIS target.
+
+    With *names* (``{tag: local names}``) only those entities take part, e.g.
+    the entities of one kind.
+    """
+    targets: dict[str, dict[str, set[str]]] = {}
+    for tag in (p1, p2):
+        allowed = names.get(tag, set()) if names is not None else None
+        by_target: dict[str, set[str]] = defaultdict(set)
+        for local, target in references.get(tag, ()):
+            name = local_name(local)
+            if allowed is None or name in allowed:
+                by_target[target].add(name)
+        targets[tag] = by_target
+    return {(f"{p1}:{a}", f"{p2}:{b}")
+            for target, names1 in targets[p1].items()
+            for a in names1 for b in targets[p2].get(target, ())}
+
+
+def read_references(specs: Iterable[str]) -> dict[str, list[tuple[str, str]]]:
+    """``TAG=path.rdf`` command-line specs → ``{TAG: pairs}``."""
+    references = {}
+    for spec in specs:
+        tag, _, path = spec.partition("=")
+        if not path:
+            raise ValueError(f"Referensi harus berbentuk TAG=path, bukan '{spec}'")
+        references[tag] = load_reference(path)
+    return references
+
+
+# ───────────────────────── sweep ──────────────────────────────
+def thresholds_range(start: float, stop: float, step: float) -> np.ndarray:
+    """``start, start+step, …, stop`` (inclusive)."""
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+def threshold_sweep(results_df: pd.DataFrame, thresholds: Iterable[float],
+                    reference: set[tuple[str, str]] | None = None) -> pd.DataFrame:
+    """Counts (and P/R/F1 against *reference*) of ``score ≥ t`` for every *t*, in one pass."""
+    thresholds = np.asarray(sorted(thresholds), dtype=np.float64)
+    scores = results_df['score'].to_numpy(dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")
+    desc = scores[order]
+    counts = np.searchsorted(-desc, -thresholds, side="right")     # rows with score ≥ t
+    out = pd.DataFrame({'threshold': thresholds, 'matches': counts})
+    if reference is not None:
+        hit = np.fromiter(((a, b) in reference for a, b in
+                           zip(results_df['ont 1'].to_numpy()[order], results_df['ont 2'].to_numpy()[order])),
+                          dtype=bool, count=len(order))
+        tp = np.concatenate([[0], np.cumsum(hit)])[counts]
+        precision = np.divide(tp, counts, out=np.zeros(len(counts)), where=counts > 0)
+        recall = tp / len(reference) if reference else np.zeros(len(counts))
+        f1 = np.divide(2 * precision * recall, precision + recall,
+                       out=np.zeros(len(counts)), where=(precision + recall) > 0)
+        out['reference'] = len(reference)
+        out['tp'] = tp
+        out['precision'] = np.round(precision, 4)
+        out['recall'] = np.round(recall, 4)
+        out['f1'] = np.round(f1, 4)
+    return out
+
+
+def overall_sweep(frames: Iterable[pd.DataFrame], thresholds: Iterable[float],
+                  reference: set[tuple[str, str]] | None = None) -> pd.DataFrame:
+    """:func:`threshold_sweep` of several match tables taken together.
+
+    A pair found by more than one table counts once (at its best score), and
+    the reference is the single set given here, not a sum of per-table
+    reference sizes.
+    """
+    frames = [df[['ont 1', 'ont 2', 'score']] for df in frames]
+    merged = (pd.concat(frames, ignore_index=True) if frames
+              else pd.DataFrame(columns=['ont 1', 'ont 2', 'score']))
+    merged = (merged.sort_values('score', ascending=False, kind="stable")
+              .drop_duplicates(['ont 1', 'ont 2']))
+    return threshold_sweep(merged, thresholds, reference)
+
+
+def sweep_sets(results_df: pd.DataFrame, thresholds: Iterable[float]) -> Iterable[tuple[float, pd.DataFrame]]:
+    """``(t, rows with score ≥ t)`` for every threshold — prefixes of the score order."""
+    ordered = results_df.sort_values('score', ascending=False, kind="stable")
+    scores = ordered['score'].to_numpy(dtype=np.float64)
+    for t in thresholds:
+        yield t, ordered.iloc[:int(np.searchsorted(-scores, -t, side="right"))]
+
+
+def sweep_dir(out_dir: str, threshold: float) -> str:
+    return os.path.join(out_dir, "sweep", f"t{threshold:g}")
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""ann_index.py — IVF approximate nearest-neighbour index for retrieval candidates
+
+Retrieval compared every source embedding with *every* target embedding to
+pick ``top_k`` candidates — linear in the target size, which hurts once
+GENOSIS has tens of thousands of entities.  This module adds an inverted-file
+(IVF) index in plain NumPy:
+
+* the (L2-normalized) target vectors are clustered with spherical k-means
+  into ``nlist`` lists (default ``4·√n``);
+* a query is compared with the ``nlist`` centroids, and only the vectors of
+  the ``nprobe`` closest lists (default ``⌈√nlist⌉``) are scored exactly —
+  roughly ``nprobe / nlist`` of the targets;
+* :class:`ExactIndex` has the same interface and scores everything; it is
+  the reference for :func:`recall_at_k`, which reports how many of the exact
+  top-k an IVF search kept.
+
+An index is built once per (target ontology, model, repr) and saved as
+``.npz`` next to a fingerprint of the model, the keys and the vectors, so a
+later run with the same targets loads it instead of clustering again, and an
+edited label or comment builds it anew (:func:`load_or_build`).
+
+:func:`ann_retriever_class` plugs the index into ontomap's
+``BiEncoderRetrieval`` in script 3 (``--ann_index``), the same way
+:func:`embedding_store.cached_retriever_class` wraps its encoder.
+Assumption about ontomap: the retriever embeds the target texts with
+``fit(texts)`` and scores queries with ``estimate_similarity(query_embed,
+candidate_embeds)`` — one cosine per query row and candidate — before taking
+its ``top_k``.  The wrapper builds the index in ``fit`` and answers
+``estimate_similarity`` from it: the candidates the index finds get their
+exact cosine, every other candidate ``-1`` (the cosine floor), so ontomap's
+own top-k picks exactly the index results.
+
+The CLI writes the ``candidates.tsv`` (``Source, Target, Score``) that
+``--retriever_output_path`` / ``--cascade_candidates`` of script 3 read,
+from ``ENT <tag>.csv`` tables; embeddings come from :mod:`embedding_store`::
+
+    python ann_index.py --source "ENT OSN.csv" --target "ENT GENOSIS.csv" --repr CD \\
+        --output candidates.tsv --top_k 10 --recall_sample 500
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+INDEX_KINDS = ("ivf", "exact")
+FORMAT_VERSION = 2
+KMEANS_ITERATIONS = 20
+SEARCH_BLOCK = 256
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:                     # one vector, or an empty list
+        vectors = vectors.reshape(1 if vectors.size else 0, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def index_fingerprint(keys: list[str], vectors: np.ndarray, model: str = "") -> str:
+    """SHA-256 of the model name, the keys and the (normalized, float16) vectors."""
+    h = hashlib.sha256(model.encode("utf-8") + b"\0")
+    for key in keys:
+        h.update(key.encode("utf-8") + b"\0")
+    h.update(np.ascontiguousarray(normalize_rows(vectors).astype(np.float16)).tobytes())
+    return h.hexdigest()
+
+
+def _topk(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-*k* (descending) of a 2-D score array."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < scores.shape[1] else \
+        np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+# ───────────────────────── indexes ────────────────────────────
+class ExactIndex:
+    """Brute-force cosine search (the reference for recall checks)."""
+
+    kind = "exact"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = normalize_rows(vectors)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """``(ids, scores)`` of the *k* most similar vectors per query, best first (*nprobe* is ignored)."""
+        queries = normalize_rows(queries)
+        ids, scores = [], []
+        for start in range(0, len(queries), SEARCH_BLOCK):
+            i, s = _topk(queries[start:start + SEARCH_BLOCK] @ self.vectors.T, k)
+            ids.append(i)
+            scores.append(s)
+        if not ids:
+            return np.empty((0, k), dtype=np.int64), np.empty((0, k), dtype=np.float32)
+        return np.concatenate(ids), np.concatenate(scores)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        return {"vectors": self.vectors.astype(np.float16)}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "ExactIndex":
+        return cls(arrays["vectors"].astype(np.float32))
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means lists, exact scoring inside the probed lists."""
+
+    kind = "ivf"
+
+    def __init__(self, vectors: np.ndarray, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray,
+                 nprobe: int | None = None):
+        self.vectors = normalize_rows(vectors)
+        self.centroids = centroids
+        self.order = order                    # vector ids grouped by list
+        self.offsets = offsets                # list l = order[offsets[l]:offsets[l + 1]]
+        self.lists = np.split(order, offsets[1:-1])
+        self.nprobe = nprobe or max(1, int(np.ceil(np.sqrt(len(centroids)))))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int | None = None, nprobe: int | None = None,
+              iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> "IVFIndex":
+        vectors = normalize_rows(vectors)
+        n = len(vectors)
+        if not n:
+            raise ValueError("Indeks IVF butuh minimal satu vektor target (pakai ExactIndex)")
+        nlist = max(1, min(n, nlist or int(4 * np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+        def nearest(centroids: np.ndarray) -> np.ndarray:
+            return np.concatenate([np.argmax(vectors[s:s + 4096] @ centroids.T, axis=1)
+                                   for s in range(0, n, 4096)])
+
+        for _ in range(iterations):
+            assign = nearest(centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():                   # re-seed empty lists with random vectors
+                sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+        # the lists must follow the final centroids, not the ones before the last update
+        assign = nearest(centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        return cls(vectors, centroids, order, offsets, nprobe)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """``(ids, scores)`` of the *k* best vectors among the *nprobe* closest lists (−1 / −inf pads)."""
+        queries = normalize_rows(queries)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        lists, _ = _topk(queries @ self.centroids.T, nprobe) if len(queries) else (np.empty((0, nprobe), int), None)
+        for q, probe in enumerate(lists):
+            candidates = np.concatenate([self.lists[l] for l in probe])
+            if not len(candidates):
+                continue
+            i, s = _topk((self.vectors[candidates] @ queries[q])[None, :], k)
+            ids[q, :i.shape[1]] = candidates[i[0]]
+            scores[q, :i.shape[1]] = s[0]
+        return ids, scores
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        return {"vectors": self.vectors.astype(np.float16), "centroids": self.centroids,
+                "order": self.order, "offsets": self.offsets, "nprobe": np.asarray(self.nprobe)}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "IVFIndex":
+        return cls(arrays["vectors"].astype(np.float32), arrays["centroids"], arrays["order"],
+                   arrays["offsets"], int(arrays["nprobe"]))
+
+
+INDEX_CLASSES = {"ivf": IVFIndex, "exact": ExactIndex}
+
+
+# ───────────────────────── persistence ────────────────────────
+def save_index(path: str | os.PathLike, index, keys: list[str], fingerprint: str) -> None:
+    np.savez(path, format=FORMAT_VERSION, kind=index.kind, fingerprint=fingerprint,
+             keys=np.asarray(keys, dtype=str), **index.arrays())
+
+
+def load_index(path: str | os.PathLike):
+    """``(index, keys, fingerprint)`` of a saved index."""
+    with np.load(path) as data:
+        if int(data["format"]) != FORMAT_VERSION:
+            raise ValueError(f"Format indeks ANN tidak didukung: '{path}'")
+        arrays = {key: data[key] for key in data.files}
+    index = INDEX_CLASSES[str(arrays["kind"])].from_arrays(arrays)
+    return index, arrays["keys"].tolist(), str(arrays["fingerprint"])
+
+
+def load_or_build(path: str | os.PathLike, keys: list[str], vectors: np.ndarray, kind: str = "ivf",
+                  model: str = "", **build_kwargs) -> tuple[object, bool]:
+    """Saved index of *path* when it was built from the same model, *keys* and *vectors*, else a new one (saved).
+
+    An empty target set always gets an :class:`ExactIndex` (it finds nothing).
+    """
+    path = Path(path)
+    if not len(keys):
+        kind = "exact"
+    fingerprint = index_fingerprint(keys, vectors, model)
+    if path.exists():
+        try:
+            index, _, saved = load_index(path)
+            if saved == fingerprint and index.kind == kind:
+                return index, False
+        except (OSError, ValueError, KeyError):
+            pass
+    index = IVFIndex.build(vectors, **build_kwargs) if kind == "ivf" else ExactIndex(vectors)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    save_index(path, index, keys, fingerprint)
+    return index, True
+
+
+# ───────────────────────── retriever ──────────────────────────
+def _as_numpy(embeddings) -> np.ndarray:
+    if hasattr(embeddings, "detach"):         # torch tensor
+        embeddings = embeddings.detach().cpu().numpy()
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def ann_retriever_class(base: type, kind: str = "ivf", nlist: int | None = None, nprobe: int | None = None,
+                        index_dir: str | os.PathLike | None = None) -> type:
+    """Subclass of an ontomap retriever whose similarity search goes through an ANN index."""
+
+    class ANNRetriever(base):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.ann_model = str(kwargs.get("path") or kwargs.get("model_name") or base.__name__)
+            self.ann_top_k = int(kwargs.get("top_k") or getattr(self, "top_k", 0) or 10)
+            self.ann_index = None
+
+        def fit(self, inputs):
+            embeddings = super().fit(inputs)
+            vectors = _as_numpy(embeddings)
+            if not len(vectors):
+                self.ann_index = None            # no targets: ontomap's own search returns nothing
+                return embeddings
+            if index_dir is None:
+                self.ann_index = IVFIndex.build(vectors, nlist=nlist, nprobe=nprobe) if kind == "ivf" \
+                    else ExactIndex(vectors)
+            else:
+                keys = [str(x) for x in inputs]
+                digest = index_fingerprint(keys, vectors, self.ann_model)
+                path = Path(index_dir) / f"retriever_{digest[:16]}_{kind}.npz"
+                self.ann_index, _ = load_or_build(path, keys, vectors, kind, model=self.ann_model,
+                                                  **({"nlist": nlist, "nprobe": nprobe} if kind == "ivf" else {}))
+            return embeddings
+
+        def estimate_similarity(self, query_embed, candidate_embeds):
+            index = self.ann_index
+            if index is None or len(candidate_embeds) != len(index):
+                return super().estimate_similarity(query_embed, candidate_embeds)
+            queries = _as_numpy(query_embed)
+            single = queries.ndim == 1
+            ids, scores = index.search(queries, self.ann_top_k, nprobe=nprobe)
+            dense = np.full((len(ids), len(index)), -1.0, dtype=np.float32)
+            found = ids >= 0
+            dense[np.nonzero(found)[0], ids[found]] = scores[found]
+            return dense[0] if single else dense
+
+    ANNRetriever.__name__ = f"ANN{base.__name__}"
+    ANNRetriever.__qualname__ = ANNRetriever.__name__
+    return ANNRetriever
+
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray) -> float:
+    """Share of the exact top-k ids that the approximate search also returned."""
+    if not exact_ids.size:
+        return 1.0
+    hits = sum(len(np.intersect1d(a[a >= 0], e)) for a, e in zip(approx_ids, exact_ids))
+    return hits / exact_ids.size
+
+
+# ───────────────────────── CLI ────────────────────────────────
+def entity_texts(path: str, repr: str) -> tuple[list[str], list[str]]:
+    """``(entities, texts)`` of an ``ENT <tag>.csv``: label (``C``) or label + comment (``…D``)."""
+    from table_io import read_table
+    df = read_table(path).fillna("")
+    texts = df['label'].astype(str)
+    if repr.endswith("D"):
+        texts = texts + ". " + df['comment'].astype(str)
+    return df['entity'].astype(str).tolist(), texts.tolist()
+
+
+def main(args):
+    from embedding_store import DEFAULT_STORE_DIR, EmbeddingStore
+    start_time = time.time()
+    try:
+        source_keys, source_texts = entity_texts(args.source, args.repr)
+        target_keys, target_texts = entity_texts(args.target, args.repr)
+    except (FileNotFoundError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model, device=args.device)
+    store = EmbeddingStore(args.model, args.repr, args.embed_cache or DEFAULT_STORE_DIR)
+    encode = lambda chunk: model.encode(chunk, batch_size=args.batch_size, convert_to_numpy=True)
+    target_vectors = store.embed(target_texts, encode, args.batch_size)
+    source_vectors = store.embed(source_texts, encode, args.batch_size)
+    print(f"Embedding: {store.summary()}")
+
+    model_slug = re.sub(r"[^\w.-]+", "_", args.model)
+    index_file = os.path.join(args.index_dir, f"{Path(args.target).stem}_{model_slug}_{args.repr}_{args.index}.npz")
+    index, built = load_or_build(index_file, target_keys, target_vectors, args.index, model=args.model,
+                                 nlist=args.nlist, nprobe=args.nprobe)
+    print(f"{'✔ Indeks dibangun' if built else '• Indeks dimuat'}: {index_file} ({len(index):,} target)")
+
+    t0 = time.time()
+    ids, scores = index.search(source_vectors, args.top_k, nprobe=args.nprobe)
+    print(f"Pencarian {len(source_keys):,} query × top-{args.top_k}: {time.time() - t0:.2f} detik")
+    if args.recall_sample and args.index != "exact":
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(source_vectors), min(args.recall_sample, len(source_vectors)), replace=False)
+        exact_ids, _ = ExactIndex(target_vectors).search(source_vectors[sample], args.top_k)
+        print(f"Recall@{args.top_k} vs pencarian exact ({len(sample):,} query): {recall_at_k(ids[sample], exact_ids):.3f}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write("Source\tTarget\tScore\n")
+        for q, source in enumerate(source_keys):
+            for t, s in zip(ids[q], scores[q]):
+                if t >= 0:
+                    f.write(f"{source}\t{target_keys[t]}\t{s:.4f}\n")
+    print(f"✔ Kandidat disimpan ke: {args.output}")
+    print(f"\nProses selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kandidat retrieval dengan indeks ANN (IVF NumPy) + cek recall")
+    parser.add_argument("--source", type=str, required=True, help="ENT <tag>.csv ontologi sumber")
+    parser.add_argument("--target", type=str, required=True, help="ENT <tag>.csv ontologi target (indeks dibangun di sini)")
+    parser.add_argument("--repr", type=str, default="C", help="Representasi: C (label) atau …D (label + komentar)")
+    parser.add_argument("--output", type=str, default="candidates.tsv", help="File kandidat (Source, Target, Score)")
+    parser.add_argument("--model", type=str, default="sentence-transformers/all-mpnet-base-v2", help="Model sentence-transformers")
+    parser.add_argument("--device", type=str, default="cpu", help="Device (cpu atau cuda)")
+    parser.add_argument("--batch_size", type=int, default=64, help="Batch encode untuk teks yang belum ada di cache")
+    parser.add_argument("--embed_cache", type=str, default=None, help="Direktori cache embedding")
+    parser.add_argument("--index", type=str, default="ivf", choices=INDEX_KINDS, help="Jenis indeks")
+    parser.add_argument("--index_dir", type=str, default=".ann_index", help="Direktori indeks tersimpan")
+    parser.add_argument("--nlist", type=int, default=None, help="Jumlah list IVF (default 4·√n)")
+    parser.add_argument("--nprobe", type=int, default=None, help="List yang diperiksa per query (default ⌈√nlist⌉)")
+    parser.add_argument("--top_k", type=int, default=10, help="Kandidat per entitas sumber")
+    parser.add_argument("--recall_sample", type=int, default=200, help="Jumlah query untuk cek recall vs exact (0 = tidak)")
+    main(parser.parse_args())
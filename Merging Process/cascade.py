@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""cascade.py — lexical / embedding cascade in front of the LLM
+
+The RAG step asked the LLM about every retrieved candidate, including pairs
+the string matcher already scores 100 (``OSN:User`` – ``MP:User``).  The
+cascade decides the easy pairs first and leaves only the ambiguous band to
+the LLM:
+
+=============  ==============================================================
+``lexical``    lexical ≥ ``accept_lexical`` *and* embedding ≥
+               ``accept_embedding`` → accepted (``yes``)
+``floor``      lexical < ``reject_lexical`` *and* embedding <
+               ``reject_embedding`` → rejected (``no``)
+``skipped``    in between, but another candidate of the same source was
+               accepted → not asked, recorded as ``no`` (only with
+               ``one_per_source``, i.e. a one-to-one / many-to-one filter)
+``llm``        everything else — sent to the LLM
+=============  ==============================================================
+
+Every candidate gets exactly one row.  :func:`merge_decisions` joins the
+cascade rows with the LLM output, one row per (source, target); where both
+have the pair, the LLM decision wins.  The ``score`` of a cascade decision is
+on the scale of the LLM's yes-probability (1.0 accepted, 0.0 rejected), so the
+cardinality filter and the ``Score`` threshold of the merge step compare like
+with like; the raw scores travel as ``embedding`` and ``lexical``.
+
+The lexical score is ``fuzz.WRatio`` of the lowercased local names (as in
+:mod:`string_match`), the embedding score is the retrieval cosine of the
+candidates file (``Source, Target, Score`` — see :mod:`ann_index`).  The
+``Tier`` column records which stage decided each pair.
+
+Usage::
+
+    python cascade.py candidates.tsv --output cascade.tsv --accept_lexical 95 --accept_embedding 0.8
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from entity_norm import local_name
+from string_match import score_pairs
+
+TIER_LEXICAL = "lexical"
+TIER_FLOOR = "floor"
+TIER_SKIPPED = "skipped"
+TIER_LLM = "llm"
+CASCADE_COLUMNS = ['Source', 'Target', 'Score', 'Lexical', 'Label', 'Tier']
+
+# auto-accept needs both scores ≥ accept_*, auto-reject both < reject_*
+DEFAULT_BOUNDS = {
+    "accept_lexical": 95.0,
+    "accept_embedding": 0.8,
+    "reject_lexical": 50.0,
+    "reject_embedding": 0.5,
+}
+
+
+def read_candidates(path: str) -> pd.DataFrame:
+    """``Source, Target, Score`` candidates (TSV)."""
+    df = pd.read_csv(path, sep="\t")
+    missing = [c for c in ('Source', 'Target', 'Score') if c not in df.columns]
+    if missing:
+        raise KeyError(f"Kolom {missing} tidak ada di '{path}'")
+    return df
+
+
+def cascade_tiers(candidates: pd.DataFrame, bounds: dict[str, float] | None = None, workers: int = -1,
+                  one_per_source: bool = False) -> pd.DataFrame:
+    """*candidates* with ``Lexical``, ``Label`` (``yes`` / ``no`` / empty) and ``Tier`` columns.
+
+    With *one_per_source* the remaining middle-band candidates of an accepted
+    source are ``skipped`` (the cardinality filter would drop them anyway);
+    otherwise they go to the LLM like any other ambiguous pair.
+    """
+    bounds = {**DEFAULT_BOUNDS, **(bounds or {})}
+    df = candidates.copy()
+    sources = [local_name(str(s)) for s in df['Source']]
+    targets = [local_name(str(t)) for t in df['Target']]
+    idx = np.arange(len(df))
+    lexical = score_pairs(sources, targets, idx, idx, score_cutoff=0, workers=workers)
+    embedding = df['Score'].to_numpy(dtype=np.float64)
+    accept = (lexical >= bounds["accept_lexical"]) & (embedding >= bounds["accept_embedding"])
+    reject = ~accept & (lexical < bounds["reject_lexical"]) & (embedding < bounds["reject_embedding"])
+    skipped = ~accept & ~reject & df['Source'].isin(set(df.loc[accept, 'Source'])).to_numpy()
+    if not one_per_source:
+        skipped[:] = False
+    df['Lexical'] = np.round(lexical, 2)
+    df['Label'] = np.where(accept, "yes", np.where(reject | skipped, "no", ""))
+    df['Tier'] = np.select([accept, reject, skipped], [TIER_LEXICAL, TIER_FLOOR, TIER_SKIPPED], TIER_LLM)
+    return df.reindex(columns=CASCADE_COLUMNS)
+
+
+def llm_sources(tiered: pd.DataFrame) -> set[str]:
+    """Sources that still need the LLM: some candidate in the ``llm`` band."""
+    return set(tiered.loc[tiered['Tier'] == TIER_LLM, 'Source'])
+
+
+def decided_alignments(tiered: pd.DataFrame) -> list[dict]:
+    """Cascade decisions as RAG-style alignment dicts (``source``, ``target``, ``label``, ``score``, ``tier``).
+
+    ``score`` is the decision on the LLM-probability scale (1.0 / 0.0); the
+    retrieval cosine and the WRatio score are kept as ``embedding`` / ``lexical``.
+    """
+    decided = tiered[tiered['Tier'] != TIER_LLM]
+    return [{"source": s, "target": t, "label": label, "score": decision_score(label), "tier": tier,
+             "embedding": float(embedding), "lexical": float(lexical)}
+            for s, t, label, embedding, lexical, tier in zip(decided['Source'], decided['Target'], decided['Label'],
+                                                             decided['Score'], decided['Lexical'], decided['Tier'])]
+
+
+def decision_score(label: str) -> float:
+    """A cascade decision as a yes-probability: accepted pairs 1.0, rejected 0.0."""
+    return 1.0 if str(label).lower() == "yes" else 0.0
+
+
+def merge_decisions(decided: list[dict], llm_output: list[dict]) -> list[dict]:
+    """Cascade rows + LLM rows (tagged ``llm``), one per (source, target); the LLM row wins."""
+    for align in llm_output:
+        align.setdefault("tier", TIER_LLM)
+    asked = {(a.get("source"), a.get("target")) for a in llm_output}
+    return [a for a in decided if (a["source"], a["target"]) not in asked] + llm_output
+
+
+def tier_summary(tiered: pd.DataFrame) -> str:
+    counts = tiered['Tier'].value_counts()
+    total = max(len(tiered), 1)
+    return ", ".join(f"{tier} {counts.get(tier, 0):,} ({counts.get(tier, 0) / total:.1%})"
+                     for tier in (TIER_LEXICAL, TIER_FLOOR, TIER_SKIPPED, TIER_LLM))
+
+
+def add_bounds_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--accept_lexical", type=float, default=DEFAULT_BOUNDS["accept_lexical"], help="Skor WRatio minimum untuk auto-accept (0-100)")
+    parser.add_argument("--accept_embedding", type=float, default=DEFAULT_BOUNDS["accept_embedding"], help="Skor embedding minimum untuk auto-accept (cosine)")
+    parser.add_argument("--reject_lexical", type=float, default=DEFAULT_BOUNDS["reject_lexical"], help="Di bawah skor WRatio ini (dan di bawah --reject_embedding) pasangan auto-reject")
+    parser.add_argument("--reject_embedding", type=float, default=DEFAULT_BOUNDS["reject_embedding"], help="Di bawah skor embedding ini (dan di bawah --reject_lexical) pasangan auto-reject")
+
+
+def bounds_from_args(args) -> dict[str, float]:
+    return {name: getattr(args, name) for name in DEFAULT_BOUNDS}
+
+
+def main(args):
+    start_time = time.time()
+    try:
+        candidates = read_candidates(args.candidates)
+    except (FileNotFoundError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    tiered = cascade_tiers(candidates, bounds_from_args(args), args.workers, args.one_per_source)
+    tiered.to_csv(args.output, sep="\t", index=False)
+    print(f"Cascade {len(tiered):,} kandidat: {tier_summary(tiered)}")
+    print(f"Sumber yang masih perlu LLM: {len(llm_sources(tiered)):,} dari {tiered['Source'].nunique():,}")
+    print(f"✔ Hasil disimpan ke: {args.output}")
+    print(f"\nProses selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cascade leksikal/embedding sebelum LLM (auto-accept, auto-reject, sisanya ke LLM)")
+    parser.add_argument("candidates", help="File kandidat TSV (Source, Target, Score)")
+    parser.add_argument("--output", type=str, default="cascade.tsv", help="File output dengan kolom Lexical, Label, Tier")
+    parser.add_argument("--workers", type=int, default=-1, help="Jumlah thread rapidfuzz")
+    parser.add_argument("--one_per_source", action="store_true", help="Kandidat lain dari sumber yang sudah diterima ditandai 'skipped' (hanya untuk filter one-to-one / many-to-one)")
+    add_bounds_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""class_closure.py — precomputed subClassOf closure over interned class IDs
+
+Ancestry questions ("is ``Global_Comment`` a kind of ``Global_Post``?", all
+descendants of a class, the ``rdfs:subClassOf*`` of the CQ queries) otherwise
+mean walking the hierarchy again every time.  Extraction builds this index
+once from the rows of ``CLS <tag>.csv``:
+
+* every named class gets an integer ID (its position in ``classes``);
+* ``ancestors[i]`` is a Python ``int`` used as a bitset — bit ``j`` is set
+  when class ``j`` is a (strict, transitive) superclass of class ``i``;
+* ``descendants`` is the transposed bitset, rebuilt on load.
+
+Ancestor / descendant tests are then one dict lookup and one bit test.
+Cycles (``A ⊑ B ⊑ A``) are fine: the members simply become each other's
+ancestors.  Blank nodes (anonymous classes) are left out.
+
+The index is written next to the table as ``CLS <tag> closure.json``.
+"""
+from __future__ import annotations
+import json
+import os
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from graph_extract import is_blank
+
+CLOSURE_FILE = "CLS {tag} closure.json"
+FORMAT_VERSION = 1
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ClosureIndex:
+    """Transitive subClassOf closure as bitsets over interned class IDs."""
+
+    def __init__(self, classes: list[str], ancestors: list[int]):
+        self.classes = classes
+        self.ids = {cls: i for i, cls in enumerate(classes)}
+        self.ancestors = ancestors
+        self.descendants = [0] * len(classes)
+        for i, mask in enumerate(ancestors):
+            for j in _bits(mask):
+                self.descendants[j] |= 1 << i
+
+    # ───────────────────────── build ──────────────────────────
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[str, str]]) -> "ClosureIndex":
+        """Build from ``(subClass, class)`` pairs."""
+        classes: dict[str, int] = {}
+        parents: dict[int, set[int]] = defaultdict(set)
+        for sub, sup in edges:
+            if is_blank(sub) or is_blank(sup):
+                continue
+            s = classes.setdefault(sub, len(classes))
+            p = classes.setdefault(sup, len(classes))
+            if s != p:
+                parents[s].add(p)
+
+        # parents before children (DFS post-order), so one pass settles a DAG;
+        # further passes only run while a cycle keeps adding bits
+        order, seen = [], set()
+        for root in range(len(classes)):
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(parents.get(root, ())))]
+            while stack:
+                node, it = stack[-1]
+                nxt = next(it, None)
+                if nxt is None:
+                    stack.pop()
+                    order.append(node)
+                elif nxt not in seen:
+                    seen.add(nxt)
+                    stack.append((nxt, iter(parents.get(nxt, ()))))
+
+        ancestors = [0] * len(classes)
+        changed = True
+        while changed:
+            changed = False
+            for node in order:
+                mask = ancestors[node]
+                for p in parents.get(node, ()):
+                    mask |= (1 << p) | ancestors[p]
+                if mask != ancestors[node]:
+                    ancestors[node] = mask
+                    changed = True
+        return cls(list(classes), ancestors)
+
+    @classmethod
+    def from_cls_rows(cls, rows: Iterable[tuple[str, ...]]) -> "ClosureIndex":
+        """Build from ``CLS`` table rows (``class, subClass, …``)."""
+        return cls.from_edges((row[1], row[0]) for row in rows)
+
+    # ───────────────────────── query ──────────────────────────
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def __contains__(self, cls: str) -> bool:
+        return cls in self.ids
+
+    def is_ancestor(self, ancestor: str, cls: str) -> bool:
+        """True when *ancestor* is a strict transitive superclass of *cls*."""
+        a, c = self.ids.get(ancestor), self.ids.get(cls)
+        if a is None or c is None:
+            return False
+        return bool(self.ancestors[c] >> a & 1)
+
+    def is_subclass(self, cls: str, ancestor: str) -> bool:
+        """``cls rdfs:subClassOf* ancestor`` (reflexive, like the SPARQL path)."""
+        return cls == ancestor or self.is_ancestor(ancestor, cls)
+
+    def ancestors_of(self, cls: str) -> list[str]:
+        i = self.ids.get(cls)
+        return [] if i is None else [self.classes[j] for j in _bits(self.ancestors[i])]
+
+    def descendants_of(self, cls: str) -> list[str]:
+        i = self.ids.get(cls)
+        return [] if i is None else [self.classes[j] for j in _bits(self.descendants[i])]
+
+    # ────────────────────────── I/O ───────────────────────────
+    def save(self, path: str) -> None:
+        payload = {
+            "format": FORMAT_VERSION,
+            "classes": self.classes,
+            "ancestors": [format(mask, "x") for mask in self.ancestors],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "ClosureIndex":
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported closure index format in '{path}'")
+        return cls(payload["classes"], [int(mask, 16) for mask in payload["ancestors"]])
+
+
+def write_closure(cls_rows: Iterable[tuple[str, ...]], tag: str, out_dir: str = ".") -> tuple[str, int]:
+    """Build the closure of a CLS table and write ``CLS <tag> closure.json``."""
+    index = ClosureIndex.from_cls_rows(cls_rows)
+    path = os.path.join(out_dir, CLOSURE_FILE.format(tag=tag))
+    index.save(path)
+    return path, len(index)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""comment_match.py — sparse TF-IDF / BM25 similarity of entity comments
+
+``alignment.py`` compared comments with ``token_set_ratio`` item by item,
+which is quadratic string work on whole sentences.  Here the comments of
+both ontologies (``classComment`` / ``subClassComment``,
+``dataPropertyComment``, ``predicateComment``) become rows of two sparse
+matrices over one shared vocabulary, and similarity is a sparse product:
+
+1. comments are normalized with :func:`entity_norm.normalize_text` and split
+   into words; the vocabulary and document frequencies are taken over the
+   comments of *both* ontologies;
+2. each row is weighted with TF-IDF (smoothed idf) or BM25 and L2-normalized,
+   so ``A @ B.T`` is the cosine similarity;
+3. :func:`cosine_topk` multiplies ``A`` in row blocks and keeps the best
+   ``k`` columns per row in a CSR matrix scaled to 0-100 — the same scale as
+   the WRatio name scores, so :func:`fuse_scores` can mix the two.
+
+Rows follow :meth:`EntityCatalog.sorted_names`, i.e. the same order as the
+name matrices of :mod:`string_match`.  Entities without a comment have an
+all-zero row and never match.
+
+Usage::
+
+    python comment_match.py --tables_dir "../Fixed Files/Data Extraction/Class" --kinds class \\
+        --top_k 5 --fuse 0.3 --out_dir comment_matches
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from entity_catalog import EntityCatalog
+from entity_norm import local_name, normalize_text
+from string_match import (DEFAULT_TAGS, ENTITY_KINDS, OUTPUT_COLUMNS, find_table, ontology_pairs, score_pairs)
+
+WEIGHTINGS = ("tfidf", "bm25")
+COMMENT_OUTPUT = "matched_comment_{kind}_{p1}_{p2}.csv"
+COMMENT_THRESHOLD = 30
+COMMENT_TOP_K = 5
+BM25_K1 = 1.2
+BM25_B = 0.75
+BLOCK_ROWS = 1024
+
+
+# ───────────────────────── vectors ────────────────────────────
+def _term_counts(docs: list[str], vocab: dict[str, int]):
+    """Raw term-count CSR of *docs* over *vocab* (unknown words are dropped)."""
+    from scipy.sparse import csr_matrix
+    rows, cols = [], []
+    for d, doc in enumerate(docs):
+        for word in normalize_text(doc).split():
+            t = vocab.get(word)
+            if t is not None:
+                rows.append(d)
+                cols.append(t)
+    counts = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(docs), len(vocab)))
+    counts.sum_duplicates()
+    return counts
+
+
+def _l2_normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return matrix.multiply(1.0 / norms[:, None]).tocsr()
+
+
+def comment_vectors(docs1: list[str], docs2: list[str], weighting: str = "tfidf",
+                    k1: float = BM25_K1, b: float = BM25_B):
+    """L2-normalized TF-IDF / BM25 CSR matrices of both sides, one vocabulary."""
+    vocab: dict[str, int] = {}
+    for doc in (*docs1, *docs2):
+        for word in normalize_text(doc).split():
+            vocab.setdefault(word, len(vocab))
+    c1, c2 = _term_counts(docs1, vocab), _term_counts(docs2, vocab)
+    n_docs = len(docs1) + len(docs2)
+    df = np.bincount(np.concatenate([c1.indices, c2.indices]), minlength=len(vocab))
+
+    weighted = []
+    if weighting == "bm25":
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        lengths = np.concatenate([np.asarray(c.sum(axis=1)).ravel() for c in (c1, c2)])
+        avgdl = lengths.mean() if n_docs and lengths.mean() > 0 else 1.0
+        for c in (c1, c2):
+            dl = np.asarray(c.sum(axis=1)).ravel()
+            c = c.tocoo()
+            tf = c.data * (k1 + 1) / (c.data + k1 * (1 - b + b * dl[c.row] / avgdl))
+            c.data = tf * idf[c.col]
+            weighted.append(_l2_normalize(c.tocsr()))
+    elif weighting == "tfidf":
+        idf = np.log((1 + n_docs) / (1 + df)) + 1
+        for c in (c1, c2):
+            weighted.append(_l2_normalize(c.multiply(idf[None, :]).tocsr()))
+    else:
+        raise ValueError(f"Pembobotan tidak dikenal: {weighting} (pilih dari {WEIGHTINGS})")
+    return weighted[0], weighted[1]
+
+
+def cosine_topk(a, b, k: int = COMMENT_TOP_K, min_score: float = COMMENT_THRESHOLD,
+                block_rows: int = BLOCK_ROWS):
+    """Best *k* cosine scores (0-100) ≥ *min_score* per row of ``a @ b.T``, as CSR.
+
+    ``a`` is multiplied in blocks of *block_rows* rows, so at most one
+    ``block_rows × b.shape[0]`` block is densified at a time.
+    """
+    from scipy.sparse import csr_matrix
+    bt = b.T.tocsc()
+    rows, cols, vals = [], [], []
+    for start in range(0, a.shape[0], block_rows):
+        block = (a[start:start + block_rows] @ bt).toarray() * 100.0
+        top = np.argsort(-block, axis=1, kind="stable")[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        r, c = np.nonzero((top_scores >= min_score) & (top_scores > 0))
+        rows.append(r + start)
+        cols.append(top[r, c])
+        vals.append(top_scores[r, c])
+    if not rows:
+        return csr_matrix((a.shape[0], b.shape[0]), dtype=np.float64)
+    return csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(a.shape[0], b.shape[0]))
+
+
+def fuse_scores(name_scores: np.ndarray, comment_scores: np.ndarray, weight: float) -> np.ndarray:
+    """``(1 - weight) · name + weight · comment`` (both on the 0-100 scale)."""
+    return (1.0 - weight) * np.asarray(name_scores) + weight * np.asarray(comment_scores)
+
+
+# ───────────────────────── pairs ──────────────────────────────
+def comment_pair(kind: str, df1: pd.DataFrame, df2: pd.DataFrame, k: int = COMMENT_TOP_K,
+                 min_score: float = COMMENT_THRESHOLD, weighting: str = "tfidf"):
+    """``(catalog1, catalog2, names1, names2, csr)`` comment top-*k* of one entity type of one pair."""
+    catalog1 = EntityCatalog.from_table(df1, kind, transform=local_name)
+    catalog2 = EntityCatalog.from_table(df2, kind, transform=local_name)
+    names1, names2 = catalog1.sorted_names(), catalog2.sorted_names()
+    a, b = comment_vectors(catalog1.comments_of(names1), catalog2.comments_of(names2), weighting)
+    return catalog1, catalog2, names1, names2, cosine_topk(a, b, k, min_score)
+
+
+def comment_matches(kind: str, df1: pd.DataFrame, df2: pd.DataFrame, p1: str, p2: str,
+                    k: int = COMMENT_TOP_K, min_score: float = COMMENT_THRESHOLD, weighting: str = "tfidf",
+                    fuse: float | None = None, workers: int = -1) -> pd.DataFrame:
+    """Match rows in the usual ``ont 1, ont 2, score, …`` layout, scored by comment.
+
+    With *fuse* the ``score`` column is the fused name/comment score and the
+    ``name score`` / ``comment score`` columns are added.
+    """
+    catalog1, catalog2, names1, names2, matrix = comment_pair(kind, df1, df2, k, min_score, weighting)
+    coo = matrix.tocoo()
+    order = np.lexsort((coo.col, coo.row, -coo.data))
+    i, j, s = coo.row[order], coo.col[order], coo.data[order]
+    n1, n2 = np.asarray(names1, dtype=object)[i], np.asarray(names2, dtype=object)[j]
+    c1, c2 = catalog1.comments_of(n1), catalog2.comments_of(n2)
+    if ENTITY_KINDS[kind]["prefix_comments"]:
+        c1 = [f"{p1}:{c}" for c in c1]
+        c2 = [f"{p2}:{c}" for c in c2]
+    columns = list(OUTPUT_COLUMNS)
+    data = {'ont 1': [f"{p1}:{n}" for n in n1], 'ont 2': [f"{p2}:{n}" for n in n2],
+            'score': np.round(s, 2), 'Comment Onto 1': c1, 'Comment Onto 2': c2}
+    if fuse is not None:
+        name_s = score_pairs(names1, names2, i, j, score_cutoff=0, workers=workers)
+        data['score'] = np.round(fuse_scores(name_s, s, fuse), 2)
+        data['name score'] = np.round(name_s, 2)
+        data['comment score'] = np.round(s, 2)
+        columns += ['name score', 'comment score']
+    results_df = pd.DataFrame(data, columns=columns)
+    return results_df.sort_values('score', ascending=False, kind="stable").reset_index(drop=True)
+
+
+def main(args):
+    from table_io import read_table, write_table
+    os.makedirs(args.out_dir, exist_ok=True)
+    start_time = time.time()
+    try:
+        tables = {(kind, tag): read_table(find_table(ENTITY_KINDS[kind]["table"], tag, args.tables_dir))
+                  for kind in args.kinds for tag in args.tags}
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Comment matching {args.weighting} (top-{args.top_k}, min {args.min_score}"
+          f"{'' if args.fuse is None else f', fuse {args.fuse}'}) …")
+    for kind in args.kinds:
+        for p1, p2 in ontology_pairs(args.tags):
+            results_df = comment_matches(kind, tables[(kind, p1)], tables[(kind, p2)], p1, p2, args.top_k,
+                                         args.min_score, args.weighting, args.fuse, args.workers)
+            if results_df.empty:
+                print(f"  • {kind} {p1}-{p2}: tidak ada kecocokan komentar, file tidak dibuat")
+                continue
+            output_file = os.path.join(args.out_dir, COMMENT_OUTPUT.format(kind=kind, p1=p1, p2=p2))
+            write_table(results_df, output_file)
+            print(f"  ✔ {kind} {p1}-{p2}: {len(results_df):,} pasangan → {output_file}")
+    print(f"\nProses selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kemiripan komentar entitas (TF-IDF/BM25 sparse, cosine top-k)")
+    parser.add_argument("--tags", nargs="+", default=DEFAULT_TAGS, help="Tag ontologi, urutan menentukan pasangan")
+    parser.add_argument("--kinds", nargs="+", default=list(ENTITY_KINDS), choices=list(ENTITY_KINDS), help="Tipe entitas")
+    parser.add_argument("--tables_dir", nargs="+", default=["."], help="Direktori berisi CLS/DP2/OP2 <tag>.csv")
+    parser.add_argument("--out_dir", type=str, default=".", help="Direktori output")
+    parser.add_argument("--weighting", type=str, default="tfidf", choices=WEIGHTINGS, help="Pembobotan term")
+    parser.add_argument("--top_k", type=int, default=COMMENT_TOP_K, help="Kecocokan komentar terbaik per entitas")
+    parser.add_argument("--min_score", type=float, default=COMMENT_THRESHOLD, help="Skor cosine minimum (0-100)")
+    parser.add_argument("--fuse", type=float, default=None, help="Bobot komentar saat digabung dengan skor nama WRatio (0-1)")
+    parser.add_argument("--workers", type=int, default=-1, help="Jumlah thread untuk skor nama (--fuse)")
+    main(parser.parse_args())
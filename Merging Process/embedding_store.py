@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""embedding_store.py — memory-mapped float16 cache of sentence embeddings
+
+``BiEncoderRetrieval`` loads ``sentence-transformers/all-mpnet-base-v2`` and
+encodes every source and target representation again on every run, so OSN
+is encoded once for each of matchOSN-MP, matchOSN-MCSS and matchOSN-OFB.
+This store encodes each distinct text once per (model, repr):
+
+* ``<root>/<model>/<repr>/vectors.f16`` — float16 rows, opened with
+  ``np.memmap`` (only the rows that are looked up are paged in);
+* ``<root>/<model>/<repr>/keys.txt`` — the SHA-1 of the text of each row,
+  one per line; it is the ID index (``hash → row``) and is replaced
+  atomically (temp file + ``os.replace``) *after* the vectors are written,
+  so an interrupted run never indexes a half-written row.
+
+Appends hold an exclusive lock on ``<root>/<model>/<repr>/.lock`` (``fcntl``
+/ ``msvcrt``) and re-read ``keys.txt`` under it, so retriever processes can
+share one store: a text another process has just encoded is not appended
+twice, and no writer cuts rows the other has indexed.
+
+:meth:`EmbeddingStore.embed` returns the vectors of a list of texts and runs
+the encoder only on the texts it has not seen, in batches.
+:func:`cached_retriever_class` wraps the ``model.encode`` of an ontomap
+retriever with it.  Assumption about ontomap: the retriever keeps its
+``SentenceTransformer`` as ``self.model`` and encodes with ``encode(texts,
+…)``.
+
+The root is ``GENOSIS_EMBED_CACHE`` (default: ``.embed_cache`` next to this
+module).
+"""
+from __future__ import annotations
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+DEFAULT_STORE_DIR = Path(os.environ.get("GENOSIS_EMBED_CACHE", Path(__file__).resolve().parent / ".embed_cache"))
+ENCODE_BATCH = 64
+
+EncodeFn = Callable[[list[str]], np.ndarray]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name)
+
+
+@contextlib.contextmanager
+def _exclusive_lock(path: Path):
+    """Hold an exclusive lock on *path* (created if missing) across processes."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:                # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class EmbeddingStore:
+    """float16 ``np.memmap`` of embeddings of one (model, repr), indexed by text hash."""
+
+    def __init__(self, model: str, repr: str = "default", root: str | os.PathLike = DEFAULT_STORE_DIR):
+        self.dir = Path(root) / _slug(model) / _slug(repr)
+        self.vectors_path = self.dir / "vectors.f16"
+        self.keys_path = self.dir / "keys.txt"
+        self.ids: dict[str, int] = {}
+        self.dim: int | None = None
+        self.hits = 0
+        self.encoded = 0
+        self._vectors: np.memmap | None = None
+        self._reload()
+
+    def _reload(self) -> None:
+        """Re-read the index and dimension (another process may have appended)."""
+        if self.keys_path.exists():
+            with open(self.keys_path, encoding="utf-8") as f:
+                self.ids = {line.strip(): i for i, line in enumerate(f) if line.strip()}
+        if (self.dir / "dim").exists():
+            self.dim = int((self.dir / "dim").read_text())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, text: str) -> bool:
+        return text_hash(text) in self.ids
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None or self._vectors.shape[0] < len(self.ids):
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r",
+                                      shape=(len(self.ids), self.dim))
+        return self._vectors
+
+    def _append(self, hashes: list[str], vectors: np.ndarray) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with _exclusive_lock(self.dir / ".lock"):
+            self._reload()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                _write_atomic(self.dir / "dim", str(self.dim))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Dimensi embedding {vectors.shape[1]} ≠ {self.dim} di {self.dir}")
+            new = [i for i, h in enumerate(hashes) if h not in self.ids]
+            if new:
+                # a crash may have left rows without a key: cut them before appending
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(len(self.ids) * self.dim * 2)
+                    f.write(vectors[new].tobytes())
+                for i in new:
+                    self.ids[hashes[i]] = len(self.ids)
+                _write_atomic(self.keys_path, "".join(h + "\n" for h in self.ids))
+        self._vectors = None
+
+    def embed(self, texts: list[str], encode: EncodeFn, batch_size: int = ENCODE_BATCH) -> np.ndarray:
+        """``len(texts) × dim`` float32 embeddings; unseen texts go through *encode* in batches."""
+        hashes = [text_hash(t) for t in texts]
+        missing: dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in self.ids and h not in missing:
+                missing[h] = t
+        self.hits += len(texts) - len(missing)
+        pending = list(missing.items())
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            self._append([h for h, _ in chunk], encode([t for _, t in chunk]))
+            self.encoded += len(chunk)
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = np.fromiter((self.ids[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        return np.asarray(self._matrix()[rows], dtype=np.float32)
+
+    def summary(self) -> str:
+        return f"{self.hits} hit, {self.encoded} di-encode, {len(self):,} vektor di {self.dir}"
+
+
+class CachedEncoder:
+    """Stands in for a ``SentenceTransformer``: ``encode`` goes through the store.
+
+    ``normalize_embeddings=True`` changes the vectors, so it gets its own
+    store (``<repr>-norm``).
+    """
+
+    def __init__(self, model, store: EmbeddingStore):
+        self.model = model
+        self.store = store
+        self._stores = {False: store}
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, sentences, batch_size: int = ENCODE_BATCH, convert_to_tensor: bool = False,
+               convert_to_numpy: bool = True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        def encode(chunk: list[str]) -> np.ndarray:
+            return np.asarray(self.model.encode(chunk, batch_size=batch_size, convert_to_numpy=True, **kwargs))
+
+        normalized = bool(kwargs.get("normalize_embeddings"))
+        if normalized not in self._stores:
+            self._stores[normalized] = EmbeddingStore(self.store.dir.parent.name, self.store.dir.name + "-norm",
+                                                      self.store.dir.parent.parent)
+        vectors = self._stores[normalized].embed(texts, encode, batch_size)
+        if convert_to_tensor:
+            import torch
+            vectors = torch.from_numpy(vectors)
+        return vectors[0] if single else vectors
+
+
+def cached_retriever_class(base: type, repr: str, root: str | os.PathLike = DEFAULT_STORE_DIR) -> type:
+    """Subclass of an ontomap retriever whose ``self.model.encode`` is served from a store."""
+
+    class CachedRetriever(base):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            model_name = str(kwargs.get("path") or kwargs.get("model_name") or base.__name__)
+            self.embedding_store = EmbeddingStore(model_name, repr, root)
+            self.model = CachedEncoder(self.model, self.embedding_store)
+
+    CachedRetriever.__name__ = f"Cached{base.__name__}"
+    CachedRetriever.__qualname__ = CachedRetriever.__name__
+    return CachedRetriever
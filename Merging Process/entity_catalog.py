@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""entity_catalog.py — deduplicated, interned name / comment tables
+
+The string matchers (``create_class_comment_map``, ``create_op_comment_map``,
+``create_dp_comment_map``) and the ``synth-matched-*.py`` scripts each built
+a name → comment dict by walking their DataFrame with ``iterrows``.  This
+module does it once, vectorized, with the same rules:
+
+* the name columns are visited row by row, left to right (``class`` then
+  ``subClass``; ``ont 1`` then ``ont 2``) and the **first** occurrence of a
+  name decides its comment;
+* missing comments become ``""``; missing names become ``""`` (and are
+  dropped unless ``drop_empty=False``); names are ``str()``-converted like
+  before.
+
+Names are interned (``sys.intern``) and numbered in first-occurrence order,
+so callers can work on integer codes (:meth:`EntityCatalog.codes`) and only
+turn them back into strings for output.
+
+Typical use::
+
+    cat = EntityCatalog.from_table("CLS OFB.csv", "class")
+    cat.sorted_names()               # matcher input
+    cat.comment("User")              # comment of one name
+    cat = EntityCatalog.from_matches(df_combined)   # synth scripts
+"""
+from __future__ import annotations
+import sys
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+# columns per extraction table / entity type
+CATALOG_COLUMNS = {
+    "class": (("class", "subClass"), ("classComment", "subClassComment")),
+    "dp":    (("dataProperty",), ("dataPropertyComment",)),
+    "op":    (("predicate",), ("predicateComment",)),
+}
+MATCH_COLUMNS = (("ont 1", "ont 2"), ("Comment Onto 1", "Comment Onto 2"))
+
+
+class EntityCatalog:
+    """Unique names (first-occurrence order) with their first comment."""
+
+    def __init__(self, names: Iterable[str], comments: Iterable[str]):
+        self.names: list[str] = [sys.intern(n) for n in names]
+        self.comments: list[str] = list(comments)
+        self.ids: dict[str, int] = {n: i for i, n in enumerate(self.names)}
+
+    # ───────────────────────── build ──────────────────────────
+    @classmethod
+    def from_columns(cls, df: pd.DataFrame, name_cols: Iterable[str], comment_cols: Iterable[str],
+                     transform: Callable[[str], str] | None = None, drop_empty: bool = True) -> "EntityCatalog":
+        """Interleave the name/comment columns row by row, keep first occurrences."""
+        name_series = [df[c].fillna("").astype(str) for c in name_cols]
+        if transform is not None:
+            name_series = [s.map(transform) for s in name_series]
+        names = np.column_stack([s.to_numpy(dtype=object) for s in name_series]).ravel()
+        comments = np.column_stack([df[c].fillna("").astype(str).to_numpy(dtype=object)
+                                    for c in comment_cols]).ravel()
+        if drop_empty:
+            keep = names != ""
+            names, comments = names[keep], comments[keep]
+        codes, uniques = pd.factorize(names)          # uniques in first-occurrence order
+        known = codes >= 0                            # -1: a transform returned None/NaN
+        _, first = np.unique(codes[known], return_index=True)
+        return cls(uniques, comments[known][first])
+
+    @classmethod
+    def from_table(cls, path_or_df, kind: str, transform: Callable[[str], str] | None = None) -> "EntityCatalog":
+        """Catalog of one extraction table (``CLS`` → ``class``, ``DP2`` → ``dp``, ``OP2`` → ``op``)."""
+        if isinstance(path_or_df, pd.DataFrame):
+            df = path_or_df
+        else:
+            from table_io import read_table
+            df = read_table(path_or_df)
+        name_cols, comment_cols = CATALOG_COLUMNS[kind]
+        return cls.from_columns(df, name_cols, comment_cols, transform)
+
+    @classmethod
+    def from_matches(cls, df: pd.DataFrame) -> "EntityCatalog":
+        """Catalog of a match table (``ont 1`` / ``ont 2`` with their comments)."""
+        name_cols, comment_cols = MATCH_COLUMNS
+        return cls.from_columns(df, name_cols, comment_cols, drop_empty=False)
+
+    # ───────────────────────── query ──────────────────────────
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def sorted_names(self) -> list[str]:
+        return sorted(self.names)
+
+    def comment(self, name: str, default: str = "") -> str:
+        i = self.ids.get(name)
+        return default if i is None else self.comments[i]
+
+    def comments_of(self, names: Iterable[str], default: str = "") -> list[str]:
+        return [self.comment(n, default) for n in names]
+
+    def comment_map(self) -> dict[str, str]:
+        """Plain ``{name: comment}`` dict, for code written against the old maps."""
+        return dict(zip(self.names, self.comments))
+
+    def codes(self, values: Iterable[str]) -> np.ndarray:
+        """Integer code of each value (``-1`` when unknown)."""
+        return np.fromiter((self.ids.get(v, -1) for v in values), dtype=np.int64)
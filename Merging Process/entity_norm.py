@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""entity_norm.py — normalized name / token / comment columns per entity
+
+The matchers all redo the same string work inside their loops: ``alignment.py``
+camelCase-splits with ``tokenize_string`` on every call, the
+``*-stringmatching.py`` scripts lowercase every name on every run and the RAG
+step rebuilds labels.  Extraction now does that work once per entity and
+writes it to ``ENT <tag>.csv``:
+
+=================  ========================================================
+``entity``         full IRI (as in OP2 / DP2 / CLS)
+``type``           ``Class`` / ``ObjectProperty`` / ``DatatypeProperty``
+                   (empty when the term is only used, never declared)
+``localName``      IRI fragment without namespace or ``prefix:`` (``hasUser``)
+``nameLower``      ``localName`` lowercased — what the string matchers compare
+``tokens``         camelCase tokens, lowercased, space separated (``has user``)
+``label``          ``rdfs:label`` if present, otherwise ``tokens``; lowercased
+``comment``        first ``rdfs:comment`` (same rule as the comment maps)
+``commentNorm``    ``comment`` lowercased, punctuation stripped, spaces collapsed
+=================  ========================================================
+
+:class:`NameForms` serves the ``nameLower`` / ``tokens`` columns to the
+string matchers by local name; names the table does not know are
+normalized on the spot, so an empty ``NameForms()`` is the plain fallback.
+"""
+from __future__ import annotations
+import os
+import re
+import unicodedata
+
+from graph_extract import ENTITY_COLUMNS, ENTITY_TYPES, GraphIndex, is_blank
+
+ENT_FILE = "ENT {tag}.csv"
+ENT_HEADER = ['entity', 'type', 'localName', 'nameLower', 'tokens', 'label', 'comment', 'commentNorm']
+
+# same pattern as tokenize_string in alignment.py
+_TOKEN_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+# ───────────────────────── normalizers ─────────────────────────
+def local_name(iri: str) -> str:
+    """``http://…/owl#Global:LiveContent`` → ``LiveContent``."""
+    name = re.split(r'[#/]', iri)[-1] if iri else ""
+    return name.rsplit(":", 1)[-1] if ":" in name else name
+
+
+def tokenize(name: str) -> list[str]:
+    """camelCase / PascalCase split, lowercased (``hasURLLink`` → has url link)."""
+    return [t.lower() for t in _TOKEN_RE.findall(name)]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, NFKC, punctuation → space, whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def entity_row(index: GraphIndex, entity: str) -> tuple[str, ...]:
+    types = index.types.get(entity, ())
+    kind = next((label for t, label in ENTITY_TYPES.items() if t in types), "")
+    name = local_name(entity)
+    tokens = " ".join(tokenize(name))
+    labels = index.labels.get(entity)
+    label = normalize_text(labels[0]) if labels else tokens
+    comment = index.comments.get(entity, [""])[0]
+    return (entity, kind, name, name.lower(), tokens, label, comment, normalize_text(comment))
+
+
+# ─────────────────────────── lookup ────────────────────────────
+class NameForms:
+    """``localName`` → precomputed ``nameLower`` / ``tokens`` (and ``type``) of an ``ENT`` table."""
+
+    def __init__(self, lower: dict[str, str] | None = None, tokens: dict[str, str] | None = None,
+                 types: dict[str, str] | None = None):
+        self.lower = lower or {}
+        self.tokens = tokens or {}
+        self.types = types or {}
+
+    @classmethod
+    def from_table(cls, df) -> "NameForms":
+        names = df['localName'].astype(str).tolist()
+        return cls(dict(zip(names, df['nameLower'].fillna("").astype(str))),
+                   dict(zip(names, df['tokens'].fillna("").astype(str))),
+                   dict(zip(names, df['type'].fillna("").astype(str))))
+
+    def __len__(self) -> int:
+        return len(self.lower)
+
+    def lower_of(self, name: str) -> str:
+        found = self.lower.get(name)
+        return found if found is not None else name.lower()
+
+    def tokens_of(self, name: str) -> str:
+        """camelCase tokens joined by spaces (may be empty, like :func:`tokenize`)."""
+        found = self.tokens.get(name)
+        return found if found is not None else " ".join(tokenize(name))
+
+    def names_of_type(self, entity_type: str) -> set[str]:
+        """Local names the table declares as *entity_type* (``Class``, ``ObjectProperty``, …)."""
+        return {name for name, t in self.types.items() if t == entity_type}
+
+
+def read_name_forms(path: str) -> NameForms:
+    from table_io import read_table
+    # "null", "NA", … are names here, not missing values
+    return NameForms.from_table(read_table(path, keep_default_na=False))
+
+
+# ─────────────────────────── table ─────────────────────────────
+def entity_table(index: GraphIndex, tables: dict[str, list[tuple[str, ...]]]) -> list[tuple[str, ...]]:
+    """One row per named entity that is declared or used in the tables."""
+    entities: dict[str, None] = {}
+    for entity, types in index.types.items():
+        if types & ENTITY_TYPES.keys():
+            entities[entity] = None
+    for name, rows in tables.items():
+        for row in rows:
+            for i in ENTITY_COLUMNS.get(name, ()):
+                entities[row[i]] = None
+    return [entity_row(index, e) for e in entities if e and not is_blank(e)]
+
+
+def write_entities(index: GraphIndex, tables: dict[str, list[tuple[str, ...]]], tag: str,
+                   out_dir: str = ".", formats: tuple[str, ...] = ("csv",)) -> tuple[list[str], int]:
+    """Write ``ENT <tag>.csv`` (and Parquet / Arrow copies when asked)."""
+    from table_io import with_format, write_records
+    rows = entity_table(index, tables)
+    base_file = os.path.join(out_dir, ENT_FILE.format(tag=tag))
+    written = []
+    for fmt in formats:
+        path = with_format(base_file, fmt)
+        write_records(rows, ENT_HEADER, path)
+        written.append(path)
+    return written, len(rows)
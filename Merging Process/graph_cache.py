@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""graph_cache.py — content-hash keyed cache of parsed RDF sources
+
+Parsing RDF/XML is the slowest part of every stage that touches an ontology.
+This module parses a source once, stores its triples in a compact pickle
+(an interned term table + a flat ``array('I')`` of term ids) and serves later
+loads from that file for as long as the source bytes stay the same.
+
+* The cache key is the SHA-256 of the file content plus the base IRI the
+  parser resolves relative IRIs against: the ``public_id`` when one is
+  given, otherwise the file's own ``file://`` URI (what rdflib uses).  Any
+  edit invalidates an entry automatically; without a ``public_id`` a copy
+  of the file at another path is parsed again, because its relative IRIs
+  resolve differently.
+* Namespace bindings of the parsed graph are stored with the triples, so
+  :func:`load_graph` returns a graph that serializes with the same prefixes.
+* Entries live in ``GENOSIS_GRAPH_CACHE`` (default: ``.graph_cache`` next to
+  this module).  The directory is capped at ``GENOSIS_GRAPH_CACHE_MB``
+  (default 256 MB); the least recently used entries are evicted first.
+
+Typical use::
+
+    from graph_cache import load_graph, load_triples
+    g = load_graph("Local OFB.rdf")            # rdflib.Graph
+    for s, p, o in load_triples("Local OFB.rdf"):  # plain strings, no Graph
+        ...
+"""
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = Path(os.environ.get("GENOSIS_GRAPH_CACHE", Path(__file__).resolve().parent / ".graph_cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("GENOSIS_GRAPH_CACHE_MB", "256")) * 1024 * 1024
+
+# term kinds in the interned term table
+URI, BNODE, LITERAL = "U", "B", "L"
+
+
+def file_digest(path: str | os.PathLike, public_id: str | None = None) -> str:
+    """SHA-256 over the file bytes (and the base IRI, if any)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    if public_id:
+        h.update(b"\0" + public_id.encode("utf-8"))
+    return h.hexdigest()
+
+
+def entry_key(path: str | os.PathLike, public_id: str | None = None) -> str:
+    """Cache key of *path*: content digest + the base IRI rdflib would parse it with."""
+    return file_digest(path, public_id or Path(path).resolve().as_uri())
+
+
+def _encode_term(term) -> tuple:
+    from rdflib import BNode, Literal
+    if isinstance(term, Literal):
+        return (LITERAL, str(term), term.language, str(term.datatype) if term.datatype else None)
+    if isinstance(term, BNode):
+        return (BNODE, str(term))
+    return (URI, str(term))
+
+
+def _decode_term(entry: tuple):
+    from rdflib import BNode, Literal, URIRef
+    kind = entry[0]
+    if kind == LITERAL:
+        return Literal(entry[1], lang=entry[2], datatype=entry[3])
+    if kind == BNODE:
+        return BNode(entry[1])
+    return URIRef(entry[1])
+
+
+class GraphCache:
+    """On-disk LRU cache of parsed triples, keyed by content hash."""
+
+    def __init__(self, cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    # ───────────────────────── entries ─────────────────────────
+    def entry_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.pkl"
+
+    def load_entry(self, path: str | os.PathLike, format: str | None = None,
+                   public_id: str | None = None) -> tuple[list[tuple], array]:
+        """Return ``(terms, ids)`` for *path*; ``ids`` holds s,p,o term ids."""
+        terms, ids, _ = self._load(path, format, public_id)
+        return terms, ids
+
+    def _load(self, path, format, public_id) -> tuple[list[tuple], array, list[tuple[str, str]]]:
+        entry = self.entry_path(entry_key(path, public_id))
+        if entry.exists():
+            try:
+                with open(entry, "rb") as f:
+                    version, terms, raw, namespaces = pickle.load(f)
+                if version == FORMAT_VERSION:
+                    os.utime(entry)            # mark as recently used
+                    ids = array("I")
+                    ids.frombytes(raw)
+                    self.hits += 1
+                    return terms, ids, namespaces
+            except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+                pass                           # corrupt / foreign entry → re-parse
+        self.misses += 1
+        terms, ids, namespaces = self._parse(path, format, public_id)
+        self._store(entry, terms, ids, namespaces)
+        return terms, ids, namespaces
+
+    def _parse(self, path, format, public_id) -> tuple[list[tuple], array, list[tuple[str, str]]]:
+        import rdflib
+        g = rdflib.Graph()
+        g.parse(str(path), format=format, publicID=public_id)
+        term_ids: dict = {}
+        terms: list[tuple] = []
+        ids = array("I")
+        for triple in g:
+            for term in triple:
+                tid = term_ids.get(term)
+                if tid is None:
+                    tid = term_ids[term] = len(terms)
+                    terms.append(_encode_term(term))
+                ids.append(tid)
+        return terms, ids, [(prefix, str(ns)) for prefix, ns in g.namespaces()]
+
+    def _store(self, entry: Path, terms: list[tuple], ids: array, namespaces: list[tuple[str, str]]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((FORMAT_VERSION, terms, ids.tobytes(), namespaces), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict(keep=entry)
+
+    def evict(self, keep: Path | None = None) -> int:
+        """Drop least recently used entries until the cap is respected."""
+        if not self.cache_dir.exists():
+            return 0
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.cache_dir.glob("*.pkl")]
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for p in self.cache_dir.glob("*.pkl"):
+            p.unlink()
+
+    # ───────────────────────── views ───────────────────────────
+    def triples(self, path: str | os.PathLike, format: str | None = None,
+                public_id: str | None = None) -> Iterator[tuple[str, str, str]]:
+        """Yield ``(s, p, o)`` as plain strings (same as ``str(term)``)."""
+        terms, ids = self.load_entry(path, format, public_id)
+        text = [t[1] for t in terms]
+        for i in range(0, len(ids), 3):
+            yield text[ids[i]], text[ids[i + 1]], text[ids[i + 2]]
+
+    def graph(self, path: str | os.PathLike, format: str | None = None,
+              public_id: str | None = None):
+        """Return an rdflib.Graph rebuilt from the cached triples and namespace bindings."""
+        import rdflib
+        terms, ids, namespaces = self._load(path, format, public_id)
+        nodes = [_decode_term(t) for t in terms]
+        g = rdflib.Graph()
+        for prefix, ns in namespaces:
+            g.bind(prefix, ns, override=True, replace=True)
+        g.addN((nodes[ids[i]], nodes[ids[i + 1]], nodes[ids[i + 2]], g) for i in range(0, len(ids), 3))
+        return g
+
+
+_default_cache: GraphCache | None = None
+
+
+def default_cache() -> GraphCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GraphCache()
+    return _default_cache
+
+
+def load_graph(path: str | os.PathLike, format: str | None = None, public_id: str | None = None):
+    """``rdflib.Graph().parse(path)`` served from the shared cache."""
+    return default_cache().graph(path, format, public_id)
+
+
+def load_triples(path: str | os.PathLike, format: str | None = None,
+                 public_id: str | None = None) -> Iterator[tuple[str, str, str]]:
+    """String triples of *path* served from the shared cache."""
+    return default_cache().triples(path, format, public_id)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""graph_extract.py — single-pass OP2 / DP2 / CLS extraction
+
+Replaces the three SPARQL queries of ``1. Parse (rdf-extraction-to-csv).py``.
+Every triple is visited exactly once to fill a handful of small indexes
+(types, comments, domain, range, subClassOf); the three tables are then
+assembled from those indexes.  Columns and row semantics are the same as the
+original queries:
+
+* **OP2**  ``?predicate a owl:ObjectProperty ; rdfs:domain ?subject ;
+  rdfs:range ?object`` — minus the rows where a direct subclass of
+  ``?subject`` already states ``?predicate ?object`` (the old
+  ``FILTER NOT EXISTS``).
+* **DP2**  ``?dataProperty a owl:DatatypeProperty ; rdfs:domain ?class``.
+* **CLS**  ``?subClass rdfs:subClassOf ?class . ?class a owl:Class``.
+
+Missing comments become empty cells and multiple comments fan out into
+several rows, exactly like the OPTIONAL blocks did.
+"""
+from __future__ import annotations
+import os
+import re
+from collections import defaultdict
+from typing import Iterable
+
+# ─────────────────────────── VOCAB ─────────────────────────────
+RDF_TYPE        = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDFS_COMMENT    = "http://www.w3.org/2000/01/rdf-schema#comment"
+RDFS_LABEL      = "http://www.w3.org/2000/01/rdf-schema#label"
+RDFS_DOMAIN     = "http://www.w3.org/2000/01/rdf-schema#domain"
+RDFS_RANGE      = "http://www.w3.org/2000/01/rdf-schema#range"
+RDFS_SUBCLASSOF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+OWL_CLASS       = "http://www.w3.org/2002/07/owl#Class"
+OWL_OBJECTPROP  = "http://www.w3.org/2002/07/owl#ObjectProperty"
+OWL_DATAPROP    = "http://www.w3.org/2002/07/owl#DatatypeProperty"
+
+# ─────────────────────────── HEADERS ───────────────────────────
+OP_HEADER  = ['subject', 'predicate', 'object', 'subjectComment', 'predicateComment', 'objectComment']
+DP_HEADER  = ['class', 'dataProperty', 'classComment', 'dataPropertyComment']
+CLS_HEADER = ['class', 'subClass', 'classComment', 'subClassComment']
+
+TABLE_FILES = {            # table → file-name template
+    "OP2": "OP2 {tag}.csv",
+    "DP2": "DP2 {tag}.csv",
+    "CLS": "CLS {tag}.csv",
+}
+TABLE_HEADERS = {"OP2": OP_HEADER, "DP2": DP_HEADER, "CLS": CLS_HEADER}
+
+ENTITY_TYPES = {OWL_CLASS: "Class", OWL_OBJECTPROP: "ObjectProperty", OWL_DATAPROP: "DatatypeProperty"}
+
+# columns of each extraction table that name an entity
+ENTITY_COLUMNS = {"OP2": (0, 1, 2), "DP2": (0, 1), "CLS": (0, 1)}
+
+# rdflib blank nodes ("N" + 32 hex) and owlready2 ones ("_:<storid>")
+_BNODE_RE = re.compile(r"N[0-9a-f]{32}|_:.*")
+
+
+def is_blank(term: str) -> bool:
+    return bool(_BNODE_RE.fullmatch(term))
+
+
+class GraphIndex:
+    """Indexes collected in one walk over the triples."""
+
+    def __init__(self):
+        self.types:    dict[str, set[str]]  = defaultdict(set)
+        self.comments: dict[str, list[str]] = defaultdict(list)
+        self.labels:   dict[str, list[str]] = defaultdict(list)
+        self.domains:  dict[str, list[str]] = defaultdict(list)
+        self.ranges:   dict[str, list[str]] = defaultdict(list)
+        self.parents:  dict[str, list[str]] = defaultdict(list)   # subClass → [class]
+        self.children: dict[str, list[str]] = defaultdict(list)   # class → [subClass]
+        self.links:    set[tuple[str, str, str]] = set()          # every other triple
+
+    def add(self, s: str, p: str, o: str) -> None:
+        if p == RDF_TYPE:
+            self.types[s].add(o)
+        elif p == RDFS_COMMENT:
+            if o and o not in self.comments[s]:
+                self.comments[s].append(o)
+        elif p == RDFS_LABEL:
+            if o and o not in self.labels[s]:
+                self.labels[s].append(o)
+        elif p == RDFS_DOMAIN:
+            self.domains[s].append(o)
+        elif p == RDFS_RANGE:
+            self.ranges[s].append(o)
+        elif p == RDFS_SUBCLASSOF:
+            self.parents[s].append(o)
+            self.children[o].append(s)
+        else:
+            self.links.add((s, p, o))
+
+    def comment_options(self, term: str) -> list[str]:
+        """OPTIONAL semantics: one row per comment, or one empty cell."""
+        return self.comments.get(term) or ['']
+
+
+def build_index(triples: Iterable[tuple[str, str, str]]) -> GraphIndex:
+    """Walk ``(s, p, o)`` string triples once and return the filled index."""
+    index = GraphIndex()
+    for s, p, o in triples:
+        index.add(s, p, o)
+    return index
+
+
+def graph_triples(g):
+    """Yield the triples of an rdflib graph as plain strings."""
+    for s, p, o in g:
+        yield str(s), str(p), str(o)
+
+
+def extract_tables(index: GraphIndex) -> dict[str, list[tuple[str, ...]]]:
+    """Assemble the OP2 / DP2 / CLS rows (DISTINCT, first-seen order)."""
+    op_rows:  dict[tuple[str, ...], None] = {}
+    dp_rows:  dict[tuple[str, ...], None] = {}
+    cls_rows: dict[tuple[str, ...], None] = {}
+
+    for prop, types in index.types.items():
+        if OWL_OBJECTPROP in types:
+            for subj in index.domains.get(prop, ()):
+                for obj in index.ranges.get(prop, ()):
+                    # FILTER NOT EXISTS { ?subClass rdfs:subClassOf ?subject .
+                    #                     ?subClass ?predicate ?object }
+                    if any((sub, prop, obj) in index.links for sub in index.children.get(subj, ())):
+                        continue
+                    for sc in index.comment_options(subj):
+                        for pc in index.comment_options(prop):
+                            for oc in index.comment_options(obj):
+                                op_rows[(subj, prop, obj, sc, pc, oc)] = None
+        if OWL_DATAPROP in types:
+            for cls in index.domains.get(prop, ()):
+                for cc in index.comment_options(cls):
+                    for dc in index.comment_options(prop):
+                        dp_rows[(cls, prop, cc, dc)] = None
+
+    for sub, parents in index.parents.items():
+        for cls in parents:
+            if OWL_CLASS not in index.types.get(cls, ()):
+                continue
+            for cc in index.comment_options(cls):
+                for sc in index.comment_options(sub):
+                    cls_rows[(cls, sub, cc, sc)] = None
+
+    return {"OP2": list(op_rows), "DP2": list(dp_rows), "CLS": list(cls_rows)}
+
+
+def extract_graph(g) -> dict[str, list[tuple[str, ...]]]:
+    """Convenience wrapper: rdflib graph → OP2 / DP2 / CLS rows."""
+    return extract_tables(build_index(graph_triples(g)))
+
+
+def write_tables(tables: dict[str, list[tuple[str, ...]]], tag: str, out_dir: str = ".",
+                 formats: tuple[str, ...] = ("csv",)) -> list[str]:
+    """Write ``OP2 <tag>.csv``, ``DP2 <tag>.csv`` and ``CLS <tag>.csv``.
+
+    ``formats`` may add (or replace CSV with) ``parquet`` / ``arrow`` copies,
+    see :mod:`table_io`.
+    """
+    from table_io import with_format, write_records
+    written = []
+    for name, rows in tables.items():
+        base_file = os.path.join(out_dir, TABLE_FILES[name].format(tag=tag))
+        for fmt in formats:
+            output_file = with_format(base_file, fmt)
+            write_records(rows, TABLE_HEADERS[name], output_file)
+            written.append(output_file)
+    return written
+
+
+def write_extraction(index: GraphIndex, tag: str, out_dir: str = ".",
+                     formats: tuple[str, ...] = ("csv",)) -> dict[str, int]:
+    """Write the OP2 / DP2 / CLS tables of *index* plus ``CLS <tag> closure.json``
+    and ``ENT <tag>.csv``; return the row counts."""
+    from class_closure import write_closure
+    from entity_norm import write_entities
+    tables = extract_tables(index)
+    write_tables(tables, tag, out_dir, formats)
+    _, n_classes = write_closure(tables["CLS"], tag, out_dir)
+    _, n_entities = write_entities(index, tables, tag, out_dir, formats)
+    counts = {name: len(rows) for name, rows in tables.items()}
+    counts["closure"] = n_classes
+    counts["ENT"] = n_entities
+    return counts
+
+
+def tag_from_path(rdf_file: str) -> str:
+    """``.../Local OFB.rdf`` → ``OFB`` (nama file tanpa awalan 'Local ')."""
+    stem = os.path.splitext(os.path.basename(rdf_file))[0]
+    return stem[len("Local "):] if stem.startswith("Local ") else stem
+
+
+def extract_file(rdf_file: str, tag: str, out_dir: str = ".", use_cache: bool = True,
+                 formats: tuple[str, ...] = ("csv",), stream: bool = False) -> tuple[str, dict[str, int]]:
+    """Parse one RDF file and write its three CSVs (process-pool worker).
+
+    With ``use_cache`` the triples come from :mod:`graph_cache`, so an
+    unchanged file is not re-parsed on the next run.  With ``stream`` an
+    RDF/XML file is read by :mod:`rdfxml_stream` instead, which skips the
+    individuals of case-bearing files and never holds the whole graph.
+    """
+    if stream:
+        from rdfxml_stream import iter_schema_triples
+        triples = iter_schema_triples(rdf_file)
+    elif use_cache:
+        from graph_cache import load_triples
+        triples = load_triples(rdf_file)
+    else:
+        import rdflib
+        g = rdflib.Graph()
+        g.parse(rdf_file)
+        triples = graph_triples(g)
+    return tag, write_extraction(build_index(triples), tag, out_dir, formats)
+
+
+def extract_world(world_path: str, rdf_files: list[str], tags: list[str], out_dir: str = ".",
+                  formats: tuple[str, ...] = ("csv",)) -> list[tuple[str, dict[str, int]]]:
+    """Extract several files through one persistent owlready2 World.
+
+    Sources already stored with the same content hash are not parsed again;
+    the rows are read straight from the World's SQL tables (see
+    :mod:`quadstore`).  Runs serially — the World is a single SQLite file.
+    """
+    from quadstore import ensure_loaded, open_world, world_triples
+    world = open_world(world_path)
+    results = []
+    try:
+        for rdf_file, tag in zip(rdf_files, tags):
+            onto = ensure_loaded(world, rdf_file)
+            counts = write_extraction(build_index(world_triples(world, onto)), tag, out_dir, formats)
+            results.append((tag, counts))
+        world.save()
+    finally:
+        world.close()
+    return results
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""llm_cache.py — persistent SQLite cache of LLM decisions for the RAG matcher
+
+``3. Semantic Match (run-rag-manual).py`` sends the same prompts again on
+every run: each ``--repr`` and each ``--cardinality_filter`` re-asks the LLM
+questions it has already answered (the cardinality filter is applied *after*
+the LLM).  This module stores every answer in one SQLite file and serves
+repeats from it.
+
+* The key is ``(model name, SHA-256 of the prompt, temperature, max tokens)``
+  — changing any of them asks the model again.
+* Each row keeps the ``label`` / ``score`` of the answer (when the answer is
+  a dict carrying them, or a split tuple — see below) and the raw
+  completion as JSON.  Outputs that are not JSON (NumPy values are
+  converted) are not cached: :meth:`LLMCache.put_many` raises
+  :class:`LLMCacheError`, and the cached LLM warns and returns them uncached.
+* :func:`cached_llm_class` derives a subclass of an ontomap LLM class (e.g.
+  ``RAGBasedOpenAILLMArch``) whose ``generate`` looks every prompt of a batch
+  up first and forwards only the misses to the real ``generate``.
+
+Assumption about ontomap: ``generate(input_data)`` takes a list of prompts
+and returns either one output per prompt (a ``list``) or a tuple of such
+sequences, e.g. ``(texts, probas)``.  Both are stored per prompt — a tuple
+as one ``{"__parts__": [text, proba]}`` record per prompt — so a prompt is
+reused whatever batch it comes back in, and the answer is rebuilt in the
+shape the LLM returned.  Any other output is cached for the call as a whole
+(keyed by all its prompts); if some of that call's prompts were already
+cached, the whole batch is sent once more rather than failing the run.  An
+exception carrying per-prompt ``results`` (see
+:class:`llm_dispatch.LLMBatchError`) still has its successful answers stored
+before it propagates.
+
+The file is ``GENOSIS_LLM_CACHE`` (default: ``.llm_cache.sqlite`` next to
+this module).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Iterable
+
+DEFAULT_CACHE_PATH = Path(os.environ.get("GENOSIS_LLM_CACHE", Path(__file__).resolve().parent / ".llm_cache.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    key         TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    temperature REAL,
+    max_tokens  INTEGER,
+    label       TEXT,
+    score       REAL,
+    completion  TEXT NOT NULL,
+    created     REAL NOT NULL
+)
+"""
+
+
+def prompt_hash(prompt: Any) -> str:
+    """SHA-256 of a prompt (strings as is, anything else as sorted JSON)."""
+    text = prompt if isinstance(prompt, str) else json.dumps(prompt, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def decision_key(model: str, phash: str, temperature: float | None, max_tokens: int | None) -> str:
+    return f"{model}\0{phash}\0{temperature}\0{max_tokens}"
+
+
+class LLMCacheError(RuntimeError):
+    pass
+
+
+PARTS = "__parts__"      # per-prompt record of a tuple output such as (texts, probas)
+
+
+def _label_score(output: Any) -> tuple[str | None, float | None]:
+    if isinstance(output, dict):
+        if PARTS in output:
+            parts = output[PARTS]
+            label, score = (parts + [None, None])[:2]
+        else:
+            label, score = output.get("label"), output.get("score")
+        try:
+            score = None if score is None else float(score)
+        except (TypeError, ValueError):
+            score = None
+        return (None if label is None else str(label)), score
+    return None, None
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "tolist"):                       # NumPy scalars / arrays
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} tidak bisa disimpan sebagai JSON")
+
+
+def encode_completion(output: Any) -> str:
+    """JSON of *output*; :class:`LLMCacheError` when it would not round-trip."""
+    try:
+        return json.dumps(output, ensure_ascii=False, default=_json_default, allow_nan=False)
+    except (TypeError, ValueError) as e:
+        raise LLMCacheError(f"Output LLM tidak di-cache: {e}") from e
+
+
+def split_outputs(outputs: Any, n: int) -> list | None:
+    """Per-prompt records of a ``generate`` output for *n* prompts, ``None`` if it has no such shape."""
+    if isinstance(outputs, list):
+        return outputs if len(outputs) == n else None
+    if (isinstance(outputs, tuple) and outputs
+            and all(hasattr(part, "__len__") and not isinstance(part, (str, bytes, dict)) and len(part) == n
+                    for part in outputs)):                  # lists, tuples, NumPy arrays
+        return [{PARTS: list(parts)} for parts in zip(*outputs)]
+    return None
+
+
+def join_outputs(records: list) -> Any:
+    """Inverse of :func:`split_outputs`; ``None`` when list and tuple records are mixed."""
+    split = [isinstance(r, dict) and PARTS in r for r in records]
+    if not any(split):
+        return list(records)
+    if not all(split) or len({len(r[PARTS]) for r in records}) != 1:
+        return None
+    return tuple(list(part) for part in zip(*(r[PARTS] for r in records)))
+
+
+class LLMCache:
+    """SQLite-backed ``key → completion`` store with hit / miss counters."""
+
+    def __init__(self, path: str | os.PathLike = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """``{key: completion}`` of the keys that are cached."""
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, Any] = {}
+        for start in range(0, len(keys), 500):                 # SQLite variable limit
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, completion FROM decisions WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((key, json.loads(completion)) for key, completion in rows)
+        return found
+
+    def put_many(self, entries: Iterable[tuple[str, str, str, float | None, int | None, Any]]) -> None:
+        """Store ``(key, model, prompt_hash, temperature, max_tokens, completion)`` rows.
+
+        Raises :class:`LLMCacheError` (storing nothing) when a completion is not JSON.
+        """
+        now = time.time()
+        rows = []
+        for key, model, phash, temperature, max_tokens, output in entries:
+            label, score = _label_score(output)
+            rows.append((key, model, phash, temperature, max_tokens, label, score, encode_completion(output), now))
+        self.conn.executemany("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def summary(self) -> str:
+        rejected = f", {self.rejected} tidak di-cache" if self.rejected else ""
+        return f"{self.hits} hit, {self.misses} miss{rejected}, {len(self):,} entri di {self.path}"
+
+
+def cached_llm_class(base: type, cache: LLMCache) -> type:
+    """Subclass of the ontomap LLM class *base* whose ``generate`` goes through *cache*."""
+
+    class CachedLLM(base):
+        llm_cache = cache
+
+        def __init__(self, **kwargs):
+            self._cache_model = str(kwargs.get("model_name") or kwargs.get("path") or base.__name__)
+            self._cache_temperature = kwargs.get("temperature")
+            self._cache_max_tokens = kwargs.get("max_token_length")
+            super().__init__(**kwargs)
+
+        def _key(self, phash: str) -> str:
+            return decision_key(self._cache_model, phash, self._cache_temperature, self._cache_max_tokens)
+
+        def _entry(self, phash: str, output: Any) -> tuple:
+            return (self._key(phash), self._cache_model, phash, self._cache_temperature,
+                    self._cache_max_tokens, output)
+
+        def _store(self, entries: Iterable[tuple]) -> None:
+            keep = []
+            for entry in entries:
+                try:
+                    encode_completion(entry[-1])
+                except LLMCacheError as e:
+                    self.llm_cache.rejected += 1
+                    warnings.warn(str(e), RuntimeWarning, stacklevel=3)
+                    continue
+                keep.append(entry)
+            self.llm_cache.put_many(keep)
+
+        def generate(self, input_data, *args, **kwargs):
+            batch = list(input_data) if isinstance(input_data, (list, tuple)) else [input_data]
+            whole = prompt_hash(batch)
+            found = self.llm_cache.get_many([self._key(whole)])
+            if found:                                       # call-level entry (see below)
+                self.llm_cache.hits += len(batch)
+                return found[self._key(whole)]
+            if not isinstance(input_data, (list, tuple)):
+                self.llm_cache.misses += 1
+                return self._store_whole(whole, super().generate(input_data, *args, **kwargs))
+
+            hashes = [prompt_hash(p) for p in batch]
+            found = self.llm_cache.get_many(self._key(h) for h in hashes)
+            missing = [i for i, h in enumerate(hashes) if self._key(h) not in found]
+            self.llm_cache.hits += len(batch) - len(missing)
+            self.llm_cache.misses += len(missing)
+            if missing:
+                try:
+                    outputs = super().generate([batch[i] for i in missing], *args, **kwargs)
+                except Exception as e:
+                    # keep the answers that did come back (llm_dispatch.LLMBatchError)
+                    done = getattr(e, "results", None) or {}
+                    self._store(self._entry(hashes[missing[k]], out) for k, out in done.items())
+                    raise
+                records = split_outputs(outputs, len(missing))
+                if records is None:
+                    # not per prompt: cache the call as a whole
+                    if len(missing) == len(batch):
+                        return self._store_whole(whole, outputs)
+                    return self._regenerate(batch, hashes, len(missing), *args, **kwargs)
+                self._store(self._entry(hashes[i], out) for i, out in zip(missing, records))
+                for i, out in zip(missing, records):
+                    found[self._key(hashes[i])] = out
+            joined = join_outputs([found[self._key(h)] for h in hashes])
+            if joined is None:                              # cached in different shapes
+                return self._regenerate(batch, hashes, len(missing), *args, **kwargs)
+            return joined
+
+        def _regenerate(self, batch: list, hashes: list[str], asked: int, *args, **kwargs) -> Any:
+            """The cached answers cannot be merged with the new ones: ask for the whole batch once."""
+            self.llm_cache.hits -= len(batch) - asked
+            self.llm_cache.misses += len(batch) - asked
+            outputs = super().generate(batch, *args, **kwargs)
+            records = split_outputs(outputs, len(batch))
+            if records is None:
+                return self._store_whole(prompt_hash(batch), outputs)
+            self._store(self._entry(h, out) for h, out in zip(hashes, records))
+            return outputs
+
+        def _store_whole(self, phash: str, output: Any) -> Any:
+            self._store([self._entry(phash, output)])
+            return output
+
+    CachedLLM.__name__ = f"Cached{base.__name__}"
+    CachedLLM.__qualname__ = CachedLLM.__name__
+    return CachedLLM
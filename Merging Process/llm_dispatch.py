@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""llm_dispatch.py — concurrent OpenAI-compatible LLM calls with token buckets
+
+The RAG runner sent one prompt at a time and slept ``--sleep`` seconds after
+every call, whether the provider needed the pause or not.  This module keeps
+several requests in flight instead and only slows down when the limits say so:
+
+* at most ``max_in_flight`` requests run at once (``asyncio.Semaphore``);
+* two token buckets — requests/min and tokens/min (prompt length / 4 +
+  ``max_tokens`` as the estimate) — refill continuously; a request waits
+  only until both buckets can pay for it;
+* a ``429`` (or ``5xx``) pauses *all* requests for ``Retry-After`` seconds,
+  or an exponentially growing delay with jitter, then retries;
+* :meth:`AsyncLLMClient.complete_all` returns the completions in prompt
+  order, however the requests finished.  A prompt that still fails after
+  its retries does not discard the others: :class:`LLMBatchError` carries
+  the responses that succeeded next to the per-prompt errors.
+
+Responses are :class:`ChatCompletion` objects — the JSON body with
+attribute access, the shape the ``openai`` SDK returns to the synchronous
+client (``r.choices[0].message.content``,
+``r.choices[0].logprobs.content[0].top_logprobs``).  ``logprobs`` are
+requested (``top_logprobs`` alternatives per token) unless turned off.
+
+HTTP is plain ``urllib`` in worker threads, so any OpenAI-compatible
+``/chat/completions`` endpoint works — including a local stub server for
+tests (``base_url="http://127.0.0.1:8000/v1"``).
+
+:func:`async_llm_class` plugs the client into an ontomap LLM class (e.g.
+``RAGBasedOpenAILLMArch``): its ``generate`` sends the whole batch
+concurrently.  Assumption about ontomap: ``generate(input_data)`` receives a
+list of prompt strings (anything else raises ``TypeError`` rather than
+silently losing the rate limits); the list of completions is passed through
+the class's ``post_processor`` when it has one.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from typing import Any
+
+DEFAULT_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+DEFAULT_TOP_LOGPROBS = 5
+MAX_RETRIES = 6
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Continuously refilled bucket of ``rate_per_min`` units (burst = one minute)."""
+
+    def __init__(self, rate_per_min: float, capacity: float | None = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)            # an oversized request still gets through
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+
+class LLMRequestError(RuntimeError):
+    pass
+
+
+class LLMBatchError(LLMRequestError):
+    """Some prompts of a batch failed; ``results`` holds the others by prompt index."""
+
+    def __init__(self, results: dict[int, Any], errors: dict[int, BaseException]):
+        self.results = results
+        self.errors = errors
+        first = errors[min(errors)]
+        super().__init__(f"{len(errors)} dari {len(results) + len(errors)} prompt gagal (mis. {first})")
+
+
+class ChatCompletion(dict):
+    """Chat-completion JSON with attribute access (like the ``openai`` SDK object).
+
+    Missing optional fields read as ``None``; ``model_dump()`` gives the plain dict.
+    """
+
+    def __init__(self, data: dict):
+        super().__init__({key: _wrap(value) for key, value in data.items()})
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.get(name)
+
+    def model_dump(self) -> dict:
+        return json.loads(json.dumps(self))
+
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return ChatCompletion(value)
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return value
+
+
+class AsyncLLMClient:
+    """OpenAI-compatible chat client: bounded concurrency, rate limits, 429 back-off."""
+
+    def __init__(self, model: str, base_url: str = DEFAULT_BASE_URL, api_key: str | None = None,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM,
+                 temperature: float = 0.0, max_tokens: int = 150, timeout: float = 120.0,
+                 max_retries: int = MAX_RETRIES, logprobs: bool = True,
+                 top_logprobs: int | None = DEFAULT_TOP_LOGPROBS, extra: dict | None = None):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        self.max_in_flight = max_in_flight
+        self.rpm, self.tpm = rpm, tpm
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.logprobs = logprobs
+        self.top_logprobs = top_logprobs
+        self.extra = extra or {}
+        self.requests = 0
+        self.retries = 0
+
+    # ───────────────────────── HTTP ─────────────────────────────
+    def _post(self, prompt: str) -> ChatCompletion:
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}],
+                "temperature": self.temperature, "max_tokens": self.max_tokens}
+        if self.logprobs:
+            body["logprobs"] = True
+            if self.top_logprobs:
+                body["top_logprobs"] = self.top_logprobs
+        body.update(self.extra)
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"), method="POST",
+                                         headers={"Content-Type": "application/json",
+                                                  "Authorization": f"Bearer {self.api_key}"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return ChatCompletion(json.loads(response.read().decode("utf-8")))
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        return len(prompt) // 4 + self.max_tokens
+
+    # ───────────────────────── dispatch ─────────────────────────
+    async def _complete(self, prompt: str, state: dict) -> ChatCompletion:
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            async with state["slots"]:
+                wait = state["paused_until"] - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                await state["requests"].acquire(1)
+                await state["tokens"].acquire(self._estimate_tokens(prompt))
+                try:
+                    self.requests += 1
+                    return await asyncio.to_thread(self._post, prompt)
+                except urllib.error.HTTPError as e:
+                    if e.code not in RETRY_STATUS or attempt == self.max_retries:
+                        raise LLMRequestError(f"HTTP {e.code} dari {self.url}: {e.reason}") from e
+                    retry_after = e.headers.get("Retry-After") if e.headers else None
+                    try:
+                        pause = float(retry_after)
+                    except (TypeError, ValueError):
+                        pause = delay * (1 + random.random())
+                    delay = min(delay * 2, 60.0)
+                except urllib.error.URLError as e:
+                    if attempt == self.max_retries:
+                        raise LLMRequestError(f"Gagal menghubungi {self.url}: {e.reason}") from e
+                    pause = delay * (1 + random.random())
+                    delay = min(delay * 2, 60.0)
+            self.retries += 1
+            # everybody waits, not just this request: the limit is per account
+            state["paused_until"] = max(state["paused_until"], time.monotonic() + pause)
+        raise LLMRequestError("unreachable")
+
+    async def complete_all_async(self, prompts: list[str]) -> list[ChatCompletion | BaseException]:
+        state = {
+            "slots": asyncio.Semaphore(self.max_in_flight),
+            "requests": TokenBucket(self.rpm),
+            "tokens": TokenBucket(self.tpm),
+            "paused_until": 0.0,
+        }
+        return list(await asyncio.gather(*(self._complete(p, state) for p in prompts), return_exceptions=True))
+
+    def complete_all(self, prompts: list[str]) -> list[ChatCompletion]:
+        """Chat-completion responses of *prompts*, in the same order.
+
+        Raises :class:`LLMBatchError` (with the successful responses) when
+        any prompt failed.
+        """
+        outcomes = asyncio.run(self.complete_all_async(list(prompts)))
+        errors = {i: r for i, r in enumerate(outcomes) if isinstance(r, BaseException)}
+        if errors:
+            raise LLMBatchError({i: r for i, r in enumerate(outcomes) if i not in errors}, errors)
+        return outcomes
+
+    @staticmethod
+    def text(response: dict) -> str:
+        return response["choices"][0]["message"]["content"]
+
+
+def async_llm_class(base: type, **client_kwargs) -> type:
+    """Subclass of the ontomap LLM class *base* whose ``generate`` dispatches concurrently."""
+
+    class AsyncLLM(base):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.client = AsyncLLMClient(
+                model=str(kwargs.get("model_name") or kwargs.get("path")),
+                temperature=kwargs.get("temperature", 0.0),
+                max_tokens=kwargs.get("max_token_length", 150),
+                **{"top_logprobs": kwargs["top_logprobs"]} if "top_logprobs" in kwargs else {},
+                **client_kwargs)
+
+        def _process(self, responses: list) -> Any:
+            return self.post_processor(responses) if hasattr(self, "post_processor") else responses
+
+        def generate(self, input_data, *args, **kwargs) -> Any:
+            if not isinstance(input_data, (list, tuple)) or not all(isinstance(p, str) for p in input_data):
+                raise TypeError(f"{type(self).__name__}.generate butuh list prompt string, "
+                                f"bukan {type(input_data).__name__}")
+            try:
+                return self._process(self.client.complete_all(list(input_data)))
+            except LLMBatchError as e:
+                # post-process what succeeded, so callers (e.g. the LLM cache) can keep it
+                done = sorted(e.results)
+                outputs = self._process([e.results[i] for i in done]) if done else []
+                # only a list is one output per prompt; a tuple is e.g. (texts, probas)
+                if isinstance(outputs, list) and len(outputs) == len(done):
+                    e.results = dict(zip(done, outputs))
+                else:
+                    e.results = {}
+                raise
+
+    AsyncLLM.__name__ = f"Async{base.__name__}"
+    AsyncLLM.__qualname__ = AsyncLLM.__name__
+    return AsyncLLM
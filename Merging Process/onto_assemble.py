@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""onto_assemble.py — assemble a modular ontology from its catalog-v001.xml
+
+The local ontologies are kept as module files (``OFB/ofb-user.rdf``,
+``ofb-content.rdf``, ``OSN/groups.rdf``, …) next to a Protégé
+``catalog-v001.xml``, and were combined by hand into ``*-complete.rdf``.
+This script does the combining:
+
+1. the catalog is read — ``<uri name=… uri=…/>`` entries map ontology IRIs to
+   files, ``Folder Repository`` groups contribute every ``.rdf`` / ``.owl`` /
+   ``.ttl`` file of their directory;
+2. the modules (given on the command line, or the whole repository minus
+   ``--exclude`` patterns) are parsed in parallel worker processes through
+   :mod:`graph_cache`, so a module whose bytes did not change is never
+   re-parsed — editing one module only re-parses that module;
+3. ``owl:imports`` of the loaded modules are resolved through the catalog and
+   loaded in the next wave, until nothing new is imported;
+4. the union is written as one RDF file (``--output``) and/or extracted
+   straight into ``OP2/DP2/CLS <tag>.csv`` (``--tag``).
+
+All modules are parsed against one shared base IRI (default
+``http://www.w3.org/2002/07/owl``, the ``xml:base`` of the complete files),
+because the module files use relative ``#Name`` IRIs without an ``xml:base``.
+
+Usage::
+
+    python onto_assemble.py --catalog "../Local Ontology/OFB/catalog-v001.xml" \\
+        --exclude "*complete*" "*case*" --output "ofb-assembled.rdf" --tag OFB
+"""
+from __future__ import annotations
+import argparse
+import fnmatch
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+from graph_cache import default_cache, entry_key
+from graph_extract import build_index, write_extraction
+
+DEFAULT_BASE_IRI = "http://www.w3.org/2002/07/owl"
+DEFAULT_EXCLUDE = ["*complete*"]
+MODULE_EXTS = (".rdf", ".owl", ".ttl")
+
+OWL_IMPORTS = "http://www.w3.org/2002/07/owl#imports"
+CATALOG_NS = "{urn:oasis:names:tc:entity:xmlns:xml:catalog}"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+RDF_FORMATS = {".rdf": "xml", ".owl": "xml", ".ttl": "turtle", ".nt": "nt"}
+
+
+# ───────────────────────── catalog ────────────────────────────
+class Catalog:
+    """IRI → file map and module files of a Protégé ``catalog-v001.xml``."""
+
+    def __init__(self, catalog_path: str | os.PathLike | None = None):
+        self.uris: dict[str, Path] = {}
+        self.files: list[Path] = []
+        if catalog_path:
+            self._read(Path(catalog_path))
+
+    def _read(self, path: Path) -> None:
+        root_dir = path.resolve().parent
+        for elem in ET.parse(path).getroot().iter():
+            base = root_dir / elem.attrib.get(XML_BASE, "")
+            if elem.tag == CATALOG_NS + "uri" and "name" in elem.attrib:
+                self.uris[elem.attrib["name"]] = (base / elem.attrib["uri"]).resolve()
+            elif elem.tag == CATALOG_NS + "group" and elem.attrib.get("id", "").startswith("Folder Repository"):
+                options = dict(re.findall(r"(\w[\w-]*)=([^,]*)", elem.attrib["id"]))
+                directory = (base / options.get("directory", "").strip()).resolve()
+                pattern = "**/*" if options.get("recursive", "").strip() == "true" else "*"
+                self.files.extend(sorted(p for p in directory.glob(pattern)
+                                         if p.is_file() and p.suffix.lower() in MODULE_EXTS))
+
+    def modules(self, exclude: list[str] = ()) -> list[Path]:
+        return [p for p in self.files if not any(fnmatch.fnmatch(p.name, pat) for pat in exclude)]
+
+    def resolve(self, iri: str) -> Path | None:
+        """File for an ``owl:imports`` IRI: catalog entry, local file, or same-named module."""
+        if iri in self.uris:
+            return self.uris[iri]
+        if iri.startswith("file:"):
+            from urllib.parse import unquote, urlparse
+            local = Path(unquote(urlparse(iri).path))
+            return local if local.exists() else None
+        name = iri.rstrip("/#").rsplit("/", 1)[-1]
+        stem = os.path.splitext(name)[0]
+        return next((p for p in self.files if p.name == name or p.stem == stem), None)
+
+
+# ───────────────────────── loading ────────────────────────────
+def _parse_module(path: str, public_id: str) -> str:
+    """Process-pool worker: parse one module into the shared graph cache."""
+    default_cache().load_entry(path, public_id=public_id)
+    return path
+
+
+def _is_cached(path: Path, public_id: str) -> bool:
+    return default_cache().entry_path(entry_key(path, public_id)).exists()
+
+
+def load_modules(modules: list[Path], catalog: Catalog, base_iri: str = DEFAULT_BASE_IRI,
+                 workers: int | None = None) -> tuple[dict[Path, tuple], list[Path], list[str]]:
+    """Load *modules* and everything they import.
+
+    Returns ``({path: (terms, ids)}, parsed, unresolved_imports)``; the entries
+    are the :class:`graph_cache.GraphCache` form of each module and ``parsed``
+    lists the modules that were not in the cache yet.
+    """
+    cache = default_cache()
+    loaded: dict[Path, tuple] = {}
+    parsed: list[Path] = []
+    unresolved: list[str] = []
+    wave = list(dict.fromkeys(p.resolve() for p in modules))
+    while wave:
+        pending = [p for p in wave if not _is_cached(p, base_iri)]
+        parsed += pending
+        if pending:
+            n = workers or min(len(pending), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=n) as pool:
+                futures = {pool.submit(_parse_module, str(p), base_iri): p for p in pending}
+                for fut in as_completed(futures):
+                    fut.result()
+        imports: list[str] = []
+        for p in wave:
+            terms, ids = loaded[p] = cache.load_entry(p, public_id=base_iri)
+            imports += [terms[ids[i + 2]][1] for i in range(0, len(ids), 3)
+                        if terms[ids[i + 1]][1] == OWL_IMPORTS]
+        wave = []
+        for iri in dict.fromkeys(imports):
+            target = catalog.resolve(iri)
+            if target is None:
+                unresolved.append(iri)
+            elif target.resolve() not in loaded and target.resolve() not in wave:
+                wave.append(target.resolve())
+    return loaded, parsed, unresolved
+
+
+def assembled_triples(loaded: dict[Path, tuple]) -> Iterator[tuple[str, str, str]]:
+    """Union of the module triples as plain strings (duplicates dropped)."""
+    seen: set[tuple[str, str, str]] = set()
+    for terms, ids in loaded.values():
+        text = [t[1] for t in terms]
+        for i in range(0, len(ids), 3):
+            triple = (text[ids[i]], text[ids[i + 1]], text[ids[i + 2]])
+            if triple not in seen:
+                seen.add(triple)
+                yield triple
+
+
+def assembled_graph(loaded: dict[Path, tuple], base_iri: str = DEFAULT_BASE_IRI):
+    """Union of the modules as one rdflib Graph (served from the cache)."""
+    import rdflib
+    cache = default_cache()
+    g = rdflib.Graph()
+    for path in loaded:
+        g += cache.graph(path, public_id=base_iri)
+    return g
+
+
+def main(args):
+    start_time = time.time()
+    catalog = Catalog(args.catalog)
+    modules = [Path(m) for m in args.modules] or catalog.modules(args.exclude)
+    if not modules:
+        print("Error: tidak ada modul (beri file modul atau --catalog dengan Folder Repository).")
+        sys.exit(1)
+
+    print(f"Merakit {len(modules)} modul (base IRI: {args.base_iri}) …")
+    loaded, parsed, unresolved = load_modules(modules, catalog, args.base_iri, args.workers)
+    for path, (_, ids) in loaded.items():
+        print(f"  • {path.name}: {len(ids) // 3:,} triple{' (parse)' if path in parsed else ''}")
+    for iri in unresolved:
+        print(f"  ✘ owl:imports tidak ditemukan di katalog: {iri}")
+    print(f"Modul di-parse: {len(parsed)}, dari cache: {len(loaded) - len(parsed)}")
+
+    if args.output:
+        g = assembled_graph(loaded, args.base_iri)
+        fmt = RDF_FORMATS.get(os.path.splitext(args.output)[1].lower(), "xml")
+        g.serialize(destination=args.output, format=fmt)
+        print(f"✔ Ontologi gabungan ({len(g):,} triple) disimpan ke: {args.output}")
+    if args.tag:
+        os.makedirs(args.out_dir, exist_ok=True)
+        counts = write_extraction(build_index(assembled_triples(loaded)), args.tag, args.out_dir, tuple(args.formats))
+        summary = ", ".join(f"{name} {n:,}" for name, n in counts.items())
+        print(f"✔ Ekstraksi {args.tag}: {summary}")
+
+    print(f"\nPerakitan selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rakit ontologi modular dari catalog-v001.xml (parse paralel + cache per modul)")
+    parser.add_argument("modules", nargs="*", help="File modul (default: semua file di Folder Repository katalog)")
+    parser.add_argument("--catalog", type=str, default=None, help="Path catalog-v001.xml")
+    parser.add_argument("--exclude", nargs="*", default=DEFAULT_EXCLUDE, help="Pola nama file yang dilewati saat memakai katalog (default: *complete*)")
+    parser.add_argument("--base_iri", type=str, default=DEFAULT_BASE_IRI, help="Base IRI bersama untuk IRI relatif (#Nama) di modul")
+    parser.add_argument("--output", type=str, default=None, help="File RDF gabungan (.rdf/.owl/.ttl/.nt)")
+    parser.add_argument("--tag", type=str, default=None, help="Jika diisi, langsung tulis OP2/DP2/CLS <tag>.csv dari hasil gabungan")
+    parser.add_argument("--out_dir", type=str, default=".", help="Direktori output ekstraksi")
+    parser.add_argument("--formats", nargs="+", default=["csv"], choices=["csv", "parquet", "arrow"], help="Format output ekstraksi")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses parse (default: min(modul belum ter-cache, CPU))")
+    main(parser.parse_args())
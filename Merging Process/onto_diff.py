@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""onto_diff.py — entity-level diff between two versions of an ontology
+
+Fingerprints every named class, object property and datatype property of two
+ontology versions (e.g. ``V2-OSN/completev2.rdf`` → ``V3-OSN/completev3.rdf``)
+and reports which entities were **added**, **removed** or **changed**.  A
+fingerprint covers everything the extraction step emits for an entity:
+its OWL types, comments, domain, range and direct superclasses.
+
+Besides the change report, the script writes *delta* extraction tables —
+``OP2 <tag> delta.csv``, ``DP2 <tag> delta.csv`` and ``CLS <tag> delta.csv`` —
+holding only the rows of the new version that mention an added or changed
+entity.  They keep the normal OP2 / DP2 / CLS columns, so the string matchers
+can be pointed at them unchanged.
+
+Usage::
+
+    python onto_diff.py "V2-OSN/completev2.rdf" "V3-OSN/completev3.rdf" --tag OSN \\
+        --base_iri "http://www.w3.org/2002/07/owl"
+
+``--base_iri`` matters for module files without ``xml:base``: relative IRIs
+(``#User``) would otherwise resolve against each file's own path and every
+entity would look renamed.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import hashlib
+import os
+import time
+
+from graph_cache import load_triples
+from graph_extract import (ENTITY_COLUMNS, ENTITY_TYPES, GraphIndex, build_index, extract_tables,
+                           is_blank, write_tables)
+
+CHANGES_HEADER = ['entity', 'type', 'status', 'changedFields', 'oldFingerprint', 'newFingerprint']
+
+
+def _stable(term: str) -> str:
+    # blank-node labels differ per parse
+    return "[]" if is_blank(term) else term
+
+
+def entity_fields(index: GraphIndex, entity: str) -> dict[str, tuple[str, ...]]:
+    """Per-field, order-independent description of one entity."""
+    return {
+        "type":       tuple(sorted(index.types.get(entity, ()))),
+        "comment":    tuple(sorted(index.comments.get(entity, ()))),
+        "domain":     tuple(sorted(_stable(t) for t in index.domains.get(entity, ()))),
+        "range":      tuple(sorted(_stable(t) for t in index.ranges.get(entity, ()))),
+        "subClassOf": tuple(sorted(_stable(t) for t in index.parents.get(entity, ()))),
+    }
+
+
+def fingerprint(fields: dict[str, tuple[str, ...]]) -> str:
+    h = hashlib.sha1()
+    for name in sorted(fields):
+        h.update(name.encode("utf-8") + b"\0")
+        for value in fields[name]:
+            h.update(value.encode("utf-8") + b"\x1f")
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def entity_fingerprints(index: GraphIndex) -> dict[str, tuple[str, str, dict]]:
+    """entity IRI → (type label, fingerprint, fields) for named entities."""
+    result = {}
+    for entity, types in index.types.items():
+        if is_blank(entity):
+            continue
+        kind = next((label for t, label in ENTITY_TYPES.items() if t in types), None)
+        if kind is None:
+            continue
+        fields = entity_fields(index, entity)
+        result[entity] = (kind, fingerprint(fields), fields)
+    return result
+
+
+def diff_entities(old: dict[str, tuple], new: dict[str, tuple]) -> list[list[str]]:
+    """Rows of the change report (added / removed / changed only)."""
+    rows = []
+    for entity in sorted(new.keys() - old.keys()):
+        kind, fp, _ = new[entity]
+        rows.append([entity, kind, "added", "", "", fp])
+    for entity in sorted(old.keys() - new.keys()):
+        kind, fp, _ = old[entity]
+        rows.append([entity, kind, "removed", "", fp, ""])
+    for entity in sorted(old.keys() & new.keys()):
+        (_, old_fp, old_fields), (kind, new_fp, new_fields) = old[entity], new[entity]
+        if old_fp != new_fp:
+            changed = [f for f in new_fields if old_fields.get(f) != new_fields[f]]
+            rows.append([entity, kind, "changed", ";".join(changed), old_fp, new_fp])
+    return rows
+
+
+def delta_tables(tables: dict[str, list[tuple[str, ...]]], touched: set[str]) -> dict[str, list[tuple[str, ...]]]:
+    """Keep only the rows that mention at least one touched entity."""
+    return {name: [row for row in rows if any(row[i] in touched for i in ENTITY_COLUMNS[name])]
+            for name, rows in tables.items()}
+
+
+def main(args):
+    start_time = time.time()
+    print(f"Memuat versi lama: {args.old_rdf}")
+    old_index = build_index(load_triples(args.old_rdf, public_id=args.base_iri))
+    print(f"Memuat versi baru: {args.new_rdf}")
+    new_index = build_index(load_triples(args.new_rdf, public_id=args.base_iri))
+
+    old_fps = entity_fingerprints(old_index)
+    new_fps = entity_fingerprints(new_index)
+    changes = diff_entities(old_fps, new_fps)
+
+    counts = {status: sum(1 for r in changes if r[2] == status) for status in ("added", "removed", "changed")}
+    print(f"Entitas: {len(old_fps):,} → {len(new_fps):,} | "
+          f"added {counts['added']:,}, removed {counts['removed']:,}, changed {counts['changed']:,}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    changes_file = os.path.join(args.out_dir, f"CHANGES {args.tag}.csv")
+    with open(changes_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CHANGES_HEADER)
+        writer.writerows(changes)
+    print(f"Laporan perubahan disimpan ke: {changes_file}")
+
+    touched = {r[0] for r in changes if r[2] in ("added", "changed")}
+    deltas = delta_tables(extract_tables(new_index), touched)
+    written = write_tables(deltas, f"{args.tag} delta", args.out_dir)
+    for path, (name, rows) in zip(written, deltas.items()):
+        print(f"  • {name}: {len(rows):,} baris → {path}")
+
+    print(f"\nDiff selesai dalam {time.time() - start_time:.2f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff entitas antara dua versi ontologi + delta CSV untuk ekstraksi inkremental")
+    parser.add_argument("old_rdf", help="File RDF versi lama")
+    parser.add_argument("new_rdf", help="File RDF versi baru")
+    parser.add_argument("--tag", type=str, required=True, help="Tag ontologi untuk nama output (misal OSN)")
+    parser.add_argument("--base_iri", type=str, default=None, help="Base IRI bersama untuk file tanpa xml:base")
+    parser.add_argument("--out_dir", type=str, default=".", help="Direktori output")
+    main(parser.parse_args())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""quadstore.py — one persistent owlready2 World shared by all stages
+
+By default each stage builds its own in-memory ``World()`` and parses the four
+local ontologies (and GENOSIS) again.  With a shared World file the sources
+are parsed into the owlready2 SQLite quadstore once per *content version*:
+
+* :func:`ensure_loaded` records the SHA-256 of every source it loads in a
+  ``genosis_sources`` table inside the World file.  If the bytes are
+  unchanged, the already-stored ontology is returned without parsing; if they
+  changed, the old copy is destroyed and the file re-loaded.
+* :func:`world_triples` reads an ontology straight from the ``objs`` /
+  ``datas`` tables, so extraction can run on the World without rdflib.
+* :func:`snapshot_world` opens a throw-away copy of the World file, for
+  stages such as the HermiT consistency checks that write inferred facts;
+  it is a context manager that closes and deletes the copy on exit.
+
+Set ``GENOSIS_WORLD`` (or pass a path) to enable the shared World.
+"""
+from __future__ import annotations
+import codecs
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator
+
+from owlready2 import World  # type: ignore
+
+from graph_cache import file_digest
+
+DEFAULT_WORLD_PATH = os.environ.get("GENOSIS_WORLD")
+
+# ─────────────────── helper : load with BOM sniff ─────────────
+BOMS = [codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE,
+        codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE]
+
+
+def load_ontology(world: World, path: str):
+    """Robust loader — detect BOM & syntax (RDF/XML, Turtle, N‑Triples)."""
+    raw = Path(path).read_bytes()
+    for b in BOMS:
+        if raw.startswith(b):
+            raw = raw[len(b):]
+            break
+    fmt = (
+        "rdfxml" if raw.lstrip()[:1] == b"<" else
+        "turtle"  if re.search(rb"@prefix|PREFIX", raw[:200], re.I) else
+        "ntriples"
+    )
+    return world.get_ontology(path).load(fileobj=BytesIO(raw), format=fmt)
+
+
+# ───────────────────────── world ──────────────────────────────
+def open_world(path: str | os.PathLike | None = DEFAULT_WORLD_PATH) -> World:
+    """Persistent World at *path*, or an in-memory one when *path* is None."""
+    if not path:
+        return World()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return World(filename=str(path), exclusive=False)
+
+
+@contextmanager
+def snapshot_world(path: str | os.PathLike) -> Iterator[World]:
+    """Temporary copy of a World file (safe for reasoners to write), deleted on exit."""
+    fd, copy = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(fd)
+    world = None
+    try:
+        shutil.copyfile(path, copy)
+        world = World(filename=copy, exclusive=False)
+        yield world
+    finally:
+        if world is not None:
+            world.close()
+        os.unlink(copy)
+
+
+def _sources_table(world: World):
+    db = world.graph.db
+    db.execute("CREATE TABLE IF NOT EXISTS genosis_sources "
+               "(path TEXT PRIMARY KEY, digest TEXT, ontology_iri TEXT)")
+    return db
+
+
+def ensure_loaded(world: World, path: str):
+    """Load *path* into *world* unless the same content is already there."""
+    db = _sources_table(world)
+    key = str(Path(path).resolve())
+    digest = file_digest(path)
+    row = db.execute("SELECT digest, ontology_iri FROM genosis_sources WHERE path = ?", (key,)).fetchone()
+    if row:
+        stored_digest, iri = row
+        onto = world.ontologies.get(iri)
+        if onto is not None and stored_digest == digest:
+            onto.loaded = True          # already in the quadstore, skip parsing
+            return onto
+        if onto is not None:
+            onto.destroy()              # stale content version
+    onto = load_ontology(world, path)
+    db.execute("INSERT OR REPLACE INTO genosis_sources (path, digest, ontology_iri) VALUES (?, ?, ?)",
+               (key, digest, onto.base_iri))
+    return onto
+
+
+# ─────────────────────── SQL extraction ────────────────────────
+_TRIPLES_SQL = """
+SELECT COALESCE(rs.iri, '_:' || q.s), rp.iri, COALESCE(ro.iri, '_:' || q.o)
+  FROM objs q
+  LEFT JOIN resources rs ON rs.storid = q.s
+  LEFT JOIN resources rp ON rp.storid = q.p
+  LEFT JOIN resources ro ON ro.storid = q.o
+ WHERE q.c = ?
+UNION ALL
+SELECT COALESCE(rs.iri, '_:' || q.s), rp.iri, q.o
+  FROM datas q
+  LEFT JOIN resources rs ON rs.storid = q.s
+  LEFT JOIN resources rp ON rp.storid = q.p
+ WHERE q.c = ?
+"""
+
+
+def world_triples(world: World, onto) -> Iterator[tuple[str, str, str]]:
+    """Yield the ``(s, p, o)`` string triples of *onto* from the SQL tables."""
+    c = onto.graph.c
+    for s, p, o in world.graph.db.execute(_TRIPLES_SQL, (c, c)):
+        yield s, p, str(o)
+
+
+@contextmanager
+def reasoner_world(world_path: str | os.PathLike, path: str):
+    """Store *path* in the shared World, then open it in a snapshot copy.
+
+    Yields ``(world, ontology)``; the snapshot can be handed to HermiT /
+    Pellet, whose inferred facts never reach the shared file, and is
+    deleted when the ``with`` block ends.
+    """
+    world = open_world(world_path)
+    try:
+        ensure_loaded(world, path)
+        world.save()
+    finally:
+        world.close()
+    with snapshot_world(world_path) as snapshot:
+        yield snapshot, ensure_loaded(snapshot, path)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""rdfxml_stream.py — streaming TBox reader for case-bearing RDF/XML files
+
+Files such as ``mf-complete with cases.rdf`` or ``GSMFO-withCase.rdf``
+mix the schema with case individuals.  Extraction only
+needs the schema, so instead of loading everything into an rdflib Graph this
+reader walks the file with ``xml.etree.ElementTree.iterparse`` and looks at
+one top-level description at a time:
+
+* ``owl:Class`` / ``owl:ObjectProperty`` / ``owl:DatatypeProperty`` nodes,
+  and ``rdf:Description`` nodes typed as one of those, are turned into
+  ``(s, p, o)`` string triples;
+* ``owl:NamedIndividual`` nodes and descriptions typed with any other class
+  (the case individuals) are skipped — except their typing and schema
+  statements (comment, label, …) when their IRI also takes part in the
+  schema: a punned IRI declared as both individual and class, or an
+  individual used as a domain.  Those statements are held back per IRI
+  until the schema mentions it (it may only do so further down the file);
+  the rest are dropped at the end;
+* untyped ``rdf:Description`` nodes only contribute their schema statements
+  (comment, label, subClassOf, domain, range);
+* every finished top-level element is cleared, so memory stays flat no
+  matter how many individuals the file carries.
+
+The triples have the same string form as :func:`graph_extract.graph_triples`
+(blank nodes get fresh ``N…`` labels), so they can be fed straight into
+:func:`graph_extract.build_index`.
+"""
+from __future__ import annotations
+import uuid
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urljoin
+
+from graph_extract import (RDF_TYPE, RDFS_COMMENT, RDFS_DOMAIN, RDFS_RANGE, RDFS_SUBCLASSOF,
+                           OWL_CLASS, OWL_OBJECTPROP, OWL_DATAPROP)
+
+RDF_NS  = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+OWL_NS  = "http://www.w3.org/2002/07/owl#"
+XML_NS  = "http://www.w3.org/XML/1998/namespace"
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+
+RDF_RDF         = f"{{{RDF_NS}}}RDF"
+RDF_DESCRIPTION = f"{{{RDF_NS}}}Description"
+RDF_ABOUT       = f"{{{RDF_NS}}}about"
+RDF_ID          = f"{{{RDF_NS}}}ID"
+RDF_NODEID      = f"{{{RDF_NS}}}nodeID"
+RDF_RESOURCE    = f"{{{RDF_NS}}}resource"
+RDF_PARSETYPE   = f"{{{RDF_NS}}}parseType"
+RDF_DATATYPE    = f"{{{RDF_NS}}}datatype"
+XML_BASE        = f"{{{XML_NS}}}base"
+XML_LANG        = f"{{{XML_NS}}}lang"
+
+SCHEMA_TYPES = {OWL_CLASS, OWL_OBJECTPROP, OWL_DATAPROP}
+INDIVIDUAL_TYPE = OWL_NS + "NamedIndividual"
+SCHEMA_PREDICATES = {RDFS_COMMENT, RDFS_LABEL, RDFS_SUBCLASSOF, RDFS_DOMAIN, RDFS_RANGE}
+LITERAL_PREDICATES = {RDFS_COMMENT, RDFS_LABEL}
+_SYNTAX_ATTRS = {RDF_ABOUT, RDF_ID, RDF_NODEID, RDF_RESOURCE, RDF_PARSETYPE, RDF_DATATYPE, XML_BASE, XML_LANG}
+
+
+def _iri(tag: str) -> str:
+    """``{ns}local`` → ``nslocal``."""
+    return tag[1:].replace("}", "", 1) if tag.startswith("{") else tag
+
+
+class _Reader:
+    def __init__(self):
+        self.bnodes: dict[str, str] = {}
+
+    def bnode(self, node_id: str | None = None) -> str:
+        if node_id is None:
+            return "N" + uuid.uuid4().hex
+        if node_id not in self.bnodes:
+            self.bnodes[node_id] = "N" + uuid.uuid4().hex
+        return self.bnodes[node_id]
+
+    def subject(self, elem: ET.Element, base: str) -> str:
+        if RDF_ABOUT in elem.attrib:
+            return urljoin(base, elem.attrib[RDF_ABOUT])
+        if RDF_ID in elem.attrib:
+            return urljoin(base, "#" + elem.attrib[RDF_ID])
+        return self.bnode(elem.attrib.get(RDF_NODEID))
+
+    def node_triples(self, elem: ET.Element, base: str, schema_only: bool = False) -> tuple[str, list[tuple[str, str, str]]]:
+        """All triples of one node element (recursing into nested nodes)."""
+        base = urljoin(base, elem.attrib[XML_BASE]) if XML_BASE in elem.attrib else base
+        s = self.subject(elem, base)
+        triples: list[tuple[str, str, str]] = []
+        if elem.tag != RDF_DESCRIPTION:
+            triples.append((s, RDF_TYPE, _iri(elem.tag)))
+        for name, value in elem.attrib.items():
+            if name not in _SYNTAX_ATTRS:
+                triples.append((s, _iri(name), value))
+        self.property_triples(s, elem, base, triples, schema_only)
+        return s, triples
+
+    def property_triples(self, s: str, elem: ET.Element, base: str,
+                         triples: list[tuple[str, str, str]], schema_only: bool = False) -> None:
+        for prop in elem:
+            p = _iri(prop.tag)
+            if schema_only and p not in SCHEMA_PREDICATES:
+                continue
+            parse_type = prop.attrib.get(RDF_PARSETYPE)
+            if RDF_RESOURCE in prop.attrib:
+                triples.append((s, p, urljoin(base, prop.attrib[RDF_RESOURCE])))
+            elif RDF_NODEID in prop.attrib:
+                triples.append((s, p, self.bnode(prop.attrib[RDF_NODEID])))
+            elif parse_type == "Resource":
+                o = self.bnode()
+                triples.append((s, p, o))
+                self.property_triples(o, prop, base, triples)
+            elif parse_type == "Collection":
+                # list structure (unionOf, intersectionOf, …) is not needed for
+                # extraction; keep the statement and the members' own triples
+                triples.append((s, p, self.bnode()))
+                for item in prop:
+                    triples.extend(self.node_triples(item, base)[1])
+            elif len(prop):
+                o, inner = self.node_triples(prop[0], base)
+                triples.append((s, p, o))
+                triples.extend(inner)
+            else:
+                triples.append((s, p, prop.text or ""))
+
+
+def iter_schema_triples(path: str, base: str | None = None) -> Iterator[tuple[str, str, str]]:
+    """Stream the TBox triples of an RDF/XML file, skipping individuals."""
+    reader = _Reader()
+    schema_iris: set[str] = set()                     # subjects / objects of the schema triples so far
+    deferred: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
+
+    def schema(triples: list[tuple[str, str, str]]) -> Iterator[tuple[str, str, str]]:
+        yield from triples
+        for s, p, o in triples:
+            for iri in (s, o) if p not in LITERAL_PREDICATES else (s,):
+                if iri not in schema_iris:
+                    schema_iris.add(iri)
+                    yield from deferred.pop(iri, ())
+
+
+    depth = 0
+    root = None
+    doc_base = base or Path(path).resolve().as_uri()
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+                if base is None and XML_BASE in elem.attrib:
+                    doc_base = elem.attrib[XML_BASE]
+            continue
+        depth -= 1
+        if depth != 1 or root is None or root.tag != RDF_RDF:
+            continue
+        # a complete top-level description
+        types = {urljoin(doc_base, t.attrib[RDF_RESOURCE]) for t in elem
+                 if t.tag == f"{{{RDF_NS}}}type" and RDF_RESOURCE in t.attrib}
+        if elem.tag != RDF_DESCRIPTION:
+            types.add(_iri(elem.tag))
+        if INDIVIDUAL_TYPE not in types and types & SCHEMA_TYPES:
+            yield from schema(reader.node_triples(elem, doc_base)[1])
+        elif not types:
+            yield from schema(reader.node_triples(elem, doc_base, schema_only=True)[1])
+        else:
+            s, triples = reader.node_triples(elem, doc_base)
+            kept = [t for t in triples if t[0] == s and (t[1] == RDF_TYPE or t[1] in SCHEMA_PREDICATES)]
+            if s in schema_iris:
+                yield from kept
+            else:
+                deferred[s].extend(kept)
+        elem.clear()
+        root.remove(elem)
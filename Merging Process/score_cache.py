@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""score_cache.py — incremental on-disk cache of string-matching score matrices
+
+Re-running the matchers after a few classes were added to one ontology used
+to rescore the whole name × name matrix.  This cache keeps one matrix per
+``(ontology pair, entity type, scorer)`` slot together with the row and
+column name lists it was computed for:
+
+* when the SHA-256 of both name lists matches the stored hashes the matrix
+  is returned as is;
+* otherwise the cells of names present in both the old and the new lists are
+  copied over, and only the new rows (new names of ontology 1 × all names of
+  ontology 2) and new columns (kept names of ontology 1 × new names of
+  ontology 2) are computed; removed names simply drop out.
+
+Matrices are stored without a cutoff (``score_cutoff=0``), so any threshold
+can be applied afterwards.  Entries live in ``GENOSIS_SCORE_CACHE`` (default:
+``.score_cache`` next to this module) as ``.npz`` files.
+
+Typical use::
+
+    cache = ScoreCache()
+    scores = cache.matrix(("OSN", "OFB", "class", "wratio"), names1, names2,
+                          lambda a, b: score_matrix(a, b, score_cutoff=0))
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = Path(os.environ.get("GENOSIS_SCORE_CACHE", Path(__file__).resolve().parent / ".score_cache"))
+
+ComputeFn = Callable[[list[str], list[str]], np.ndarray]
+
+
+def names_digest(names: list[str]) -> str:
+    """SHA-256 over the ordered name list."""
+    h = hashlib.sha256()
+    for name in names:
+        h.update(name.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+class ScoreCache:
+    """Per-slot score matrices, updated row/column-wise when the names change."""
+
+    def __init__(self, cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.computed_cells = 0
+        self.reused_cells = 0
+
+    def entry_path(self, key: tuple[str, ...]) -> Path:
+        return self.cache_dir / (re.sub(r"[^\w.-]+", "_", "_".join(key)) + ".npz")
+
+    def _load(self, entry: Path) -> dict[str, np.ndarray] | None:
+        if not entry.exists():
+            return None
+        try:
+            with np.load(entry) as data:
+                if int(data["format"]) != FORMAT_VERSION:
+                    return None
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, KeyError):
+            return None                        # corrupt / foreign entry → recompute
+
+    def _store(self, entry: Path, names1: list[str], names2: list[str], scores: np.ndarray) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, format=FORMAT_VERSION, names1=np.asarray(names1, dtype=str),
+                         names2=np.asarray(names2, dtype=str), hash1=names_digest(names1),
+                         hash2=names_digest(names2), scores=scores)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def matrix(self, key: tuple[str, ...], names1: list[str], names2: list[str], compute: ComputeFn) -> np.ndarray:
+        """``len(names1) × len(names2)`` scores of *key*, computing only what is new.
+
+        *compute* must return the uncut score matrix of two name lists.
+        """
+        entry = self.entry_path(key)
+        cached = self._load(entry)
+        if cached is not None and str(cached["hash1"]) == names_digest(names1) \
+                and str(cached["hash2"]) == names_digest(names2):
+            self.hits += 1
+            self.reused_cells += cached["scores"].size
+            return cached["scores"]
+
+        if cached is None:
+            self.misses += 1
+            scores = np.asarray(compute(names1, names2))
+            self.computed_cells += scores.size
+            self._store(entry, names1, names2, scores)
+            return scores
+
+        self.partial += 1
+        old = cached["scores"]
+        pos1 = {name: i for i, name in enumerate(cached["names1"].tolist())}
+        pos2 = {name: j for j, name in enumerate(cached["names2"].tolist())}
+        idx1 = np.array([pos1.get(n, -1) for n in names1], dtype=np.int64)
+        idx2 = np.array([pos2.get(n, -1) for n in names2], dtype=np.int64)
+        known1, known2 = idx1 >= 0, idx2 >= 0
+        arr1, arr2 = np.asarray(names1, dtype=object), np.asarray(names2, dtype=object)
+
+        scores = np.zeros((len(names1), len(names2)), dtype=old.dtype)
+        scores[np.ix_(known1, known2)] = old[np.ix_(idx1[known1], idx2[known2])]
+        self.reused_cells += int(known1.sum()) * int(known2.sum())
+        if (~known1).any() and len(names2):
+            scores[~known1] = compute(arr1[~known1].tolist(), names2)
+            self.computed_cells += int((~known1).sum()) * len(names2)
+        if known1.any() and (~known2).any():
+            scores[np.ix_(known1, ~known2)] = compute(arr1[known1].tolist(), arr2[~known2].tolist())
+            self.computed_cells += int(known1.sum()) * int((~known2).sum())
+        self._store(entry, names1, names2, scores)
+        return scores
+
+    def clear(self) -> None:
+        for p in self.cache_dir.glob("*.npz"):
+            p.unlink()
+
+    def summary(self) -> str:
+        return (f"{self.hits} hit, {self.partial} parsial, {self.misses} miss; "
+                f"sel dihitung {self.computed_cells:,}, dipakai ulang {self.reused_cells:,}")
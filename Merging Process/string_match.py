@@ -0,0 +1,584 @@
+# -*- coding: utf-8 -*-
+"""string_match.py — all-pairs lexical matching with ``rapidfuzz.process.cdist``
+
+Vectorized replacement for ``cls-stringmatching.py``, ``dp-stringmatching.py``
+and ``op-stringmatching.py``.  Those scripts call ``process.extract`` once per
+name and have to be edited by hand for each of the six ontology pairs.  Here
+the full name × name score matrix of a pair is computed in one ``cdist`` call
+(``workers=-1`` → all cores) and the match rows are read off the matrix with
+NumPy.  The output files and their rows are the same as before:
+
+* ``<p1>-<p2> class matching.csv`` — classes (``class`` + ``subClass``),
+  comments prefixed with ``<p1>:`` / ``<p2>:``;
+* ``matched_dp_<p1>_<p2>.csv`` — data properties;
+* ``matched_op_<p1>_<p2>.csv`` — object properties (``predicate``);
+
+each with ``ont 1, ont 2, score, Comment Onto 1, Comment Onto 2``, sorted by
+score (ties keep the old order: name in ontology 1, then name in ontology 2).
+Names are compared lowercased with ``fuzz.WRatio``; full IRIs from the new
+extraction are reduced to their local name first.  The lowercased names and
+camelCase tokens come from the ``nameLower`` / ``tokens`` columns of
+``ENT <tag>.csv`` when it exists (:func:`find_name_forms`); without it they
+are computed here, as before.
+
+**Blocking.**  For large ontologies the full matrix is wasteful: most pairs
+share nothing.  With ``blocking="ngram"`` (character n-grams of the padded
+lowercase name) or ``blocking="token"`` (camelCase tokens) an inverted index
+over ontology 2 yields the candidate pairs that share at least ``min_shared``
+keys, and only those are scored (``process.cpdist``).  Pairs that WRatio
+would have scored ≥ cutoff without sharing a key are lost; measure that with
+:func:`blocking_recall` against an exhaustive run before relying on it.
+
+**Ensemble.**  :func:`ensemble_matrices` computes one ``cdist`` matrix per
+scorer in :data:`SCORERS` (WRatio, token_set_ratio, Jaro-Winkler, and
+token_set_ratio over split camelCase tokens) and stacks them into a
+``(k, n1, n2)`` float32 array, saved with :func:`save_ensemble` as ``.npz``.
+Weights and per-scorer floors are applied afterwards by
+:func:`combine_scores`, so trying another weighting never re-scores a pair.
+
+**OP triples.**  :func:`match_triples` matches the ``(subject, predicate,
+object)`` rows of ``OP2`` instead of bare predicate names: the score is a
+weighted mean (:data:`TRIPLE_WEIGHTS`) of predicate, domain and range
+similarity, gathered from one predicate and one class ``cdist`` matrix.
+Output: ``matched_op_triples_<p1>_<p2>.csv``.
+
+**Score cache.**  Passing a :class:`score_cache.ScoreCache` to
+:func:`match_pair` keeps the uncut WRatio matrix of every pair on disk; a
+rerun only scores the rows / columns of names that were added since.
+
+**Sparse top-k.**  :func:`topk_matrix` keeps only the best ``k`` matches of
+each name in a ``scipy.sparse`` CSR matrix, scoring ``names1`` in row
+blocks sized from a memory budget (:data:`TOPK_BLOCK_BYTES`) so the dense
+float32 scores and their sort order never outgrow it, plus the ``k``
+entries per row.  :func:`save_topk` writes it as
+``topk_<kind>_<p1>_<p2>.npz``; :func:`topk_edges` turns it back into
+weighted edges for the synth graph.
+
+**One-to-one.**  :func:`one_to_one` reduces a sparse score matrix to a
+maximum-weight bipartite matching (each name keeps at most one partner),
+solved per connected component of the match graph.
+"""
+from __future__ import annotations
+import os
+from itertools import combinations
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import JaroWinkler
+
+from entity_catalog import EntityCatalog
+from entity_norm import ENT_FILE, NameForms, local_name, read_name_forms
+from graph_extract import TABLE_FILES
+from score_cache import ScoreCache
+
+OUTPUT_COLUMNS = ['ont 1', 'ont 2', 'score', 'Comment Onto 1', 'Comment Onto 2']
+
+# entity type → source table (see entity_catalog), ENT ``type`` and how the output is named
+ENTITY_KINDS = {
+    "class": {
+        "table": "CLS",
+        "type": "Class",
+        "output": "{p1}-{p2} class matching.csv",
+        "prefix_comments": True,
+    },
+    "dp": {
+        "table": "DP2",
+        "type": "DatatypeProperty",
+        "output": "matched_dp_{p1}_{p2}.csv",
+        "prefix_comments": False,
+    },
+    "op": {
+        "table": "OP2",
+        "type": "ObjectProperty",
+        "output": "matched_op_{p1}_{p2}.csv",
+        "prefix_comments": False,
+    },
+}
+
+DEFAULT_TAGS = ["OSN", "MP", "MCSS", "OFB"]
+LEXICAL_THRESHOLD = 80
+LIMIT_PER_NAME = 999
+BLOCKING_MODES = ("none", "token", "ngram")
+
+# sparse top-k output (see topk_matrix)
+TOPK_OUTPUT = "topk_{kind}_{p1}_{p2}.npz"
+TOPK_BLOCK_BYTES = 128 * 1024 * 1024   # dense scores + argsort order of one row block
+
+# one-to-one assignment: components up to this many cells are solved densely
+ASSIGN_DENSE_CELLS = 250_000
+
+# structural OP matching: (predicate, domain, range) weights and output
+TRIPLE_WEIGHTS = (0.5, 0.25, 0.25)
+TRIPLE_OUTPUT = "matched_op_triples_{p1}_{p2}.csv"
+TRIPLE_COLUMNS = ['ont 1', 'ont 2', 'domain 1', 'domain 2', 'range 1', 'range 2', 'score',
+                  'predicate score', 'domain score', 'range score', 'Comment Onto 1', 'Comment Onto 2']
+
+
+# ensemble scorer → (scorer, how names are prepared, factor to the 0-100 scale)
+#   lower  : lowercased local name (what the *-stringmatching.py scripts compare)
+#   tokens : camelCase tokens joined by spaces (what alignment.py compares)
+SCORERS = {
+    "wratio":          (fuzz.WRatio, "lower", 1),
+    "token_set":       (fuzz.token_set_ratio, "lower", 1),
+    "jaro_winkler":    (JaroWinkler.normalized_similarity, "lower", 100),
+    "token_set_camel": (fuzz.token_set_ratio, "tokens", 1),
+}
+
+
+# ───────────────────────── inputs ─────────────────────────────
+def _find_file(base: str, dirs: list[str]) -> str | None:
+    from table_io import EXT_BY_FORMAT, with_format
+    for d in dirs:
+        for fmt in EXT_BY_FORMAT:
+            path = with_format(os.path.join(d, base), fmt)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def find_table(table: str, tag: str, dirs: list[str]) -> str:
+    """First ``<table> <tag>.csv`` (or .parquet / .arrow) found in *dirs*."""
+    base = TABLE_FILES[table].format(tag=tag)
+    path = _find_file(base, dirs)
+    if path is None:
+        raise FileNotFoundError(f"'{base}' tidak ditemukan di {dirs}")
+    return path
+
+
+def find_name_forms(tag: str, dirs: list[str]) -> NameForms:
+    """Name forms of ``ENT <tag>.csv`` in *dirs*; empty (computed on the fly) when there is none."""
+    path = _find_file(ENT_FILE.format(tag=tag), dirs)
+    return read_name_forms(path) if path is not None else NameForms()
+
+
+# ───────────────────────── scoring ────────────────────────────
+def score_matrix(names1: list[str], names2: list[str], scorer=fuzz.WRatio,
+                 score_cutoff: float = LEXICAL_THRESHOLD, workers: int = -1,
+                 forms1: NameForms | None = None, forms2: NameForms | None = None,
+                 dtype=np.float64) -> np.ndarray:
+    """``len(names1) × len(names2)`` lowercase scores; below cutoff → 0."""
+    return process.cdist(_prepare(names1, "lower", forms1), _prepare(names2, "lower", forms2), scorer=scorer,
+                         score_cutoff=score_cutoff, dtype=dtype, workers=workers)
+
+
+def rank_matches(i: np.ndarray, j: np.ndarray, s: np.ndarray, score_cutoff: float = LEXICAL_THRESHOLD,
+                 limit: int = LIMIT_PER_NAME) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Keep scored pairs ≥ cutoff, at most *limit* per ``i``, in output order.
+
+    Ordered by score descending, then ``i``, then ``j`` — what sorting the
+    per-name ``process.extract`` results by score used to give.
+    """
+    keep = s >= score_cutoff
+    i, j, s = i[keep], j[keep], s[keep]
+    if limit is not None and len(i):
+        order = np.lexsort((j, -s, i))                 # best first within each row
+        i, j, s = i[order], j[order], s[order]
+        starts = np.searchsorted(i, i)                 # first position of each row
+        keep = np.arange(len(i)) - starts < limit
+        i, j, s = i[keep], j[keep], s[keep]
+    order = np.lexsort((j, i, -s))
+    return i[order], j[order], s[order]
+
+
+def matrix_matches(scores: np.ndarray, score_cutoff: float = LEXICAL_THRESHOLD,
+                   limit: int = LIMIT_PER_NAME) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """``(i, j, score)`` of every matrix cell ≥ cutoff (see :func:`rank_matches`)."""
+    i, j = np.nonzero(scores >= score_cutoff)
+    return rank_matches(i, j, scores[i, j], score_cutoff, limit)
+
+
+# ───────────────────────── blocking ───────────────────────────
+def blocking_keys(name: str, mode: str = "ngram", n: int = 3, forms: NameForms | None = None) -> set[str]:
+    """Index keys of one name: padded character n-grams or camelCase tokens."""
+    forms = forms or NameForms()
+    if mode == "token":
+        return set(forms.tokens_of(name).split()) or {forms.lower_of(name)}
+    padded = f" {forms.lower_of(name)} "
+    return {padded[k:k + n] for k in range(max(1, len(padded) - n + 1))}
+
+
+class BlockingIndex:
+    """Inverted index key → positions in ``names2``.
+
+    Keys carried by more than ``max_key_share`` of the names (``has``,
+    `` ha``, …) are dropped: they match almost everything and only blow up
+    the candidate list.
+    """
+
+    def __init__(self, names2: list[str], mode: str = "ngram", n: int = 3, max_key_share: float = 1.0,
+                 forms: NameForms | None = None):
+        self.mode, self.n = mode, n
+        postings: dict[str, list[int]] = {}
+        for j, name in enumerate(names2):
+            for key in blocking_keys(name, mode, n, forms):
+                postings.setdefault(key, []).append(j)
+        max_postings = max(1, int(max_key_share * len(names2)))
+        self.postings = {key: np.asarray(js, dtype=np.int64) for key, js in postings.items()
+                         if len(js) <= max_postings}
+
+    def candidates(self, names1: list[str], min_shared: int = 1,
+                   forms: NameForms | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """``(i, j)`` of every pair sharing at least *min_shared* keys."""
+        ii, jj = [], []
+        for i, name in enumerate(names1):
+            lists = [self.postings[k] for k in blocking_keys(name, self.mode, self.n, forms) if k in self.postings]
+            if not lists:
+                continue
+            js, counts = np.unique(np.concatenate(lists), return_counts=True)
+            js = js[counts >= min_shared]
+            ii.append(np.full(len(js), i, dtype=np.int64))
+            jj.append(js)
+        if not ii:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(ii), np.concatenate(jj)
+
+
+def score_pairs(names1: list[str], names2: list[str], i: np.ndarray, j: np.ndarray, scorer=fuzz.WRatio,
+                score_cutoff: float = LEXICAL_THRESHOLD, workers: int = -1,
+                forms1: NameForms | None = None, forms2: NameForms | None = None) -> np.ndarray:
+    """Lowercase scores of the listed pairs only (``process.cpdist``)."""
+    if not len(i):
+        return np.empty(0, dtype=np.float64)
+    lower1 = np.asarray(_prepare(names1, "lower", forms1), dtype=object)
+    lower2 = np.asarray(_prepare(names2, "lower", forms2), dtype=object)
+    return process.cpdist(lower1[i].tolist(), lower2[j].tolist(), scorer=scorer,
+                          score_cutoff=score_cutoff, dtype=np.float64, workers=workers)
+
+
+def blocking_recall(full: pd.DataFrame, blocked: pd.DataFrame) -> float:
+    """Share of the exhaustive ``(ont 1, ont 2)`` matches that blocking kept."""
+    if full.empty:
+        return 1.0
+    full_pairs = set(zip(full['ont 1'], full['ont 2']))
+    return len(full_pairs & set(zip(blocked['ont 1'], blocked['ont 2']))) / len(full_pairs)
+
+
+# ───────────────────────── ensemble ───────────────────────────
+def _prepare(names: list[str], how: str, forms: NameForms | None = None) -> list[str]:
+    forms = forms or NameForms()
+    if how == "tokens":
+        return [forms.tokens_of(n) or forms.lower_of(n) for n in names]
+    return [forms.lower_of(n) for n in names]
+
+
+def ensemble_matrices(names1: list[str], names2: list[str], scorers: list[str] = tuple(SCORERS),
+                      workers: int = -1, forms1: NameForms | None = None,
+                      forms2: NameForms | None = None) -> np.ndarray:
+    """Stacked ``(len(scorers), len(names1), len(names2))`` float32 score matrices."""
+    prepared: dict[str, tuple[list[str], list[str]]] = {}
+    stack = np.zeros((len(scorers), len(names1), len(names2)), dtype=np.float32)
+    for k, name in enumerate(scorers):
+        scorer, how, factor = SCORERS[name]
+        if how not in prepared:
+            prepared[how] = (_prepare(names1, how, forms1), _prepare(names2, how, forms2))
+        q, c = prepared[how]
+        if q and c:
+            stack[k] = process.cdist(q, c, scorer=scorer, dtype=np.float32, workers=workers) * factor
+    return stack
+
+
+def save_ensemble(path: str, names1: list[str], names2: list[str], scorers: list[str], stack: np.ndarray) -> None:
+    """Write an ensemble ``.npz`` (names of both sides, scorer names, stacked scores)."""
+    np.savez_compressed(path, names1=np.asarray(names1, dtype=str), names2=np.asarray(names2, dtype=str),
+                        scorers=np.asarray(scorers, dtype=str), scores=stack)
+
+
+def load_ensemble(path: str) -> dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def combine_scores(ensemble: dict[str, np.ndarray], weights: dict[str, float] | None = None,
+                   thresholds: dict[str, float] | None = None) -> np.ndarray:
+    """Weighted mean of the stacked scorers, with optional per-scorer floors.
+
+    Missing weights count as 0 (default: equal weights).  A cell whose score
+    for scorer *k* is below ``thresholds[k]`` becomes 0.
+    """
+    scorers = [str(name) for name in ensemble["scorers"]]
+    stack = ensemble["scores"].astype(np.float64)
+    w = np.array([1.0 if weights is None else weights.get(name, 0.0) for name in scorers])
+    if not w.sum():
+        raise ValueError(f"Bobot ensemble kosong untuk scorer {scorers}")
+    combined = np.tensordot(w / w.sum(), stack, axes=1)
+    for name, floor in (thresholds or {}).items():
+        combined[stack[scorers.index(name)] < floor] = 0.0
+    return combined
+
+
+def ensemble_pair(kind: str, df1: pd.DataFrame, df2: pd.DataFrame, scorers: list[str] = tuple(SCORERS),
+                  workers: int = -1, forms1: NameForms | None = None,
+                  forms2: NameForms | None = None) -> tuple[list[str], list[str], np.ndarray]:
+    """``(names1, names2, stack)`` for one entity type of one ontology pair."""
+    names1 = EntityCatalog.from_table(df1, kind, transform=local_name).sorted_names()
+    names2 = EntityCatalog.from_table(df2, kind, transform=local_name).sorted_names()
+    return names1, names2, ensemble_matrices(names1, names2, list(scorers), workers, forms1, forms2)
+
+
+def match_pair(kind: str, df1: pd.DataFrame, df2: pd.DataFrame, p1: str, p2: str,
+               score_cutoff: float = LEXICAL_THRESHOLD, limit: int = LIMIT_PER_NAME,
+               workers: int = -1, blocking: str = "none", ngram: int = 3,
+               min_shared: int = 1, max_key_share: float = 1.0, cache: ScoreCache | None = None,
+               assignment: bool = False, forms1: NameForms | None = None,
+               forms2: NameForms | None = None) -> pd.DataFrame:
+    """Match rows for one entity type of one ontology pair.
+
+    ``df.attrs`` records how many pairs were scored (``candidates``) out of
+    the full cross product (``total_pairs``).  With a :class:`ScoreCache`
+    the full matrix is served from / stored into the cache (not used with
+    blocking).  ``assignment=True`` keeps only the :func:`one_to_one` pairs.
+    *forms1* / *forms2* are the ``ENT`` name forms of the two ontologies.
+    """
+    spec = ENTITY_KINDS[kind]
+    catalog1 = EntityCatalog.from_table(df1, kind, transform=local_name)
+    catalog2 = EntityCatalog.from_table(df2, kind, transform=local_name)
+    names1, names2 = catalog1.sorted_names(), catalog2.sorted_names()
+    total_pairs = len(names1) * len(names2)
+    if not names1 or not names2:
+        results_df = pd.DataFrame(columns=OUTPUT_COLUMNS)
+        results_df.attrs.update(candidates=0, total_pairs=total_pairs)
+        return results_df
+    if blocking == "none":
+        if cache is not None:
+            scores = cache.matrix((p1, p2, kind, "wratio"), names1, names2,
+                                  lambda a, b: score_matrix(a, b, score_cutoff=0, workers=workers,
+                                                            forms1=forms1, forms2=forms2))
+        else:
+            scores = score_matrix(names1, names2, score_cutoff=score_cutoff, workers=workers,
+                                  forms1=forms1, forms2=forms2)
+        i, j, s = matrix_matches(scores, score_cutoff, limit)
+        candidates = total_pairs
+    else:
+        index = BlockingIndex(names2, blocking, ngram, max_key_share, forms2)
+        ci, cj = index.candidates(names1, min_shared, forms1)
+        cs = score_pairs(names1, names2, ci, cj, score_cutoff=score_cutoff, workers=workers,
+                         forms1=forms1, forms2=forms2)
+        i, j, s = rank_matches(ci, cj, cs, score_cutoff, limit)
+        candidates = len(ci)
+    if assignment and len(i):
+        from scipy.sparse import csr_matrix
+        chosen = one_to_one(csr_matrix((s, (i, j)), shape=(len(names1), len(names2))))
+        keep = np.asarray(chosen[i, j]).ravel() != 0
+        i, j, s = i[keep], j[keep], s[keep]
+    n1, n2 = np.asarray(names1, dtype=object)[i], np.asarray(names2, dtype=object)[j]
+    c1 = catalog1.comments_of(n1)
+    c2 = catalog2.comments_of(n2)
+    if spec["prefix_comments"]:
+        c1 = [f"{p1}:{c}" for c in c1]
+        c2 = [f"{p2}:{c}" for c in c2]
+    results_df = pd.DataFrame({
+        'ont 1': [f"{p1}:{n}" for n in n1],
+        'ont 2': [f"{p2}:{n}" for n in n2],
+        'score': np.round(s, 2),
+        'Comment Onto 1': c1,
+        'Comment Onto 2': c2,
+    }, columns=OUTPUT_COLUMNS)
+    results_df.attrs.update(candidates=candidates, total_pairs=total_pairs)
+    return results_df
+
+
+# ───────────────────────── OP triples ─────────────────────────
+def _triples(df: pd.DataFrame) -> pd.DataFrame:
+    """Unique ``(subject, predicate, object)`` local names of an ``OP2`` table."""
+    cols = ['subject', 'predicate', 'object']
+    triples = df[cols].fillna("").astype(str).apply(lambda s: s.map(local_name))
+    return triples[triples['predicate'] != ""].drop_duplicates().reset_index(drop=True)
+
+
+def triple_scores(t1: pd.DataFrame, t2: pd.DataFrame, weights: tuple[float, float, float] = TRIPLE_WEIGHTS,
+                  workers: int = -1, forms1: NameForms | None = None,
+                  forms2: NameForms | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """``len(t1) × len(t2)`` combined, predicate, domain and range scores.
+
+    One predicate matrix and one class matrix (subjects ∪ objects of both
+    tables) are computed with ``cdist``; every triple pair then picks its
+    cells by fancy indexing on the integer codes.  A domain / range missing
+    on either side drops out of the weighted mean for that pair.
+    """
+    wp, wd, wr = weights
+    preds1, pcode1 = np.unique(t1['predicate'].to_numpy(dtype=str), return_inverse=True)
+    preds2, pcode2 = np.unique(t2['predicate'].to_numpy(dtype=str), return_inverse=True)
+    cls1, ccode1 = np.unique(np.concatenate([t1['subject'], t1['object']]).astype(str), return_inverse=True)
+    cls2, ccode2 = np.unique(np.concatenate([t2['subject'], t2['object']]).astype(str), return_inverse=True)
+    dom1, rng1 = ccode1[:len(t1)], ccode1[len(t1):]
+    dom2, rng2 = ccode2[:len(t2)], ccode2[len(t2):]
+
+    pred = score_matrix(preds1.tolist(), preds2.tolist(), score_cutoff=0, workers=workers,
+                        forms1=forms1, forms2=forms2)[pcode1[:, None], pcode2]
+    cls = score_matrix(cls1.tolist(), cls2.tolist(), score_cutoff=0, workers=workers, forms1=forms1, forms2=forms2)
+    has1, has2 = cls1 != "", cls2 != ""
+    domain, range_ = cls[dom1[:, None], dom2], cls[rng1[:, None], rng2]
+    has_domain = has1[dom1][:, None] & has2[dom2]
+    has_range = has1[rng1][:, None] & has2[rng2]
+    combined = (wp * pred + wd * domain * has_domain + wr * range_ * has_range) \
+        / (wp + wd * has_domain + wr * has_range)
+    return combined, pred, domain, range_
+
+
+def match_triples(df1: pd.DataFrame, df2: pd.DataFrame, p1: str, p2: str,
+                  weights: tuple[float, float, float] = TRIPLE_WEIGHTS, score_cutoff: float = LEXICAL_THRESHOLD,
+                  limit: int = LIMIT_PER_NAME, workers: int = -1, forms1: NameForms | None = None,
+                  forms2: NameForms | None = None) -> pd.DataFrame:
+    """Structural OP match rows: predicate, domain and range scored together.
+
+    ``hasComment(User, Comment)`` and ``hasComment(Post, Comment)`` get the
+    same predicate score but different domain scores, so they no longer tie.
+    """
+    t1, t2 = _triples(df1), _triples(df2)
+    if t1.empty or t2.empty:
+        return pd.DataFrame(columns=TRIPLE_COLUMNS)
+    combined, pred, domain, range_ = triple_scores(t1, t2, weights, workers, forms1, forms2)
+    i, j, s = matrix_matches(combined, score_cutoff, limit)
+    catalog1 = EntityCatalog.from_table(df1, "op", transform=local_name)
+    catalog2 = EntityCatalog.from_table(df2, "op", transform=local_name)
+    a, b = t1.iloc[i], t2.iloc[j]
+    return pd.DataFrame({
+        'ont 1': [f"{p1}:{n}" for n in a['predicate']],
+        'ont 2': [f"{p2}:{n}" for n in b['predicate']],
+        'domain 1': a['subject'].to_numpy(), 'domain 2': b['subject'].to_numpy(),
+        'range 1': a['object'].to_numpy(), 'range 2': b['object'].to_numpy(),
+        'score': np.round(s, 2),
+        'predicate score': np.round(pred[i, j], 2),
+        'domain score': np.round(domain[i, j], 2),
+        'range score': np.round(range_[i, j], 2),
+        'Comment Onto 1': catalog1.comments_of(a['predicate']),
+        'Comment Onto 2': catalog2.comments_of(b['predicate']),
+    }, columns=TRIPLE_COLUMNS)
+
+
+# ───────────────────────── sparse top-k ───────────────────────
+def topk_matrix(names1: list[str], names2: list[str], k: int, score_cutoff: float = LEXICAL_THRESHOLD,
+                workers: int = -1, block_bytes: int = TOPK_BLOCK_BYTES, forms1: NameForms | None = None,
+                forms2: NameForms | None = None):
+    """Best *k* scores ≥ cutoff of every row as a float32 ``scipy.sparse.csr_matrix``.
+
+    ``names1`` is scored in row blocks sized so that one block's float32
+    scores plus its int64 argsort order fit in *block_bytes* (at least one
+    row per block).  Ties keep the lower column (the same order as
+    :func:`rank_matches`).
+    """
+    from scipy.sparse import csr_matrix
+    block_rows = max(1, block_bytes // (max(len(names2), 1) * (4 + 8)))
+    rows, cols, vals = [], [], []
+    for start in range(0, len(names1), block_rows):
+        block = score_matrix(names1[start:start + block_rows], names2, score_cutoff=score_cutoff, workers=workers,
+                             forms1=forms1, forms2=forms2, dtype=np.float32)
+        top = np.argsort(-block, axis=1, kind="stable")[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        r, c = np.nonzero(top_scores >= score_cutoff)
+        rows.append(r + start)
+        cols.append(top[r, c])
+        vals.append(top_scores[r, c])
+    if not rows:
+        return csr_matrix((len(names1), len(names2)), dtype=np.float32)
+    return csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(len(names1), len(names2)))
+
+
+def topk_pair(kind: str, df1: pd.DataFrame, df2: pd.DataFrame, k: int,
+              score_cutoff: float = LEXICAL_THRESHOLD, workers: int = -1, blocking: str = "none",
+              ngram: int = 3, min_shared: int = 1, max_key_share: float = 1.0, forms1: NameForms | None = None,
+              forms2: NameForms | None = None):
+    """``(names1, names2, csr)`` top-*k* alignment of one entity type of one pair."""
+    from scipy.sparse import csr_matrix
+    names1 = EntityCatalog.from_table(df1, kind, transform=local_name).sorted_names()
+    names2 = EntityCatalog.from_table(df2, kind, transform=local_name).sorted_names()
+    if blocking == "none" or not names1 or not names2:
+        return names1, names2, topk_matrix(names1, names2, k, score_cutoff, workers, forms1=forms1, forms2=forms2)
+    index = BlockingIndex(names2, blocking, ngram, max_key_share, forms2)
+    ci, cj = index.candidates(names1, min_shared, forms1)
+    cs = score_pairs(names1, names2, ci, cj, score_cutoff=score_cutoff, workers=workers,
+                     forms1=forms1, forms2=forms2)
+    i, j, s = rank_matches(ci, cj, cs, score_cutoff, k)
+    return names1, names2, csr_matrix((s.astype(np.float32), (i, j)), shape=(len(names1), len(names2)))
+
+
+def save_topk(path: str, names1: list[str], names2: list[str], matrix, p1: str, p2: str) -> None:
+    """Write a top-*k* alignment ``.npz`` (CSR arrays + both name lists + tags)."""
+    np.savez_compressed(path, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                        shape=np.asarray(matrix.shape), names1=np.asarray(names1, dtype=str),
+                        names2=np.asarray(names2, dtype=str), tags=np.asarray([p1, p2], dtype=str))
+
+
+def load_topk(path: str):
+    """``(csr, names1, names2, (p1, p2))`` of a file written by :func:`save_topk`."""
+    from scipy.sparse import csr_matrix
+    with np.load(path) as data:
+        matrix = csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+        return matrix, data["names1"].tolist(), data["names2"].tolist(), tuple(data["tags"].tolist())
+
+
+def topk_edges(path: str, score_cutoff: float = 0.0) -> Iterator[tuple[str, str, float]]:
+    """``("<p1>:name", "<p2>:name", score)`` edges, ready for ``G.add_weighted_edges_from``."""
+    matrix, names1, names2, (p1, p2) = load_topk(path)
+    coo = matrix.tocoo()
+    for i, j, s in zip(coo.row, coo.col, coo.data):
+        if s >= score_cutoff:
+            yield f"{p1}:{names1[i]}", f"{p2}:{names2[j]}", round(float(s), 2)
+
+
+# ───────────────────────── one-to-one ─────────────────────────
+def _assign_sparse(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n1: int, n2: int) -> tuple[np.ndarray, np.ndarray]:
+    """LAPJVsp on the edge list: a private dummy column per row (cost ``M``)
+    keeps a full matching feasible, real edges cost ``M - score``."""
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+    m = float(vals.max()) + 1.0
+    cost = csr_matrix((np.concatenate([m - vals, np.full(n1, m)]),
+                       (np.concatenate([rows, np.arange(n1)]), np.concatenate([cols, n2 + np.arange(n1)]))),
+                      shape=(n1, n2 + n1))
+    row_ind, col_ind = min_weight_full_bipartite_matching(cost)
+    real = col_ind < n2
+    return row_ind[real], col_ind[real]
+
+
+def _assign_dense(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n1: int, n2: int) -> tuple[np.ndarray, np.ndarray]:
+    from scipy.optimize import linear_sum_assignment
+    dense = np.zeros((n1, n2))
+    dense[rows, cols] = vals
+    r, c = linear_sum_assignment(dense, maximize=True)
+    real = dense[r, c] > 0                             # a zero cell is "no match"
+    return r[real], c[real]
+
+
+def one_to_one(matrix, dense_cells: int = ASSIGN_DENSE_CELLS):
+    """Maximum-weight one-to-one matching of a sparse score matrix (CSR in, CSR out).
+
+    The bipartite graph of the non-zero cells is split into connected
+    components first; lexical matches form many small components, each
+    solved on its own — densely with ``linear_sum_assignment`` when it has
+    at most *dense_cells* cells, otherwise with the sparse
+    ``min_weight_full_bipartite_matching`` — so a ``50k × 50k`` matrix never
+    becomes a dense problem.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    coo = matrix.tocoo()
+    keep = coo.data > 0
+    rows, cols, vals = coo.row[keep], coo.col[keep], coo.data[keep]
+    n1, n2 = matrix.shape
+    if not len(vals):
+        return csr_matrix(matrix.shape, dtype=np.float64)
+
+    graph = csr_matrix((np.ones(len(rows)), (rows, n1 + cols)), shape=(n1 + n2, n1 + n2))
+    _, labels = connected_components(graph, directed=False)
+    edge_label = labels[rows]
+    order = np.argsort(edge_label, kind="stable")
+    bounds = np.flatnonzero(np.diff(edge_label[order])) + 1
+    out_i, out_j = [], []
+    for edges in np.split(order, bounds):
+        r_ids, r_loc = np.unique(rows[edges], return_inverse=True)
+        c_ids, c_loc = np.unique(cols[edges], return_inverse=True)
+        solve = _assign_dense if len(r_ids) * len(c_ids) <= dense_cells else _assign_sparse
+        a, b = solve(r_loc, c_loc, vals[edges], len(r_ids), len(c_ids))
+        out_i.append(r_ids[a])
+        out_j.append(c_ids[b])
+    i, j = np.concatenate(out_i), np.concatenate(out_j)
+    return csr_matrix((np.asarray(matrix[i, j]).ravel(), (i, j)), shape=matrix.shape)
+
+
+def ontology_pairs(tags: list[str]) -> list[tuple[str, str]]:
+    """``OSN, MP, MCSS, OFB`` → the six pairs OSN-MP, OSN-MCSS, …, MCSS-OFB."""
+    return list(combinations(tags, 2))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""table_io.py — CSV / TSV / Parquet / Arrow IPC interchange between stages
+
+Every stage hands its output to the next one as a table: the extraction
+CSVs, the ``matched_*`` string-matching files, ``matched-class.csv`` and the
+RAG ``llm_alignment_final_*.tsv``.  The format is picked from the file
+extension:
+
+=============  ==========================================================
+``.csv``       comma separated (default, for humans)
+``.tsv``       tab separated
+``.parquet``   Parquet, dictionary-encoded string columns
+``.arrow``     Arrow IPC file (``.feather`` too), uncompressed so readers
+               can memory-map it without copying
+=============  ==========================================================
+
+Parquet and Arrow need ``pyarrow``; it is imported lazily so the CSV path
+keeps working without it.
+"""
+from __future__ import annotations
+import csv
+import os
+from typing import Iterable, Sequence
+
+FORMAT_BY_EXT = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+EXT_BY_FORMAT = {"csv": ".csv", "tsv": ".tsv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def table_format(path: str) -> str:
+    ext = os.path.splitext(str(path))[1].lower()
+    try:
+        return FORMAT_BY_EXT[ext]
+    except KeyError:
+        raise ValueError(f"Unknown table format for '{path}' (expected one of {sorted(FORMAT_BY_EXT)})") from None
+
+
+def with_format(path: str, fmt: str) -> str:
+    """``OP2 OFB.csv`` + ``parquet`` → ``OP2 OFB.parquet``."""
+    return os.path.splitext(str(path))[0] + EXT_BY_FORMAT[fmt]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow output needs pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def _dictionary_encode(table):
+    """Dictionary-encode every string column (names and comments repeat a lot)."""
+    pa = _pyarrow()
+    columns = []
+    for col in table.columns:
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            col = col.dictionary_encode()
+        columns.append(col)
+    return pa.table(columns, names=table.column_names)
+
+
+def _write_arrow_table(table, path: str, fmt: str) -> None:
+    pa = _pyarrow()
+    table = _dictionary_encode(table)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, use_dictionary=True)
+    else:
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_records(rows: Iterable[Sequence], header: Sequence[str], path: str) -> None:
+    """Write plain row tuples (no pandas needed) in the format of *path*."""
+    fmt = table_format(path)
+    if fmt in ("csv", "tsv"):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter='\t' if fmt == "tsv" else ',')
+            writer.writerow(header)
+            writer.writerows(rows)
+        return
+    pa = _pyarrow()
+    rows = list(rows)
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+    _write_arrow_table(pa.table(columns), path, fmt)
+
+
+def write_table(df, path: str) -> None:
+    """Write a DataFrame in the format of *path* (never writes the index)."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False, encoding='utf-8')
+    elif fmt == "tsv":
+        df.to_csv(path, index=False, sep='\t', encoding='utf-8')
+    else:
+        pa = _pyarrow()
+        _write_arrow_table(pa.Table.from_pandas(df, preserve_index=False), path, fmt)
+
+
+def read_arrow(path: str):
+    """Open a Parquet / Arrow file as a ``pyarrow.Table`` (memory-mapped)."""
+    pa = _pyarrow()
+    fmt = table_format(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    if fmt == "arrow":
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    raise ValueError(f"'{path}' is not a Parquet/Arrow file")
+
+
+def read_table(path: str, categorical: bool = False, **csv_kwargs):
+    """Read any supported table into a DataFrame.
+
+    CSV/TSV go through ``pd.read_csv`` (extra keyword arguments are passed
+    on, and ignored for the other formats).  Parquet/Arrow are memory-mapped
+    and converted column by column, releasing each Arrow buffer as soon as
+    it has been converted, so the peak is about one copy of the table rather
+    than two; it is still a copy, not a zero-copy view.  Dictionary-encoded
+    columns arrive as ``category`` and, unless ``categorical=True``, are
+    expanded from their categories to the string dtype a CSV read gives, so
+    code written for the CSV files (``fillna("")``, ``str`` ops) keeps
+    working.
+    """
+    import pandas as pd
+    fmt = table_format(path)
+    if fmt == "csv":
+        return pd.read_csv(path, **csv_kwargs)
+    if fmt == "tsv":
+        return pd.read_csv(path, sep='\t', **csv_kwargs)
+    df = read_arrow(path).to_pandas(self_destruct=True, split_blocks=True)
+    if not categorical:
+        for name in df.columns:
+            if isinstance(df[name].dtype, pd.CategoricalDtype):
+                df[name] = df[name].astype(df[name].cat.categories.dtype)
+    return df
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""test_ann_index.py — ANN retriever wrapper and empty target sets
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_ann_index.py
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ann_index import ExactIndex, IVFIndex, ann_retriever_class, load_or_build
+
+DIM = 16
+
+
+class BruteForce:
+    """Stand-in for ontomap's BiEncoderRetrieval: embed in fit, cosine against every candidate."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def fit(self, inputs):
+        rng = np.random.default_rng(len(inputs))
+        return rng.normal(size=(len(inputs), DIM)).astype(np.float32)
+
+    def estimate_similarity(self, query_embed, candidate_embeds):
+        q = query_embed / np.linalg.norm(query_embed, axis=-1, keepdims=True)
+        c = candidate_embeds / np.linalg.norm(candidate_embeds, axis=1, keepdims=True)
+        return q @ c.T
+
+
+@pytest.fixture
+def queries():
+    return np.random.default_rng(1).normal(size=(20, DIM)).astype(np.float32)
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_retriever_top_k_comes_from_index(tmp_path, queries, kind):
+    retriever = ann_retriever_class(BruteForce, kind, index_dir=tmp_path)(path="m", top_k=5)
+    targets = retriever.fit([f"t{i}" for i in range(400)])
+    scores = retriever.estimate_similarity(queries, targets)
+    assert scores.shape == (20, 400)
+    assert retriever.estimate_similarity(queries[0], targets).shape == (400,)
+    ids, _ = retriever.ann_index.search(queries, 5)
+    for row, found in zip(scores, ids):
+        assert set(np.argsort(-row, kind="stable")[:5]) == set(found[found >= 0])
+    if kind == "exact":
+        exact = BruteForce.estimate_similarity(retriever, queries, targets)
+        assert all(set(np.argsort(-a)[:5]) == set(np.argsort(-b)[:5]) for a, b in zip(scores, exact))
+    assert list(tmp_path.glob("retriever_*.npz"))
+
+
+def test_empty_targets_fall_back(tmp_path, queries):
+    retriever = ann_retriever_class(BruteForce, "ivf")(path="m", top_k=5)
+    retriever.fit([])
+    assert retriever.ann_index is None
+    index, built = load_or_build(tmp_path / "empty.npz", [], np.empty((0, DIM)), "ivf")
+    assert built and isinstance(index, ExactIndex)
+    assert index.search(queries, 5)[0].shape == (20, 0)
+    with pytest.raises(ValueError):
+        IVFIndex.build(np.empty((0, DIM)))
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""test_cascade.py — skipped tier and decision scores
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_cascade.py
+"""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from cascade import (TIER_FLOOR, TIER_LEXICAL, TIER_LLM, TIER_SKIPPED, cascade_tiers, decided_alignments,
+                     merge_decisions)
+
+OSN = "http://osn#"
+MP = "http://mp#"
+
+
+@pytest.fixture
+def candidates():
+    return pd.DataFrame({
+        "Source": [OSN + "User", OSN + "User", OSN + "Post"],
+        "Target": [MP + "User", MP + "UserAccount", MP + "Zebra"],
+        "Score": [0.95, 0.7, 0.1],
+    })
+
+
+def test_middle_band_goes_to_llm_without_one_per_source(candidates):
+    tiered = cascade_tiers(candidates, workers=1)
+    assert list(tiered["Tier"]) == [TIER_LEXICAL, TIER_LLM, TIER_FLOOR]
+    assert list(tiered["Label"]) == ["yes", "", "no"]
+
+
+def test_middle_band_skipped_with_one_per_source(candidates):
+    tiered = cascade_tiers(candidates, workers=1, one_per_source=True)
+    assert list(tiered["Tier"]) == [TIER_LEXICAL, TIER_SKIPPED, TIER_FLOOR]
+    assert list(tiered["Label"]) == ["yes", "no", "no"]
+
+
+def test_decided_scores_on_llm_scale(candidates):
+    decided = decided_alignments(cascade_tiers(candidates, workers=1))
+    assert [(a["label"], a["score"]) for a in decided] == [("yes", 1.0), ("no", 0.0)]
+    assert decided[0]["embedding"] == pytest.approx(0.95)
+    llm = [{"source": OSN + "User", "target": MP + "UserAccount", "label": "yes", "score": 0.8}]
+    merged = merge_decisions(decided, llm)
+    assert max((a for a in merged if a["source"] == OSN + "User"), key=lambda a: a["score"])["target"] == MP + "User"
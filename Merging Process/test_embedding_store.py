@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""test_embedding_store.py — stores shared between instances and processes
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_embedding_store.py
+"""
+from __future__ import annotations
+
+import multiprocessing
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, text_hash
+
+DIM = 8
+
+
+def fake_encode(texts: list[str]) -> np.ndarray:
+    """Deterministic vector per text, so rows can be checked against their key."""
+    return np.stack([np.random.default_rng(int(text_hash(t)[:8], 16)).normal(size=DIM) for t in texts])
+
+
+def _worker(root: str, offset: int) -> None:
+    store = EmbeddingStore("model", "repr", root)
+    texts = [f"entity {i}" for i in range(offset, offset + 200)]
+    for start in range(0, len(texts), 10):
+        store.embed(texts[start:start + 10], fake_encode, batch_size=5)
+
+
+def _check(root) -> EmbeddingStore:
+    store = EmbeddingStore("model", "repr", root)
+    assert store.vectors_path.stat().st_size == len(store) * DIM * 2
+    texts = [f"entity {i}" for i in range(len(store))]
+    calls = []
+    vectors = store.embed(texts, lambda chunk: calls.append(chunk) or fake_encode(chunk))
+    assert not calls
+    np.testing.assert_allclose(vectors, fake_encode(texts).astype(np.float16), rtol=0, atol=0)
+    return store
+
+
+def test_stale_instance_does_not_duplicate(tmp_path):
+    a = EmbeddingStore("model", "repr", tmp_path)
+    b = EmbeddingStore("model", "repr", tmp_path)
+    a.embed(["entity 0", "entity 1"], fake_encode)
+    b.embed(["entity 1", "entity 2"], fake_encode)      # b has not seen a's rows
+    a.embed(["entity 2", "entity 3"], fake_encode)
+    store = _check(tmp_path)
+    assert len(store) == 4
+
+
+def test_concurrent_processes(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker, args=(str(tmp_path), offset)) for offset in (0, 100, 50, 150)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+        assert p.exitcode == 0
+    store = _check(tmp_path)
+    assert len(store) == 350
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""test_entity_catalog.py — first-occurrence names and comments of EntityCatalog
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_entity_catalog.py
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from entity_catalog import EntityCatalog
+
+
+def test_missing_name_does_not_shift_comments():
+    df = pd.DataFrame({
+        "class": ["A", np.nan, "B", "C"],
+        "subClass": ["A1", "B1", np.nan, "C1"],
+        "classComment": ["a", "lost", "b", "c"],
+        "subClassComment": ["a1", "b1", "lost", "c1"],
+    })
+    cat = EntityCatalog.from_table(df, "class")
+    assert cat.names == ["A", "A1", "B1", "B", "C", "C1"]
+    assert cat.comment_map() == {"A": "a", "A1": "a1", "B1": "b1", "B": "b", "C": "c", "C1": "c1"}
+
+
+def test_transform_returning_none_is_skipped():
+    df = pd.DataFrame({"predicate": ["x#p", "skip", "x#q"], "predicateComment": ["p", "s", "q"]})
+    cat = EntityCatalog.from_table(df, "op", transform=lambda n: n.split("#")[-1] if "#" in n else None)
+    assert cat.comment_map() == {"p": "p", "q": "q"}
+
+
+def test_matches_keep_first_comment():
+    df = pd.DataFrame({"ont 1": ["OSN:A", "OSN:A"], "ont 2": ["MP:B", "MP:C"],
+                       "Comment Onto 1": ["first", "second"], "Comment Onto 2": [None, "c"]})
+    cat = EntityCatalog.from_matches(df)
+    assert cat.comment_map() == {"OSN:A": "first", "MP:B": "", "MP:C": "c"}
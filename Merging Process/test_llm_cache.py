@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""test_llm_cache.py — per-prompt reuse of LLM answers across batches
+
+The stand-in LLM classes record which prompts reach the real ``generate``.
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_llm_cache.py
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from llm_cache import LLMCache, LLMCacheError, cached_llm_class
+
+
+class Recorder:
+    def __init__(self, **kwargs):
+        self.calls: list[list[str]] = []
+
+    def generate(self, input_data, *args, **kwargs):
+        self.calls.append(list(input_data))
+        return self.answer(list(input_data))
+
+
+class Texts(Recorder):
+    def answer(self, prompts):
+        return [p.upper() for p in prompts]
+
+
+class TextsAndProbas(Recorder):
+    def answer(self, prompts):
+        return [p.upper() for p in prompts], [len(p) / 10 for p in prompts]
+
+
+class Opaque(Recorder):
+    def answer(self, prompts):
+        return {"joined": "|".join(prompts)}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LLMCache(tmp_path / "llm.sqlite")
+    yield c
+    c.close()
+
+
+def llm(base, cache):
+    return cached_llm_class(base, cache)(model_name="m", temperature=0.0, max_token_length=10)
+
+
+def test_list_outputs_are_reused_per_prompt(cache):
+    model = llm(Texts, cache)
+    assert model.generate(["a", "b"]) == ["A", "B"]
+    assert model.generate(["b", "c", "a"]) == ["B", "C", "A"]
+    assert model.calls == [["a", "b"], ["c"]]
+
+
+def test_tuple_outputs_are_split_per_prompt(cache):
+    model = llm(TextsAndProbas, cache)
+    assert model.generate(["a", "bb"]) == (["A", "BB"], [0.1, 0.2])
+    assert model.generate(["bb", "ccc"]) == (["BB", "CCC"], [0.2, 0.3])
+    assert model.generate(["ccc", "a"]) == (["CCC", "A"], [0.3, 0.1])
+    assert model.calls == [["a", "bb"], ["ccc"]]
+    label, score = cache.conn.execute("SELECT label, score FROM decisions WHERE label = 'BB'").fetchone()
+    assert (label, score) == ("BB", 0.2)
+
+
+def test_opaque_output_on_partial_hit_asks_whole_batch(cache):
+    llm(Texts, cache).generate(["a"])
+    model = llm(Opaque, cache)
+    assert model.generate(["a", "b"]) == {"joined": "a|b"}          # no LLMCacheError mid-run
+    assert model.calls == [["b"], ["a", "b"]]
+    assert model.generate(["a", "b"]) == {"joined": "a|b"}          # now a call-level hit
+    assert len(model.calls) == 2
+
+
+def test_numpy_values_round_trip(cache):
+    class NumpyProbas(Recorder):
+        def answer(self, prompts):
+            return list(prompts), np.array([0.5] * len(prompts), dtype=np.float32)
+
+    model = llm(NumpyProbas, cache)
+    model.generate(["a", "b"])
+    assert model.generate(["b"]) == (["b"], [0.5])
+    assert model.calls == [["a", "b"]]
+
+
+def test_non_json_output_is_not_cached(cache):
+    class Objects(Recorder):
+        def answer(self, prompts):
+            return [object() for _ in prompts]
+
+    model = llm(Objects, cache)
+    with pytest.warns(RuntimeWarning):
+        outputs = model.generate(["a"])
+    assert len(outputs) == 1 and len(cache) == 0 and cache.rejected == 1
+    with pytest.raises(LLMCacheError):
+        cache.put_many([("k", "m", "h", 0.0, 10, object())])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""test_llm_dispatch.py — AsyncLLMClient against a local stub /chat/completions server
+
+The stub answers each prompt with the prompt itself.  ``bad…`` prompts get a
+``400``; ``limit…`` prompts get one ``429`` with ``Retry-After`` first.
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_llm_dispatch.py
+"""
+from __future__ import annotations
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_dispatch import AsyncLLMClient, LLMBatchError, async_llm_class
+
+RETRY_AFTER = 0.3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][0]["content"]
+        server = self.server
+        with server.lock:
+            server.calls.append((time.monotonic(), prompt))
+            limited = prompt.startswith("limit") and prompt not in server.limited
+            server.limited.add(prompt)
+        if prompt.startswith("bad"):
+            return self._reply(400, {"error": {"message": "bad prompt"}})
+        if limited:
+            return self._reply(429, {"error": {"message": "slow down"}}, {"Retry-After": str(RETRY_AFTER)})
+        self._reply(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": prompt},
+                                       "logprobs": {"content": [{"token": prompt, "logprob": -0.1,
+                                                                 "top_logprobs": []}]}}]})
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.calls, server.limited = [], set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client(server, **kwargs) -> AsyncLLMClient:
+    return AsyncLLMClient("stub", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", api_key="x", **kwargs)
+
+
+def test_responses_keep_prompt_order(stub):
+    prompts = [f"p{i}" for i in range(20)]
+    responses = client(stub).complete_all(prompts)
+    assert [AsyncLLMClient.text(r) for r in responses] == prompts
+    assert responses[0].choices[0].logprobs.content[0].logprob == -0.1
+
+
+def test_request_bucket_paces_after_burst(stub):
+    # the bucket holds one minute (120 requests) and refills at 2/s: 2 extra requests wait ~1 s
+    start = time.monotonic()
+    client(stub, rpm=120, max_in_flight=16).complete_all([f"p{i}" for i in range(122)])
+    assert time.monotonic() - start >= 0.9
+    assert len(stub.calls) == 122
+
+
+def test_429_pauses_and_retries_after_retry_after(stub):
+    llm = client(stub, max_in_flight=1)
+    responses = llm.complete_all(["limit-a", "p1", "p2"])
+    assert [AsyncLLMClient.text(r) for r in responses] == ["limit-a", "p1", "p2"]
+    assert llm.retries == 1
+    (first, _), (second, _) = stub.calls[0], stub.calls[1]
+    assert second - first >= RETRY_AFTER * 0.9      # the next request waited for Retry-After
+
+
+def test_failed_prompt_keeps_other_results(stub):
+    with pytest.raises(LLMBatchError) as info:
+        client(stub).complete_all(["p0", "bad", "p2"])
+    assert sorted(info.value.results) == [0, 2]
+    assert AsyncLLMClient.text(info.value.results[2]) == "p2"
+    assert list(info.value.errors) == [1]
+
+
+class Base:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_generate_recovers_partial_list_outputs(stub):
+    class Texts(Base):
+        def post_processor(self, responses):
+            return [AsyncLLMClient.text(r).upper() for r in responses]
+
+    llm = async_llm_class(Texts, base_url=f"http://127.0.0.1:{stub.server_address[1]}/v1", api_key="x")(model_name="stub")
+    assert llm.generate(["a", "b"]) == ["A", "B"]
+    with pytest.raises(LLMBatchError) as info:
+        llm.generate(["a", "bad", "c"])
+    assert info.value.results == {0: "A", 2: "C"}
+
+
+def test_generate_does_not_split_tuple_outputs(stub):
+    class TextsAndProbas(Base):
+        def post_processor(self, responses):
+            return [AsyncLLMClient.text(r) for r in responses], [0.9] * len(responses)
+
+    llm = async_llm_class(TextsAndProbas, base_url=f"http://127.0.0.1:{stub.server_address[1]}/v1",
+                          api_key="x")(model_name="stub")
+    with pytest.raises(LLMBatchError) as info:
+        llm.generate(["a", "bad", "c"])                # 2 done prompts, 2-tuple output
+    assert info.value.results == {}
+
+
+def test_generate_rejects_non_string_input(stub):
+    llm = async_llm_class(Base, base_url=f"http://127.0.0.1:{stub.server_address[1]}/v1", api_key="x")(model_name="stub")
+    with pytest.raises(TypeError):
+        llm.generate("one prompt")
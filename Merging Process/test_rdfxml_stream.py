@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""test_rdfxml_stream.py — streamed vs. full rdflib extraction on the repo's ontologies
+
+Run from ``Merging Process``::
+
+    python -m pytest -q test_rdfxml_stream.py
+"""
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+rdflib = pytest.importorskip("rdflib")
+
+from graph_extract import build_index, extract_tables, graph_triples
+from rdfxml_stream import iter_schema_triples
+
+ONTOLOGY_DIR = Path(__file__).resolve().parent.parent / "Local Ontology"
+RDF_FILES = sorted(ONTOLOGY_DIR.rglob("*.rdf"))
+
+
+def _full_tables(path: Path) -> dict[str, list[tuple[str, ...]]]:
+    g = rdflib.Graph()
+    try:
+        g.parse(str(path), format="xml")
+    except Exception as e:                  # a few case files are not valid RDF/XML for rdflib
+        pytest.skip(f"rdflib tidak bisa mem-parse {path.name}: {type(e).__name__}")
+    return extract_tables(build_index(graph_triples(g)))
+
+
+@pytest.mark.parametrize("path", RDF_FILES, ids=lambda p: str(p.relative_to(ONTOLOGY_DIR)))
+def test_stream_matches_full_extraction(path: Path):
+    full = _full_tables(path)
+    streamed = extract_tables(build_index(iter_schema_triples(str(path))))
+    for name, rows in full.items():
+        assert Counter(streamed[name]) == Counter(rows), f"{name} berbeda untuk {path.name}"
+
+
+def test_punned_individual_keeps_schema_rows():
+    # #CloseFriends is an owl:NamedIndividual (declared first) and an owl:Class
+    path = ONTOLOGY_DIR / "V2-OSN" / "completev2.rdf"
+    cls = extract_tables(build_index(iter_schema_triples(str(path))))["CLS"]
+    assert any(row[0].endswith("#StorySettings") and row[1].endswith("#CloseFriends")
+               and row[3] == "Represents the close friends list for account privacy settings."
+               for row in cls)